@@ -0,0 +1,540 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from binance_api import BinanceManager
+from data_classes import CryptoPair, Order, SymbolFilters
+from market_data import PriceSnapshot
+from observable import TradeStrategy
+from profit import ProfitAggregate
+from trader import Trader
+from user_stream import OrderIndex
+from wallet_cache import WalletCache
+from globals import *
+from logger import logger, rate_limit_filter
+
+
+def load_ticks(path: str, tick_format: str = TICK_FORMAT_KLINES) -> Tuple[List[float], List[float]]:
+    """
+    Loads a Binance historical data CSV (data.binance.vision layout) as parallel lists of timestamps and prices.
+
+    Klines are expanded into four ticks per candle: open, low and high in the order that matches the
+    candle direction, and close. Trades and aggTrades files give one tick per trade. Header lines are skipped.
+
+    Args:
+        path (str): Path to the CSV file.
+        tick_format (str): TICK_FORMAT_KLINES, TICK_FORMAT_TRADES or TICK_FORMAT_AGG_TRADES.
+
+    Returns:
+        tuple: (timestamps in seconds, prices)
+    """
+    times: List[float] = []
+    prices: List[float] = []
+
+    time_column = {TICK_FORMAT_TRADES: 4, TICK_FORMAT_AGG_TRADES: 5}.get(tick_format)
+
+    with open(path, "r", newline="") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip().isdigit():
+                continue
+
+            if tick_format == TICK_FORMAT_KLINES:
+                open_time, close_time = int(row[0]), int(row[6])
+                scale = 1e6 if open_time > 1e14 else 1e3
+                start, end = open_time / scale, (close_time + 1) / scale
+                quarter = (end - start) / 4
+
+                open_price, high, low, close = float(row[1]), float(row[2]), float(row[3]), float(row[4])
+                first, second = (low, high) if close >= open_price else (high, low)
+
+                times.extend((start, start + quarter, start + 2 * quarter, start + 3 * quarter))
+                prices.extend((open_price, first, second, close))
+            elif time_column is not None:
+                timestamp = int(row[time_column])
+                times.append(timestamp / (1e6 if timestamp > 1e14 else 1e3))
+                prices.append(float(row[1]))
+            else:
+                raise ValueError(f"Unknown tick format {tick_format}")
+
+    logger.debug(f"Loaded {len(prices)} ticks from {path}.")
+    return times, prices
+
+
+def load_symbol_filters(snapshot_path: str, symbol: str) -> Optional[SymbolFilters]:
+    """Reads the filters of a symbol from an exchange info snapshot written by SymbolFilterCache, ignoring its TTL."""
+    with open(snapshot_path, "r") as f:
+        snapshot = json.load(f)
+
+    data = snapshot[SYMBOLS].get(symbol)
+    return SymbolFilters(**data) if data else None
+
+
+class BacktestOrderStore:
+    """
+    In-memory replacement of FirebaseManager for the backtest.
+
+    Keeps the latest record of every order and the profit aggregate, using the same rule as
+    FirebaseManager.add_order_to_firebase: a BUY order adds its profit once, when it becomes FILLED.
+    """
+
+    def __init__(self):
+        self.orders: Dict[str, dict] = {}
+        self.profit = ProfitAggregate()
+
+    def add_order_to_firebase(self, order: Order):
+        if order is None:
+            return
+
+        record = order.to_dict()
+        previous = self.orders.get(str(order.order_id))
+
+        if ProfitAggregate.counts_towards_profit(record) and (previous is None or previous[STATUS] != FILLED):
+            self.profit.add_order(order)
+
+        self.orders[str(order.order_id)] = record
+
+
+class SimulatedExchange(BinanceManager):
+    """
+    Simulated Binance account for a single symbol.
+
+    Only the REST calls are simulated: order formatting, tick and step rounding, min_notional checks
+    and the cancel-or-already-filled handling are inherited from BinanceManager, so the state machine
+    sees the same behaviour as live. A limit order fills completely at its limit price as soon as the
+    replayed price reaches it (SELL at or above, BUY at or below). Fees are charged on the received
+    asset: FEE_SELL_BINANCE_VALUE on the quote of a sell, FEE_BUY_BINANCE_VALUE on the base of a buy.
+
+    An order that is already marketable when placed also fills at its limit price rather than at the
+    current price, where Binance would give the better price. This is deliberately conservative: a
+    sell never receives more and a buy never pays less than its limit, so the replayed profit is a
+    lower bound rather than one inflated by the gap between two ticks.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        return object.__new__(cls)
+
+    def __init__(self, filters: SymbolFilters, base_balance: float, quote_balance: float, order_store: BacktestOrderStore):
+        self.filters = filters
+        self.symbol = filters.symbol
+        self.base_asset = filters.symbol[:-4]
+        self.quote_asset = filters.symbol[-4:]
+        self.order_store = order_store
+
+        self.free = {self.base_asset: float(base_balance), self.quote_asset: float(quote_balance)}
+        self.locked = {self.base_asset: 0.0, self.quote_asset: 0.0}
+
+        self.price = 0.0
+        self.now = 0.0
+        self.next_order_id = 1
+        self.orders: Dict[int, dict] = {}
+        self.limits: Dict[int, Tuple[str, float, float]] = {}
+        self.min_sell = math.inf
+        self.max_buy = -math.inf
+        self.filled: Set[int] = set()
+        self.fills = Counter()
+        self.cancels = 0
+
+        self.request_counts = Counter()
+        self.order_index = OrderIndex()
+        self.wallet = WalletCache(fetch_balances=self.fetch_wallet_balances)
+        self.price_snapshot = PriceSnapshot(fetch_ticker=None)
+        self.order_formatters = {}
+
+        self.handlers = {
+            'create_order': self.sim_create_order,
+            'get_order': self.sim_get_order,
+            'cancel_order': self.sim_cancel_order,
+            'cancel_replace_order': self.sim_cancel_replace_order,
+            'cancel_open_orders': self.sim_cancel_open_orders,
+            'get_account': self.sim_get_account,
+        }
+
+    def cached_filters(self, symbol: str) -> Optional[SymbolFilters]:
+        return self.filters if symbol == self.symbol else None
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def _call(self, method: str, priority: Optional[int] = None, droppable: bool = False, **params):
+        self.request_counts[method] += 1
+
+        handler = self.handlers.get(method)
+        if handler is None:
+            raise ValueError(f"{method} is not simulated")
+        return handler(**params)
+
+    def sim_create_order(self, symbol, side, quantity, price, **params) -> dict:
+        quantity, limit = float(quantity), float(price)
+
+        if symbol != self.symbol:
+            raise ValueError(f"Invalid symbol {symbol}.")
+        if quantity < self.filters.min_qty or (self.filters.max_qty and quantity > self.filters.max_qty):
+            raise ValueError("Filter failure: LOT_SIZE")
+        if quantity * limit < self.filters.min_notional:
+            raise ValueError("Filter failure: NOTIONAL")
+
+        asset, amount = (self.base_asset, quantity) if side == SELL else (self.quote_asset, quantity * limit)
+        if self.free[asset] < amount:
+            raise ValueError("Account has insufficient balance for requested action.")
+
+        self.free[asset] -= amount
+        self.locked[asset] += amount
+
+        order_id = self.next_order_id
+        self.next_order_id += 1
+        timestamp = int(self.now * 1000)
+
+        self.orders[order_id] = {
+            SYMBOL: symbol,
+            ORDER_ID: order_id,
+            PRICE: price,
+            ORIG_QTY: str(quantity),
+            EXECUTED_QTY: "0",
+            CUMMULATIVE_QUOTE_QTY: "0",
+            STATUS: NEW,
+            SIDE: side,
+            TIME: timestamp,
+            WORKING_TIME: timestamp,
+        }
+        self.limits[order_id] = (side, limit, quantity)
+
+        if (side == SELL and self.price >= limit) or (side == BUY and self.price <= limit):
+            self.fill(order_id)
+        self.update_bounds()
+
+        return dict(self.orders[order_id])
+
+    def sim_get_order(self, symbol, orderId, **params) -> dict:
+        order = self.orders.get(int(orderId))
+        if order is None:
+            raise ValueError("Order does not exist.")
+        return dict(order)
+
+    def sim_cancel_order(self, symbol, orderId, **params) -> dict:
+        order_id = int(orderId)
+        if order_id not in self.limits:
+            raise ValueError("Unknown order sent.")
+
+        side, limit, quantity = self.limits.pop(order_id)
+        asset, amount = (self.base_asset, quantity) if side == SELL else (self.quote_asset, quantity * limit)
+        self.locked[asset] -= amount
+        self.free[asset] += amount
+
+        self.orders[order_id][STATUS] = CANCELED
+        self.cancels += 1
+        self.update_bounds()
+
+        return dict(self.orders[order_id])
+
+    def sim_cancel_replace_order(self, symbol, cancelOrderId, side, quantity, price, **params) -> dict:
+        cancel_response = self.sim_cancel_order(symbol, cancelOrderId)
+        return {"cancelResponse": cancel_response, "newOrderResponse": self.sim_create_order(symbol, side, quantity, price)}
+
+    def sim_cancel_open_orders(self, symbol, **params) -> list:
+        if not self.limits:
+            raise ValueError("Unknown order sent.")
+        return [self.sim_cancel_order(symbol, order_id) for order_id in list(self.limits)]
+
+    def sim_get_account(self, **params) -> dict:
+        return {
+            BALANCES: [
+                {ASSET: asset, FREE: str(self.free[asset]), LOCKED: str(self.locked[asset])}
+                for asset in self.free
+            ]
+        }
+
+    def fill(self, order_id: int):
+        side, limit, quantity = self.limits.pop(order_id)
+
+        if side == SELL:
+            self.locked[self.base_asset] -= quantity
+            self.free[self.quote_asset] += quantity * limit * (1 - FEE_SELL_BINANCE_VALUE)
+        else:
+            self.locked[self.quote_asset] -= quantity * limit
+            self.free[self.base_asset] += quantity * (1 - FEE_BUY_BINANCE_VALUE)
+
+        order = self.orders[order_id]
+        order[STATUS] = FILLED
+        order[EXECUTED_QTY] = order[ORIG_QTY]
+        order[CUMMULATIVE_QUOTE_QTY] = str(quantity * limit)
+
+        self.fills[side] += 1
+        self.filled.add(order_id)
+
+    def match(self) -> bool:
+        """Fills every open order the current price has reached. Returns True if anything was filled."""
+        price = self.price
+        crossed = [
+            order_id for order_id, (side, limit, _) in self.limits.items()
+            if (side == SELL and price >= limit) or (side == BUY and price <= limit)
+        ]
+
+        for order_id in crossed:
+            self.fill(order_id)
+        self.update_bounds()
+
+        return bool(crossed)
+
+    def update_bounds(self):
+        """Recomputes the lowest open sell and the highest open buy limit, which the replay loop compares every tick against."""
+        self.min_sell = min((limit for side, limit, _ in self.limits.values() if side == SELL), default=math.inf)
+        self.max_buy = max((limit for side, limit, _ in self.limits.values() if side == BUY), default=-math.inf)
+
+    def equity(self) -> float:
+        """Value of the account in the quote asset at the current price."""
+        base = self.free[self.base_asset] + self.locked[self.base_asset]
+        quote = self.free[self.quote_asset] + self.locked[self.quote_asset]
+        return base * self.price + quote
+
+    async def get_price(self, symbol: str) -> float:
+        return self.price
+
+    def price_received_at(self, symbol: str) -> Optional[float]:
+        # Replayed ticks carry simulated times, which cannot be compared with the time orders complete
+        return None
+
+    async def get_order_status(self, trading_pair, order_id, droppable: bool = False):
+        return self.orders.get(int(order_id))
+
+    async def get_crypto_amounts(self, pair_name: str) -> dict:
+        return {
+            CRYPTO_AMOUNT_FREE: self.free[self.base_asset],
+            CRYPTO_AMOUNT_LOCKED: self.locked[self.base_asset],
+        }
+
+    async def monitor_buy_orders(self, cryptoPair: CryptoPair, strategy: TradeStrategy, order_store=None):
+        """Same as BinanceManager.monitor_buy_orders, reporting status changes to the backtest order store."""
+        for order in cryptoPair.buy_orders.open_orders():
+            current_status = self.orders.get(int(order.order_id))
+            if current_status and current_status[STATUS] != order.status:
+                self.order_store.add_order_to_firebase(
+                    cryptoPair.set_status(order_id=order.order_id, status=current_status[STATUS])
+                )
+
+
+@dataclass
+class BacktestResult:
+    symbol: str
+    ticks: int
+    elapsed: float
+    profit: float
+    profit_per_strategy: Dict[str, float]
+    sell_fills: int
+    buy_fills: int
+    cancels: int
+    evaluations: int
+    initial_equity: float
+    final_equity: float
+    final_state: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def evaluation_time(self) -> float:
+        """Average wall time of one Trader.step, in seconds, including the replay of the ticks in between."""
+        return self.elapsed / self.evaluations if self.evaluations else 0.0
+
+
+class Backtest:
+    """
+    Replays historical prices through Trader.step against a SimulatedExchange.
+
+    The state machine is the live one; only its exchange, order store and clock are swapped.
+    Instead of polling, a strategy is evaluated when one of its orders fills, when its sell timeout
+    or cooldown expires, or every monitor_interval seconds of simulated time while it is MONITORING,
+    so the per-tick cost is two price comparisons and one timestamp comparison.
+    """
+
+    def __init__(self, filters: SymbolFilters, strategies: List[TradeStrategy], base_balance: float, quote_balance: float = 0.0,
+                 allocation: Dict[str, float] = None, monitor_interval: float = SCHEDULER_POLL_INTERVAL):
+        self.filters = filters
+        self.strategies = strategies
+        self.base_balance = base_balance
+        self.quote_balance = quote_balance
+        self.allocation = allocation or {strategy.name: 1 for strategy in strategies}
+        self.monitor_interval = monitor_interval
+        self.watched: Dict[int, str] = {}
+
+    def next_wakeup(self, cryptoPair: CryptoPair, strategy: TradeStrategy, now: float) -> float:
+        """Returns the simulated time of the next deadline of the strategy and records the order it waits on."""
+        state = cryptoPair.current_state[strategy.name]
+        deadline = None
+
+        if state == TradeState.SELLING and cryptoPair.active_sell_order:
+            self.watched[int(cryptoPair.active_sell_order.order_id)] = strategy.name
+            # process_strategy cancels only once the elapsed time is strictly above the timeout
+            deadline = int(cryptoPair.active_sell_order.timestamp) / 1000 + strategy.timeout + 0.001
+        elif state == TradeState.COOLDOWN:
+            if cryptoPair.active_buy_order:
+                self.watched[int(cryptoPair.active_buy_order.order_id)] = strategy.name
+            if cryptoPair.executed_sell_order:
+                deadline = int(cryptoPair.executed_sell_order.timestamp) / 1000 + strategy.cooldown
+
+        return deadline if deadline and deadline > now else now + self.monitor_interval
+
+    async def run(self, times: List[float], prices: List[float]) -> BacktestResult:
+        global PAIRS
+
+        symbol = self.filters.symbol
+        order_store = BacktestOrderStore()
+        exchange = SimulatedExchange(self.filters, self.base_balance, self.quote_balance, order_store)
+
+        trader = Trader()
+        trader.exchange = exchange
+        trader.order_store = order_store
+        trader.clock = lambda: datetime.fromtimestamp(exchange.now)
+
+        PAIRS.pairs = {
+            **PAIRS.pairs,
+            symbol: {
+                "strategy_allocation": {name: self.allocation.get(name, 0) for name in (CRAZY_GIRL, POOR_ORPHAN, SENSIBLE_GUY)},
+                "trading_percentage": 1,
+            },
+        }
+
+        cryptoPair = CryptoPair(
+            pair=symbol,
+            value=0.0,
+            crypto_amount_free=0.0,
+            crypto_amount_locked=0.0,
+            min_notional=self.filters.min_notional,
+            tick_size=self.filters.tick_size,
+            step_size=self.filters.step_size,
+        )
+
+        if not prices:
+            raise ValueError("No ticks to replay.")
+
+        exchange.now, exchange.price = times[0], prices[0]
+        initial_equity = exchange.equity()
+
+        wake_at = {strategy.name: times[0] for strategy in self.strategies}
+        next_wake = times[0]
+        min_sell, max_buy = exchange.min_sell, exchange.max_buy
+        evaluations = 0
+
+        started = time.perf_counter()
+
+        for now, price in zip(times, prices):
+            filled = False
+            if price >= min_sell or price <= max_buy:
+                exchange.now, exchange.price = now, price
+                filled = exchange.match()
+
+            if filled or now >= next_wake:
+                exchange.now, exchange.price = now, price
+                exchange.price_snapshot.update(symbol, price, now)
+                woken = {self.watched.pop(order_id, None) for order_id in exchange.filled}
+                exchange.filled.clear()
+
+                for strategy in self.strategies:
+                    if strategy.name in woken or now >= wake_at[strategy.name]:
+                        try:
+                            await trader.step(cryptoPair, strategy)
+                            evaluations += 1
+                        except Exception as e:
+                            logger.exception(f"Strategy {strategy.name} failed on {symbol} at {datetime.fromtimestamp(now)}: {e}")
+                        wake_at[strategy.name] = self.next_wakeup(cryptoPair, strategy, now)
+
+                next_wake = min(wake_at.values())
+                min_sell, max_buy = exchange.min_sell, exchange.max_buy
+
+        elapsed = time.perf_counter() - started
+
+        return BacktestResult(
+            symbol=symbol,
+            ticks=len(prices),
+            elapsed=elapsed,
+            profit=order_store.profit.total,
+            profit_per_strategy=dict(order_store.profit.strategies),
+            sell_fills=exchange.fills[SELL],
+            buy_fills=exchange.fills[BUY],
+            cancels=exchange.cancels,
+            evaluations=evaluations,
+            initial_equity=initial_equity,
+            final_equity=exchange.equity(),
+            final_state={name: state.name for name, state in cryptoPair.current_state.items() if name in wake_at},
+        )
+
+
+def print_report(result: BacktestResult):
+    logger.info("=" * 50)
+    logger.info(f" Backtest {result.symbol} ".center(50, "="))
+    logger.info("=" * 50)
+    logger.info(f" Ticks          : {result.ticks} ({result.ticks_per_second:,.0f} ticks/s)")
+    logger.info(f" Profit         : {result.profit:.8f}")
+    for strategy, profit in result.profit_per_strategy.items():
+        logger.info(f"   {strategy:<13}: {profit:.8f}")
+    logger.info(f" Filled sells   : {result.sell_fills}")
+    logger.info(f" Filled buys    : {result.buy_fills}")
+    logger.info(f" Cancelled      : {result.cancels}")
+    logger.info(f" Evaluations    : {result.evaluations} ({result.evaluation_time * 1e6:,.1f} us each)")
+    logger.info(f" Initial equity : {result.initial_equity:.8f}")
+    logger.info(f" Final equity   : {result.final_equity:.8f}")
+    logger.info(f" Final state    : {result.final_state}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay historical Binance prices through the trading strategies against a simulated exchange.")
+    parser.add_argument("ticks_path", help="Binance kline, trades or aggTrades CSV file.")
+    parser.add_argument("--symbol", required=True, help="Trading pair, e.g. BTCUSDC.")
+    parser.add_argument("--format", default=TICK_FORMAT_KLINES, choices=[TICK_FORMAT_KLINES, TICK_FORMAT_TRADES, TICK_FORMAT_AGG_TRADES])
+    parser.add_argument("--exchange-info", help="Exchange info snapshot with the symbol filters (see EXCHANGE_INFO_SNAPSHOT_PATH).")
+    parser.add_argument("--tick-size", type=float, default=0.01)
+    parser.add_argument("--step-size", type=float, default=0.00001)
+    parser.add_argument("--min-notional", type=float, default=5.0)
+    parser.add_argument("--base-balance", type=float, required=True, help="Initial balance of the traded asset.")
+    parser.add_argument("--quote-balance", type=float, default=0.0, help="Initial balance of the quote asset.")
+    parser.add_argument("--strategy", action="append", choices=[CRAZY_GIRL, POOR_ORPHAN, SENSIBLE_GUY], help="Strategy to run, can be repeated. Defaults to crazy_girl.")
+    parser.add_argument("--buy-increase-indicator", type=float)
+    parser.add_argument("--profit-target", type=float)
+    parser.add_argument("--timeout", type=int)
+    parser.add_argument("--cooldown", type=int)
+    parser.add_argument("--multiplier", type=float)
+    parser.add_argument("--monitor-interval", type=float, default=SCHEDULER_POLL_INTERVAL, help="Seconds of simulated time between evaluations while MONITORING.")
+    args = parser.parse_args()
+
+    filters = load_symbol_filters(args.exchange_info, args.symbol) if args.exchange_info else None
+    if filters is None:
+        filters = SymbolFilters(symbol=args.symbol, tick_size=args.tick_size, step_size=args.step_size, min_notional=args.min_notional, min_qty=0.0, max_qty=0.0)
+
+    overrides = {
+        name: value for name, value in (
+            ("buy_increase_indicator", args.buy_increase_indicator),
+            ("profit_target", args.profit_target),
+            ("timeout", args.timeout),
+            ("cooldown", args.cooldown),
+            ("multiplier", args.multiplier),
+        ) if value is not None
+    }
+    strategies = [replace(STRATEGIES.strategies[name], **overrides) for name in (args.strategy or [CRAZY_GIRL])]
+
+    times, prices = load_ticks(args.ticks_path, args.format)
+
+    # Replaying months in seconds repeats the same error on every tick (e.g. an order below min_notional),
+    # so errors are rate limited like the DEBUG and INFO lines and only their count is reported
+    level, max_level = logger.level, rate_limit_filter.max_level
+    suppressed = rate_limit_filter.suppressed
+    logger.setLevel(logging.WARNING)
+    rate_limit_filter.max_level = logging.ERROR
+    try:
+        result = asyncio.run(Backtest(filters, strategies, args.base_balance, args.quote_balance, monitor_interval=args.monitor_interval).run(times, prices))
+    finally:
+        logger.setLevel(level)
+        rate_limit_filter.max_level = max_level
+
+    print_report(result)
+    if rate_limit_filter.suppressed > suppressed:
+        logger.info(f" Suppressed     : {rate_limit_filter.suppressed - suppressed} repeated log lines")
@@ -1,12 +1,45 @@
 
+import asyncio
+import logging
 import os
-from decimal import Decimal, ROUND_DOWN
-from typing import Dict
-from binance.client import Client
-from data_classes import CryptoPair, CryptoPairs, Order
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+import aiohttp
+from binance.client import AsyncClient, Client
+from binance.exceptions import BinanceAPIException
+from requests.adapters import HTTPAdapter
+from data_classes import CryptoPair, CryptoPairs, Order, SymbolFilters
+from exchange_info import SymbolFilterCache
+from market_data import PriceSnapshot
+from order_batch import OrderBatch, OrderOutcome, OrderRequest
+from order_format import OrderFormatter
+from order_path import OrderLatency, OrderPath, OrderSigner, ServerClock
+from order_history import OrderHistoryStore
+from rate_limit import RequestDropped, RequestGovernor
+from user_stream import OrderIndex, UserDataStream
+from wallet_cache import WalletCache
 from observable import TradeStrategy
 from globals import *
-from logger import logger
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Spot endpoints python-binance has no method for, called through its signed request helpers: (helper, path)
+SIGNED_ENDPOINTS = {
+    'cancel_replace_order': ('_post', 'order/cancelReplace'),
+    'cancel_open_orders': ('_delete', 'openOrders'),
+}
+
+
+def client_method(client, method: str):
+    """Returns the client method of the given name, or a signed request to its endpoint for the methods in SIGNED_ENDPOINTS."""
+    if method in SIGNED_ENDPOINTS:
+        helper, path = SIGNED_ENDPOINTS[method]
+        return lambda **params: getattr(client, helper)(path, True, data=params)
+    return getattr(client, method)
 
 
 class BinanceManager:
@@ -32,25 +65,167 @@ class BinanceManager:
             if not api_key or not secret_key:
                 raise ValueError("Binance API keys are missing. Please check that they are set in environment variables.")
 
-            self.client = Client(api_key, secret_key)
+            self.api_key = api_key
+            self.secret_key = secret_key
+
+            self.api_url = os.getenv(BINANCE_API_URL)
+
+            self.client = Client(api_key, secret_key, ping=not self.api_url)
+            if self.api_url:
+                self.client.API_URL = self.api_url
+            self.client.session.mount("https://", HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE))
 
-            logger.debug(f"Binance Trader successfully intializated!")
+            self.transport = os.getenv(BINANCE_TRANSPORT, TRANSPORT_ASYNC).lower()
+            self.async_client = None
+            self.executor = ThreadPoolExecutor(max_workers=HTTP_MAX_REQUESTS_PER_HOST)
+            self.request_semaphore = asyncio.Semaphore(HTTP_MAX_REQUESTS_PER_HOST)
+
+            self.symbol_filters = SymbolFilterCache(
+                fetch_exchange_info=lambda: self._call('get_exchange_info'),
+                snapshot_path=os.getenv(EXCHANGE_INFO_SNAPSHOT_PATH, DEFAULT_EXCHANGE_INFO_SNAPSHOT),
+            )
+            self.order_formatters: Dict[str, OrderFormatter] = {}
+            self.server_clock = ServerClock(fetch_server_time=lambda: self._call('get_server_time', droppable=True))
+            self.order_signer = OrderSigner(secret_key)
+            self.order_path: Optional[OrderPath] = None
+            self.order_latency = OrderLatency()
+            self.clock_task: Optional[asyncio.Task] = None
+            self.price_snapshot = PriceSnapshot(fetch_ticker=lambda **params: self._call('get_symbol_ticker', **params))
+            self.request_counts = Counter()
+            self.request_governor = RequestGovernor()
+            self.order_index = OrderIndex()
+            self.order_history = OrderHistoryStore(
+                fetch_orders=lambda **params: self._call('get_all_orders', **params),
+                directory=os.getenv(ORDER_HISTORY_PATH, DEFAULT_ORDER_HISTORY_DIR),
+            )
+            self.user_stream = UserDataStream(call=self._call, order_index=self.order_index)
+            self.wallet = WalletCache(fetch_balances=self.fetch_wallet_balances, is_streaming=lambda: self.user_stream.connected)
+            self.user_stream.add_event_handler(OUTBOUND_ACCOUNT_POSITION, self.wallet.apply_account_position)
+            self.user_stream.add_connect_listener(self.wallet.invalidate)
+
+            logger.debug(f"Binance Trader successfully intializated! Transport: {self.transport}")
 
         except ValueError as ve:
             logger.error(f"Initialization error: {ve}")
         except Exception as e:
             logger.exception(f"Error initializing Binance client: {e}")
 
-    def get_price(self, symbol: str) -> dict:
-        """Gets the current price for a given symbol from the Binance API."""
+    async def start(self):
+        """
+        Opens the pooled keep-alive HTTP session used by the async transport and starts the server clock.
+        Does nothing when both are already running.
+        """
+        if self.transport == TRANSPORT_ASYNC and not self.async_client:
+            await self.start_async_transport()
+
+        if not self.clock_task:
+            await self.start_server_clock()
+
+    async def start_async_transport(self):
         try:
-            price_data = self.client.get_symbol_ticker(symbol=symbol)
-            return price_data  # Zwracamy wynik jako słownik z ceną
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_SIZE,
+                limit_per_host=HTTP_MAX_REQUESTS_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            )
+            if self.api_url:
+                # AsyncClient.create pings the production endpoint before the URL can be overridden
+                self.async_client = AsyncClient(self.api_key, self.secret_key, session_params={"connector": connector})
+                self.async_client.API_URL = self.api_url
+            else:
+                self.async_client = await AsyncClient.create(
+                    self.api_key,
+                    self.secret_key,
+                    session_params={"connector": connector},
+                )
+            self.order_path = OrderPath(self.async_client, self.server_clock, self.order_signer)
+            logger.debug("Binance async transport started.")
         except Exception as e:
-            logger.exception(f"Error getting price for symbol {symbol}: {e}")
-            return {}
+            logger.exception(f"Failed to start Binance async transport, falling back to sync transport: {e}")
+            self.transport = TRANSPORT_SYNC
+
+    async def start_server_clock(self):
+        """
+        Measures the server clock offset once, which also opens the first pooled connection, and keeps
+        measuring it in the background. Every signed request is timestamped with the server clock.
+        """
+        try:
+            self.apply_clock_offset(await self.server_clock.sync())
+            logger.debug(f"Server clock offset {self.server_clock.offset_ms:.1f} ms (round trip {self.server_clock.round_trip_ms:.1f} ms).")
+        except Exception as e:
+            logger.warning(f"Failed to read the server time, signing with the local clock until the next sync: {e}")
+        self.clock_task = asyncio.create_task(self.server_clock.run(on_sync=self.apply_clock_offset))
+
+    def apply_clock_offset(self, offset_ms: float):
+        # python-binance adds timestamp_offset to the local time of every signed request
+        for client in (self.client, self.async_client):
+            if client:
+                client.timestamp_offset = offset_ms
+
+    async def close(self):
+        """Closes the async HTTP session, the sync transport worker pool and the server clock."""
+        if self.clock_task:
+            self.clock_task.cancel()
+            self.clock_task = None
+        if self.async_client:
+            await self.async_client.close_connection()
+            self.async_client = None
+            self.order_path = None
+        self.executor.shutdown(wait=False)
+        logger.debug("Binance transport closed.")
+
+    async def _call(self, method: str, priority: Optional[int] = None, droppable: bool = False, **params):
+        """
+        Issues a single Binance REST call through the configured transport.
+
+        With the async transport the call goes through the pooled aiohttp session, order placements
+        through the OrderPath, with the sync transport the blocking python-binance client runs in a
+        worker thread. In both cases the number of requests in flight is bounded by
+        HTTP_MAX_REQUESTS_PER_HOST, and the request waits for room in the request weight budget of
+        its priority (see RequestGovernor).
+
+        Args:
+            method (str): Name of the python-binance client method, e.g. 'get_symbol_ticker'.
+            priority (int): REQUEST_PRIORITY_*; defaults to the priority of the method.
+            droppable (bool): Raise RequestDropped instead of waiting when the weight budget is exhausted.
+            **params: Parameters passed to the client method.
+
+        Returns:
+            The decoded response of the client method.
+        """
+        await self.request_governor.acquire(method, params, priority=priority, droppable=droppable)
+        self.request_counts[method] += 1
+
+        client = self.async_client or self.client
+
+        async with self.request_semaphore:
+            try:
+                if self.order_path and method == 'create_order':
+                    response = await self.order_path.create_order(**params)
+                elif self.async_client:
+                    response = await client_method(self.async_client, method)(**params)
+                else:
+                    loop = asyncio.get_running_loop()
+                    response = await loop.run_in_executor(self.executor, partial(client_method(self.client, method), **params))
+            except BinanceAPIException as e:
+                self.request_governor.observe(e.status_code, getattr(e.response, "headers", None))
+                if e.code == TIMESTAMP_OUTSIDE_RECV_WINDOW:
+                    self.server_clock.request_sync(reset=True)
+                raise
+
+        # Concurrent requests share the client's last response; any of them carries the current weight
+        self.request_governor.observe(None, getattr(client.response, "headers", None))
+        return response
+
+    def pop_request_counts(self) -> Dict[str, int]:
+        """
+        Returns the number of REST calls per client method since the previous call and resets the counters.
+        """
+        counts = dict(self.request_counts)
+        self.request_counts.clear()
+        return counts
 
-    def get_tick_size(self, symbol):
+    async def get_tick_size(self, symbol):
         """
         Retrieves the tick size (price step) for a given trading pair symbol.
 
@@ -63,25 +238,34 @@ class BinanceManager:
         Raises:
             ValueError: If the tick size could not be retrieved.
         """
-        try:
-            # Fetch symbol information to retrieve the tick size
-            symbol_info = self.client.get_symbol_info(symbol)
-            for filter in symbol_info[FILTERS]:
-                if filter[FILTER_TYPE] == 'PRICE_FILTER':
-                    logger.debug(f"Tick size for {symbol} = {filter['tickSize']}")
-                    return float(filter['tickSize'])
-        except Exception as e:
-            # Raise an error with details if the tick size retrieval fails
-            logger.exception(f"Failed to retrieve tick size for {symbol}")
-            raise ValueError(f"Failed to retrieve tick size for {symbol}: {str(e)}")
+        filters = await self.symbol_filters.get(symbol)
+        if filters is None or not filters.tick_size:
+            logger.error(f"Failed to retrieve tick size for {symbol}")
+            raise ValueError(f"Failed to retrieve tick size for {symbol}: symbol not found in exchange info")
+
+        logger.debug("Tick size for %s = %s", symbol, filters.tick_size)
+        return filters.tick_size
 
-    def get_order_status(self, trading_pair, order_id):
+    async def get_order_status(self, trading_pair, order_id, droppable: bool = False):
         """
-        Checking order status
+        Checking order status. While the user-data stream is connected the status is served from
+        the order index; REST is used for unknown orders and to reconcile entries that were not
+        confirmed for ORDER_RECONCILE_INTERVAL.
+
+        A droppable lookup returns None instead of waiting when the request weight budget is exhausted.
         """
+        if self.user_stream.connected:
+            order = self.order_index.get(order_id)
+            if order:
+                return order
+
         try:
-            order = self.client.get_order(symbol=trading_pair, orderId=order_id)
+            order = await self._call('get_order', droppable=droppable, symbol=trading_pair, orderId=order_id)
+            self.order_index.update(order)
             return order
+        except RequestDropped as e:
+            logger.debug(f"Order status poll skipped: {e}")
+            return None
         except Exception as e:
             logger.exception(f"Error checking order status: {e}")
             return None
@@ -98,7 +282,7 @@ class BinanceManager:
         """
         try:
             # Fetch the list of open orders for the specified trading pair
-            open_orders = self.client.get_open_orders(symbol=trading_pair)
+            open_orders = await self._call('get_open_orders', symbol=trading_pair)
             return open_orders
         except Exception as e:
             # Handle errors by logging them and returning an empty list
@@ -117,62 +301,85 @@ class BinanceManager:
             dict or None: Information about the canceled order, or None if the cancellation failed.
         """
         try:
-            response = self.client.cancel_order(
+            response = await self._call(
+                'cancel_order',
                 symbol=trading_pair,
                 orderId=order_id
             )
             logger.info(f"Order {order_id} for {trading_pair} has been canceled.")
+            self.order_index.update(response)
+            self.wallet.invalidate()
             return response
         except Exception as e:
-            try:
-                order_status = self.client.get_order(
-                    symbol=trading_pair,
-                    orderId=order_id
-                )
-
-                if order_status.get('status') == 'FILLED':
-                    logger.info(f"Order {order_id} for {trading_pair} has already been filled.")
-                    return FILLED
-                else:
-                    logger.exception(f"Failed to cancel order {order_id} for {trading_pair}. Error: {e}")
-            except Exception as status_error:
-                logger.exception(f"Failed to retrieve status for order {order_id} for {trading_pair}. Error: {status_error}")
+            if await self.status_after_failure(trading_pair, order_id) == FILLED:
+                logger.info(f"Order {order_id} for {trading_pair} has already been filled.")
+                return FILLED
+            logger.exception(f"Failed to cancel order {order_id} for {trading_pair}. Error: {e}")
 
         return None
 
-    def get_wallet_balances(self):
+    async def status_after_failure(self, trading_pair, order_id) -> Optional[str]:
+        """
+        Fetches the status of an order after a request on it failed, e.g. a cancellation of an order that was filled first.
+
+        Returns:
+            str or None: The status of the order, or None if it could not be retrieved.
+        """
+        try:
+            order_status = await self._call(
+                'get_order',
+                priority=REQUEST_PRIORITY_ORDER,
+                symbol=trading_pair,
+                orderId=order_id
+            )
+            self.order_index.update(order_status)
+            return order_status.get(STATUS)
+        except Exception as status_error:
+            logger.exception(f"Failed to retrieve status for order {order_id} for {trading_pair}. Error: {status_error}")
+            return None
+
+    async def get_wallet_balances(self):
         """
-        Function to retrieve wallet balances from Binance.
+        Function to retrieve wallet balances from the shared wallet snapshot,
+        which is fetched from Binance when it is stale or was invalidated.
 
         :return: A dictionary with asset balances
         """
         try:
-            account_info = self.client.get_account()
-            balances = account_info[BALANCES]
-
-            wallet_balances = {}
-            for balance in balances:
-                asset = balance[ASSET]
-                free_amount = balance[FREE]
-                locked_amount = balance[LOCKED]
-
-                # Only include assets with non-zero balance
-                if float(free_amount) > 0 or float(locked_amount) > 0:
-                    wallet_balances[asset] = {
-                        FREE: free_amount,
-                        LOCKED: locked_amount
-                    }
-
-            return wallet_balances
+            return await self.wallet.get()
         except Exception as e:
             logger.exception(f"Error retrieving wallet balances: {e}")
             return {}
 
-    def get_value(self, pair: str, amount: float) -> float:
-        price = self.get_price(pair) 
+    async def fetch_wallet_balances(self):
+        """
+        Fetches wallet balances from Binance with one account request.
+
+        :return: A dictionary with asset balances
+        """
+        account_info = await self._call('get_account')
+        balances = account_info[BALANCES]
+
+        wallet_balances = {}
+        for balance in balances:
+            asset = balance[ASSET]
+            free_amount = balance[FREE]
+            locked_amount = balance[LOCKED]
+
+            # Only include assets with non-zero balance
+            if float(free_amount) > 0 or float(locked_amount) > 0:
+                wallet_balances[asset] = {
+                    FREE: free_amount,
+                    LOCKED: locked_amount
+                }
+
+        return wallet_balances
+
+    async def get_value(self, pair: str, amount: float) -> float:
+        price = await self.get_price(pair)
         return float(amount) * price
 
-    def get_value_of_stable_coins_and_crypto(self) -> tuple:
+    async def get_value_of_stable_coins_and_crypto(self) -> tuple:
         """
         Calculates the total value of stablecoins and other cryptocurrencies in the wallet using the Binance API.
 
@@ -183,7 +390,7 @@ class BinanceManager:
         stablecoins = ["USDT", "USDC", "BUSD", "DAI", "TUSD", "PAX", "HUSD", "GUSD", "SUSD", "EURS", "USTC"]
 
         # Fetch wallet balance from Binance
-        wallet = self.get_wallet_balances()  # This function should return wallet balance information
+        wallet = await self.get_wallet_balances()  # This function should return wallet balance information
 
         total_stablecoins_value = 0.0
         total_crypto_value = 0.0
@@ -203,19 +410,19 @@ class BinanceManager:
             else:
                 # Get the price for other cryptocurrencies in USDT
                 try:
-                    price = self.get_price(currency + "USDT")  # Assuming crypto pairs are listed in USDT to jest zle
+                    price = await self.get_price(currency + "USDT")  # Assuming crypto pairs are listed in USDT to jest zle
                     total_crypto_value += total_amount * price
                 except Exception as e:
                     logger.exception(f"Failed to fetch price for {currency}: {str(e)}")
 
-        logger.debug(f"Crypto value      :{total_crypto_value}")
-        logger.debug(f"Stablecoins value :{total_stablecoins_value}")
+        logger.debug("Crypto value: %s, stablecoins value: %s", total_crypto_value, total_stablecoins_value)
 
         return total_stablecoins_value, total_crypto_value
 
-    def get_price(self, symbol: str) -> float:
+    async def get_price(self, symbol: str) -> float:
         """
-        Retrieves the current price for a given symbol from the Binance API.
+        Retrieves the current price for a given symbol from the shared price snapshot,
+        which is refreshed from the Binance API when the price is older than PRICE_MAX_STALENESS.
 
         Args:
             symbol (str): The trading pair symbol, e.g., 'BTCUSDT'.
@@ -227,18 +434,21 @@ class BinanceManager:
             ValueError: If the price cannot be retrieved.
         """
         try:
-            # Fetch the current price for the specified trading pair
-            ticker = self.client.get_symbol_ticker(symbol=symbol)
-            logger.debug(f"Successfully retrieved price for {symbol}: {ticker[PRICE]}")
-            return float(ticker[PRICE])
+            price = await self.price_snapshot.get(symbol)
+            logger.debug("Successfully retrieved price for %s: %s", symbol, price, extra={"pair": symbol})
+            return price
         except Exception as e:
             # Raise an error if price retrieval fails
             logger.exception(f"Failed to retrieve price for {symbol}")
             raise ValueError(f"Failed to retrieve price for {symbol}: {str(e)}")
 
-    def get_step_size(self, symbol):
+    def price_received_at(self, symbol: str) -> Optional[float]:
+        """Returns the time the latest price of the symbol arrived, the tick an order computed from get_price reacts to."""
+        return self.price_snapshot.updated_at.get(symbol)
+
+    async def get_step_size(self, symbol):
         """
-        Retrieves the step size (LOT_SIZE) for the specified symbol, which is the minimum allowable quantity increment for orders.
+        Retrieves the step size (LOT_SIZE) for the specified symbol from the symbol filter index, which is the minimum allowable quantity increment for orders.
 
         Args:
             symbol (str): The cryptocurrency trading pair symbol, e.g., "BTCUSDT".
@@ -246,19 +456,17 @@ class BinanceManager:
         Returns:
             float: The step size for order quantity, or None if the symbol is not found.
         """
-        exchange_info = self.client.get_exchange_info()
-        for s in exchange_info[SYMBOLS]:
-            if s[SYMBOL] == symbol:
-                for f in s[FILTERS]:
-                    if f[FILTER_TYPE] == LOT_SIZE:
-                        logger.debug(f"Step size for {symbol} = {f[STEP_SIZE]}")
-                        return float(f[STEP_SIZE])
-        logger.error(f"Failed to retrieve step size for {symbol}")
-        return None
+        filters = await self.symbol_filters.get(symbol)
+        if filters is None or not filters.step_size:
+            logger.error(f"Failed to retrieve step size for {symbol}")
+            return None
+
+        logger.debug("Step size for %s = %s", symbol, filters.step_size)
+        return filters.step_size
 
-    def get_min_notional(self, symbol):
+    async def get_min_notional(self, symbol):
         """
-        Retrieves the min_notional (minimum allowable trade value) for the specified symbol from the Binance API.
+        Retrieves the min_notional (minimum allowable trade value) for the specified symbol from the symbol filter index.
 
         Args:
             symbol (str): The cryptocurrency trading pair symbol, e.g., "BTCUSDT".
@@ -266,125 +474,50 @@ class BinanceManager:
         Returns:
             float: The min_notional value for the trading pair, or None if not found.
         """
-        exchange_info = self.client.get_exchange_info()
+        filters = await self.symbol_filters.get(symbol)
+        if filters is None or not filters.min_notional:
+            logger.error(f"Min_notional not found for symbol {symbol}")
+            return None
 
-        for s in exchange_info[SYMBOLS]:
-            if s[SYMBOL] == symbol:
-                for f in s[FILTERS]:
-                    if f[FILTER_TYPE] == 'NOTIONAL':
-                        min_notional = f[MIN_NOTIONAL]
-                        logger.debug(f"Min_notional for symbol {symbol}: {min_notional}")
-                        return float(min_notional)
+        logger.debug("Min_notional for symbol %s: %s", symbol, filters.min_notional)
+        return filters.min_notional
 
-        # Print message if min_notional is not found for the symbol
-        logger.error(f"Min_notional not found for symbol {symbol}")
-        return None
-
-    def analyze_orders(self, symbol: str, add_missing_orders: bool = False) -> Dict[str, float]:
+    async def analyze_orders(self, symbol: str, add_missing_orders: bool = False) -> Dict[str, float]:
         """
         Fetch and analyze active and historical orders for a given symbol from Binance.
         Returns counts, quantities, and total amounts for buy and sell orders, including estimated fees.
-        """
-        buy_count = sell_count = 0
-        buy_quantity = sell_quantity = 0.0
-
-        pending_buy_count = pending_sell_count = 0
-        pending_buy_quantity = pending_sell_quantity = 0.0
 
-        pending_total_buy_value = pending_total_sell_value = 0.0
-
-        total_buy_value = total_sell_value = 0.0
-        estimated_buy_fee = estimated_sell_fee = 0.0
-
-        # Fetch all historical orders and calculate filled quantities, values, and estimated fees
-        all_orders = self.client.get_all_orders(symbol=symbol)
+        Only the orders placed or still open since the previous call are fetched (see OrderHistoryStore);
+        with add_missing_orders only those are written to Firebase.
+        """
+        history, changed_orders = await self.order_history.sync(symbol)
 
-        for order in all_orders:
+        if add_missing_orders:
+            from firebase import FirebaseManager
 
-            if order[STATUS] == FILLED:
-                executed_quantity = float(order[EXECUTED_QTY])
-                price = float(order[PRICE])
+            for order in changed_orders:
+                if order[STATUS] == FILLED:
+                    executed_quantity = float(order[EXECUTED_QTY])
+                    price = float(order[PRICE])
 
-                if price == 0:
-                    if executed_quantity > 0:
+                    if price == 0 and executed_quantity > 0:
                         price = float(order[CUMMULATIVE_QUOTE_QTY]) / executed_quantity
 
-                order_value = executed_quantity * price
-
-                if order[SIDE] == BUY:
-                    fee = order_value * FEE_BUY_BINANCE_VALUE
-
-                    buy_count += 1
-                    buy_quantity += executed_quantity
-                    total_buy_value += order_value
-                    estimated_buy_fee += fee
-
-                    if add_missing_orders:
-                        from firebase import FirebaseManager
-                        FirebaseManager().add_order_to_firebase(
-                            Order(
-                                symbol=symbol,
-                                order_id=order[ORDER_ID],
-                                order_type=order[SIDE],
-                                amount=executed_quantity,
-                                sell_price=0.0,
-                                buy_price=price,
-                                timestamp=order[TIME],
-                                strategy='',
-                                status=order[STATUS],
-                                profit=0,
-                            )
-                        )
-
-                elif order[SIDE] == SELL:
-                    fee = order_value * FEE_SELL_BINANCE_VALUE
-
-                    sell_count += 1
-                    sell_quantity += executed_quantity
-                    total_sell_value += order_value
-                    estimated_sell_fee += fee
-
-                    if add_missing_orders:
-                        from firebase import FirebaseManager
-                        FirebaseManager().add_order_to_firebase(
-                            Order(
-                                symbol=symbol,
-                                order_id=order[ORDER_ID],
-                                order_type=order[SIDE],
-                                amount=executed_quantity,
-                                sell_price=price,
-                                buy_price=0.0,
-                                timestamp=order[TIME],
-                                strategy='',
-                                status=order[STATUS],
-                                profit=0,
-                            )
+                    FirebaseManager().add_order_to_firebase(
+                        Order(
+                            symbol=symbol,
+                            order_id=order[ORDER_ID],
+                            order_type=order[SIDE],
+                            amount=executed_quantity,
+                            sell_price=price if order[SIDE] == SELL else 0.0,
+                            buy_price=price if order[SIDE] == BUY else 0.0,
+                            timestamp=order[TIME],
+                            strategy='',
+                            status=order[STATUS],
+                            profit=0,
                         )
-
-            elif order[STATUS] == NEW:
-                origQty_quantity = float(order[ORIG_QTY])
-                price = float(order[PRICE])
-                order_value = origQty_quantity * price
-
-                if order[SIDE] == BUY:
-
-                    fee = order_value * FEE_BUY_BINANCE_VALUE
-
-                    pending_buy_count += 1
-                    pending_buy_quantity += origQty_quantity
-                    pending_total_buy_value += order_value
-                    estimated_buy_fee += fee
-                elif order[SIDE] == SELL:
-
-                    fee = order_value * FEE_SELL_BINANCE_VALUE
-
-                    pending_sell_count += 1
-                    pending_sell_quantity += origQty_quantity
-                    pending_total_sell_value += order_value
-                    estimated_sell_fee += fee
-
-                if add_missing_orders:
-                    from firebase import FirebaseManager
+                    )
+                elif order[STATUS] == NEW:
                     FirebaseManager().add_order_to_firebase(
                         Order(
                             symbol=symbol,
@@ -400,6 +533,21 @@ class BinanceManager:
                         )
                     )
 
+        buy_count, sell_count = history.buy_count, history.sell_count
+        buy_quantity, sell_quantity = history.buy_quantity, history.sell_quantity
+        total_buy_value, total_sell_value = history.total_buy_value, history.total_sell_value
+
+        pending_buys, pending_sells = history.pending(BUY), history.pending(SELL)
+
+        pending_buy_count, pending_sell_count = len(pending_buys), len(pending_sells)
+        pending_buy_quantity = sum(float(order[ORIG_QTY]) for order in pending_buys)
+        pending_sell_quantity = sum(float(order[ORIG_QTY]) for order in pending_sells)
+        pending_total_buy_value = sum(float(order[ORIG_QTY]) * float(order[PRICE]) for order in pending_buys)
+        pending_total_sell_value = sum(float(order[ORIG_QTY]) * float(order[PRICE]) for order in pending_sells)
+
+        estimated_buy_fee = history.estimated_buy_fee + pending_total_buy_value * FEE_BUY_BINANCE_VALUE
+        estimated_sell_fee = history.estimated_sell_fee + pending_total_sell_value * FEE_SELL_BINANCE_VALUE
+
 
         COLUMN_WIDTH = 50
         SEPARATOR = " | "
@@ -408,7 +556,7 @@ class BinanceManager:
         missing_quantity = max(0, (sell_quantity + pending_sell_quantity) - (buy_quantity + pending_buy_quantity))
 
 
-        missing_value = missing_quantity * self.get_price(symbol=symbol)
+        missing_value = missing_quantity * await self.get_price(symbol=symbol)
 
         profit = (
             total_sell_value -
@@ -461,7 +609,7 @@ class BinanceManager:
             "estimated_sell_fee": estimated_sell_fee
         }
 
-    def calculate_buy_and_sell_price(self, crypto_pair: CryptoPair, strategy: TradeStrategy):
+    async def calculate_buy_and_sell_price(self, crypto_pair: CryptoPair, strategy: TradeStrategy):
         """
         Calculates the buy and sell prices based on the buy increase indicator and target profit.
 
@@ -474,7 +622,7 @@ class BinanceManager:
         """
 
         tick_size = crypto_pair.tick_size
-        current_price = self.get_price(crypto_pair.pair)
+        current_price = await self.get_price(crypto_pair.pair)
         round_price = lambda price, tick_size: round(price / tick_size) * tick_size
 
 
@@ -483,42 +631,61 @@ class BinanceManager:
 
         return buy_price, sell_price
 
-    def fetch_pairs(self) -> CryptoPairs:
+    async def fetch_pairs(self) -> CryptoPairs:
         global PAIRS
-        wallet = self.get_wallet_balances()
+        wallet = await self.get_wallet_balances()
         crypto_pairs = CryptoPairs()
 
+        await self.symbol_filters.load()
+        self.price_snapshot.track(pair_name for pair_name in PAIRS.pairs if pair_name[:-4] in wallet)
+
         for pair_name, _ in PAIRS.pairs.items():
             if pair_name[:-4] in wallet:
-                balance = wallet[pair_name[:-4]]
+                crypto_pairs.pairs.append(await self.build_crypto_pair(pair_name, wallet[pair_name[:-4]]))
+
+        return crypto_pairs
 
-                free_value = self.get_value(pair_name, balance[FREE])
-                locked_value = self.get_value(pair_name, balance[LOCKED])
+    async def build_crypto_pair(self, pair_name: str, balance: dict) -> CryptoPair:
+        """
+        Builds the CryptoPair of a traded pair from its wallet balance, the symbol filter index and the price snapshot.
 
-                logger.debug(f"Free   value for {pair_name}: {free_value}")
-                logger.debug(f"Locked value for {pair_name}: {locked_value}")
+        Args:
+            pair_name (str): Trading pair, e.g. 'BTCUSDT'.
+            balance (dict): Wallet balance of the base asset with FREE and LOCKED amounts.
 
-                total_value = free_value + locked_value
+        Returns:
+            CryptoPair: The pair with its current values and filters.
+        """
+        free_value = await self.get_value(pair_name, balance[FREE])
+        locked_value = await self.get_value(pair_name, balance[LOCKED])
 
-                min_notional = self.get_min_notional(pair_name)
+        logger.debug("Free value for %s: %s, locked value: %s", pair_name, free_value, locked_value, extra={"pair": pair_name})
 
-                crypto_pair = CryptoPair(
-                    pair=pair_name,
-                    crypto_amount_free=free_value,
-                    crypto_amount_locked=locked_value,
-                    buy_orders=[],
-                    min_notional=min_notional,
-                    profit=0,
-                    value=total_value,
-                    tick_size=self.get_tick_size(symbol=pair_name),
-                    step_size=self.get_step_size(symbol=pair_name)
-                )
+        total_value = free_value + locked_value
 
-                crypto_pairs.pairs.append(crypto_pair)
+        min_notional = await self.get_min_notional(pair_name)
 
-        return crypto_pairs
+        cryptoPair = CryptoPair(
+            pair=pair_name,
+            crypto_amount_free=free_value,
+            crypto_amount_locked=locked_value,
+            min_notional=min_notional,
+            profit=0,
+            value=total_value,
+            tick_size=await self.get_tick_size(symbol=pair_name),
+            step_size=await self.get_step_size(symbol=pair_name)
+        )
+        self.prepare_orders(cryptoPair)
+        return cryptoPair
+
+    def prepare_orders(self, cryptoPair: CryptoPair):
+        """Builds the order formatter and the fixed part of the order payloads of the pair, so its first order does not pay for them."""
+        self.order_formatter(cryptoPair)
+        if self.order_path:
+            for side in (Client.SIDE_SELL, Client.SIDE_BUY):
+                self.order_path.prepare(cryptoPair.pair, side)
 
-    def get_crypto_amounts(self, pair_name: str) -> dict:
+    async def get_crypto_amounts(self, pair_name: str) -> dict:
         """
         Fetches the `crypto_amount_free` and `crypto_amount_locked` for a given cryptocurrency pair 
         using cached wallet balances.
@@ -530,7 +697,7 @@ class BinanceManager:
             dict: A dictionary containing `crypto_amount_free` and `crypto_amount_locked`.
         """
 
-        wallet = self.get_wallet_balances()
+        wallet = await self.get_wallet_balances()
 
         crypto_symbol = pair_name[:-4]  
 
@@ -547,50 +714,81 @@ class BinanceManager:
             }
 
     def validate_price_order(self, cryptoPair: CryptoPair, quantity_of_crypto: float, buy_price: float):
-        logger.debug(f"Validation price order for {cryptoPair.pair}")
 
         price_order = float(quantity_of_crypto) * float(buy_price)
         ret_val = True
 
         if price_order < cryptoPair.min_notional:
-            logger.debug(f"Cannot place sell order for {cryptoPair.pair}: order value ({price_order}) is less than min_notional ({cryptoPair.min_notional}).")
-            logger.debug(f"Required min_notional for {cryptoPair.pair}: is {cryptoPair.min_notional}, but calculated order value is {price_order}.")
+            logger.debug("Cannot place sell order for %s: order value (%s) is less than min_notional (%s).", cryptoPair.pair, price_order,
+                         cryptoPair.min_notional, extra={"pair": cryptoPair.pair})
             ret_val = False
         elif price_order >= cryptoPair.value:
-            logger.debug(f"Cannot place sell order for {cryptoPair.pair}: order value ({price_order}) exceeds available balance ({cryptoPair.value}).")
-            logger.debug(f"Calculated order value for {cryptoPair.pair}: ({price_order}) is higher than available balance ({cryptoPair.value}).")
+            logger.debug("Cannot place sell order for %s: order value (%s) exceeds available balance (%s).", cryptoPair.pair, price_order,
+                         cryptoPair.value, extra={"pair": cryptoPair.pair})
             ret_val = False
 
         return ret_val
 
-    async def limit_order(self, cryptoPair: CryptoPair, quantity: float, price: float, side: str):
+    def cached_filters(self, symbol: str) -> Optional[SymbolFilters]:
+        """Returns the filters of the symbol if the index is loaded, without loading it."""
+        return self.symbol_filters.filters.get(symbol)
 
-        try:
-            tick_size_decimal = Decimal(str(cryptoPair.tick_size))
-            price_precision = abs(tick_size_decimal.as_tuple().exponent)
-            price = Decimal(price).quantize(tick_size_decimal, rounding=ROUND_DOWN)
-            formatted_price = "{:.{}f}".format(price, price_precision)  
-
-            step_size_decimal = Decimal(str(cryptoPair.step_size))
-            quantity_precision = abs(step_size_decimal.as_tuple().exponent)
-            quantity = Decimal(quantity).quantize(step_size_decimal, rounding=ROUND_DOWN)
-
-            if cryptoPair.step_size == 1:
-                quantity = int(quantity)
-                formatted_quantity = str(quantity)
-            else:
-                formatted_quantity = "{:.{}f}".format(quantity, quantity_precision)
+    def order_formatter(self, cryptoPair: CryptoPair) -> OrderFormatter:
+        """Returns the formatter of the pair, building it on its first order and again when its filters change."""
+        formatter = self.order_formatters.get(cryptoPair.pair)
+        if formatter is None or not formatter.matches(cryptoPair):
+            filters = self.cached_filters(cryptoPair.pair)
+            formatter = OrderFormatter.for_pair(cryptoPair, max_qty=filters.max_qty if filters else 0.0)
+            self.order_formatters[cryptoPair.pair] = formatter
+        return formatter
 
-            if Decimal(formatted_quantity) * Decimal(formatted_price) < Decimal(str(cryptoPair.min_notional)):
-                logger.error(f"Order for {cryptoPair.pair} cannot be placed: transaction value ({Decimal(formatted_quantity) * Decimal(formatted_price)}) is less than min_notional ({cryptoPair.min_notional}).")
-                return None, None
+    def format_order(self, cryptoPair: CryptoPair, quantity: float, price: float) -> Optional[Tuple[str, str]]:
+        """
+        Rounds the quantity and the price of an order down to the step size and the tick size of the pair.
 
-            logger.debug(f"Formatted price: {formatted_price}, type: {type(formatted_price)}")
-            logger.debug(f"Formatted quantity: {formatted_quantity}, type: {type(formatted_quantity)}")
+        Returns:
+            tuple: The formatted (quantity, price), or None if the value of the order is below min_notional
+                or its quantity above max_qty.
+        """
+        formatter = self.order_formatter(cryptoPair)
+        quantity_units = formatter.quantity_units(quantity)
+        price_units = formatter.price_units(price)
+
+        if formatter.below_min_notional(quantity_units, price_units):
+            logger.error("Order for %s cannot be placed: transaction value (%s) is less than min_notional (%s).", cryptoPair.pair,
+                         formatter.format_notional(quantity_units, price_units), cryptoPair.min_notional, extra={"pair": cryptoPair.pair})
+            return None
+
+        if formatter.above_max_qty(quantity_units):
+            logger.error("Order for %s cannot be placed: quantity (%s) is more than max_qty (%s).", cryptoPair.pair,
+                         formatter.format_quantity(quantity_units), formatter.max_qty, extra={"pair": cryptoPair.pair})
+            return None
 
-            logger.debug(f"Placing order for {cryptoPair.pair}: {side.capitalize()} order with price: {formatted_price} (type: {type(formatted_price)}), quantity: {formatted_quantity} (type: {type(formatted_quantity)})")
+        return formatter.format_quantity(quantity_units), formatter.format_price(price_units)
 
-            order = self.client.create_order(
+    async def limit_order(self, cryptoPair: CryptoPair, quantity: float, price: float, side: str, tick_at: Optional[float] = None):
+        """
+        Places a GTC limit order.
+
+        Args:
+            tick_at (float): Time the price the order was computed from arrived. When given, the
+                tick-to-order latency of the order is recorded in order_latency.
+
+        Returns:
+            dict: The order, or None if it could not be placed.
+        """
+        submitted_at = time.time()
+        try:
+            formatted = self.format_order(cryptoPair, quantity, price)
+            if formatted is None:
+                return None
+            formatted_quantity, formatted_price = formatted
+
+            logger.debug("Placing order for %s: %s order with price: %s, quantity: %s", cryptoPair.pair, side, formatted_price, formatted_quantity,
+                         extra={"pair": cryptoPair.pair})
+
+            order = await self._call(
+                'create_order',
                 symbol=cryptoPair.pair,
                 side=side,
                 type=Client.ORDER_TYPE_LIMIT,
@@ -599,50 +797,247 @@ class BinanceManager:
                 price=str(formatted_price),
             )
 
+            if tick_at:
+                self.order_latency.record(cryptoPair.pair, tick_at, submitted_at, time.time())
+
             logger.info(f"{side.capitalize()} order placed at {formatted_price}!")
+            self.order_index.update(order)
+            self.wallet.invalidate()
             return order
 
         except Exception as e:
             logger.error(f"Error placing {side} order for {cryptoPair.pair}: {e}")
             return None
 
-    def print_order(self, pair: str, sell_order):
+    async def submit_batch(self, batch: OrderBatch) -> List[OrderOutcome]:
+        """
+        Sends the placements and cancellations of a batch with as few sequential requests as possible.
+
+        The symbols are handled concurrently (see submit_symbol). Once every request completed, the
+        order index, the order status of the pairs and the wallet are updated in one pass.
+
+        Args:
+            batch (OrderBatch): The requests to send.
+
+        Returns:
+            list: One OrderOutcome per request, in the order of the requests, followed by one per
+                order cancelled by a cancel-all that no request asked for.
+        """
+        groups = batch.by_symbol()
+        results = await asyncio.gather(*(
+            self.submit_symbol(requests, batch.cancel_all_pairs.get(symbol)) for symbol, requests in groups.items()
+        ))
+
+        requested = {id(request) for request in batch.requests}
+        outcomes = {id(outcome.request): outcome for symbol_outcomes in results for outcome in symbol_outcomes}
+        ordered = [outcomes[id(request)] for request in batch.requests]
+        ordered += [outcome for key, outcome in outcomes.items() if key not in requested]
+
+        self.apply_outcomes(ordered)
+        logger.debug("Submitted %s order requests on %s symbols: %s failed.", len(ordered), len(groups),
+                     sum(not outcome.ok for outcome in ordered))
+        return ordered
+
+    async def submit_symbol(self, requests: List[OrderRequest], cancel_all_pair: Optional[CryptoPair] = None) -> List[OrderOutcome]:
+        """
+        Sends the requests of one symbol.
+
+        With cancel_all_pair, every open order of the symbol is cancelled with one request and the
+        placements follow it. Otherwise each placement replacing a cancellation is one cancel-replace
+        request, and those, the other cancellations and the other placements are sent concurrently.
+        """
+        placements = [request for request in requests if request.action == ORDER_ACTION_PLACE]
+        cancels = [request for request in requests if request.action == ORDER_ACTION_CANCEL]
+
+        if cancel_all_pair:
+            outcomes = await self.batch_cancel_all(cancel_all_pair, cancels)
+            return outcomes + list(await asyncio.gather(*(self.batch_place(request) for request in placements)))
+
+        replaced = {id(request.replaces) for request in placements if request.replaces}
+        results = await asyncio.gather(
+            *(self.batch_replace(request) for request in placements if request.replaces),
+            *(self.batch_cancel(request) for request in cancels if id(request) not in replaced),
+            *(self.batch_place(request) for request in placements if not request.replaces),
+        )
+        return [outcome for result in results for outcome in (result if isinstance(result, list) else [result])]
+
+    async def batch_place(self, request: OrderRequest) -> OrderOutcome:
+        formatted = self.format_order(request.cryptoPair, request.quantity, request.price)
+        if formatted is None:
+            return OrderOutcome(request, error="order value below min_notional")
+        quantity, price = formatted
+
+        try:
+            order = await self._call(
+                'create_order',
+                symbol=request.symbol,
+                side=request.side,
+                type=Client.ORDER_TYPE_LIMIT,
+                timeInForce=Client.TIME_IN_FORCE_GTC,
+                quantity=quantity,
+                price=price,
+            )
+            return OrderOutcome(request, status=order[STATUS], order=order)
+        except Exception as e:
+            logger.error(f"Error placing {request.side} order for {request.symbol}: {e}")
+            return OrderOutcome(request, error=str(e))
+
+    async def batch_cancel(self, request: OrderRequest) -> OrderOutcome:
+        try:
+            order = await self._call('cancel_order', symbol=request.symbol, orderId=request.order_id)
+            return OrderOutcome(request, status=CANCELED, order=order)
+        except Exception as e:
+            status = await self.status_after_failure(request.symbol, request.order_id)
+            if status == CANCELED:
+                return OrderOutcome(request, status=CANCELED)
+            if status == FILLED:
+                logger.info(f"Order {request.order_id} for {request.symbol} has already been filled.")
+            else:
+                logger.warning(f"Failed to cancel order {request.order_id} for {request.symbol}: {e}")
+            return OrderOutcome(request, status=status, error=str(e))
+
+    async def batch_replace(self, placement: OrderRequest) -> List[OrderOutcome]:
+        """
+        Cancels the order placement.replaces cancels and places placement with one cancel-replace request.
+
+        The new order is only placed if the cancellation succeeds. When the request fails, the status of
+        the cancelled order tells which half failed: still open, the cancellation; CANCELED, the placement.
+        """
+        cancel = placement.replaces
+        formatted = self.format_order(placement.cryptoPair, placement.quantity, placement.price)
+        if formatted is None:
+            return [await self.batch_cancel(cancel), OrderOutcome(placement, error="order value below min_notional")]
+        quantity, price = formatted
+
+        try:
+            response = await self._call(
+                'cancel_replace_order',
+                symbol=placement.symbol,
+                side=placement.side,
+                type=Client.ORDER_TYPE_LIMIT,
+                timeInForce=Client.TIME_IN_FORCE_GTC,
+                quantity=quantity,
+                price=price,
+                cancelReplaceMode=CANCEL_REPLACE_STOP_ON_FAILURE,
+                cancelOrderId=cancel.order_id,
+            )
+            order = response["newOrderResponse"]
+            return [
+                OrderOutcome(cancel, status=CANCELED, order=response["cancelResponse"]),
+                OrderOutcome(placement, status=order[STATUS], order=order),
+            ]
+        except Exception as e:
+            status = await self.status_after_failure(placement.symbol, cancel.order_id)
+            if status == FILLED:
+                logger.info(f"Order {cancel.order_id} for {placement.symbol} has already been filled.")
+            else:
+                logger.warning(f"Cancel-replace of order {cancel.order_id} for {placement.symbol} failed (order {status}): {e}")
+            if status == CANCELED:
+                return [OrderOutcome(cancel, status=CANCELED), OrderOutcome(placement, error=str(e))]
+            return [
+                OrderOutcome(cancel, status=status, error=str(e)),
+                OrderOutcome(placement, error=f"not placed, order {cancel.order_id} was not cancelled"),
+            ]
+
+    async def batch_cancel_all(self, cryptoPair: CryptoPair, cancels: List[OrderRequest]) -> List[OrderOutcome]:
+        """
+        Cancels every open order of the pair with one request.
+
+        Returns:
+            list: The outcome of each cancellation in cancels, and one per other order that was cancelled.
+        """
+        requested = {int(request.order_id): request for request in cancels}
+        try:
+            cancelled = await self._call('cancel_open_orders', symbol=cryptoPair.pair)
+        except Exception as e:
+            # Binance answers an error when there is no open order left to cancel
+            logger.debug("Cancel of all open orders for %s failed: %s", cryptoPair.pair, e, extra={"pair": cryptoPair.pair})
+            cancelled = []
+
+        outcomes = []
+        for order in cancelled:
+            request = requested.pop(int(order[ORDER_ID]), None) or OrderRequest(ORDER_ACTION_CANCEL, cryptoPair, order_id=order[ORDER_ID])
+            outcomes.append(OrderOutcome(request, status=CANCELED, order=order))
+
+        # Requested orders the cancel-all did not return were no longer open
+        statuses = await asyncio.gather(*(self.status_after_failure(cryptoPair.pair, order_id) for order_id in requested))
+        for request, status in zip(requested.values(), statuses):
+            outcomes.append(OrderOutcome(request, status=status, error=None if status == CANCELED else f"order {status}"))
+
+        return outcomes
+
+    def apply_outcomes(self, outcomes: List[OrderOutcome]):
+        """Updates the order index, the status of the orders the pairs follow and the wallet with the outcomes of a batch."""
+        changed = False
+        for outcome in outcomes:
+            if outcome.order:
+                self.order_index.update(outcome.order)
+
+            request = outcome.request
+            if request.action != ORDER_ACTION_CANCEL or outcome.status not in TERMINAL_ORDER_STATUSES:
+                changed = changed or outcome.order is not None
+                continue
+
+            changed = True
+            cryptoPair = request.cryptoPair
+            for active_order in (cryptoPair.active_sell_order, cryptoPair.active_buy_order):
+                if active_order and str(active_order.order_id) == str(request.order_id):
+                    active_order.status = outcome.status
+            cryptoPair.buy_orders.set_status(request.order_id, outcome.status)
+
+        if changed:
+            self.wallet.invalidate()
+
+    async def print_order(self, pair: str, sell_order):
+        """
+        Logs the open order a strategy is waiting for on one line.
+
+        It is logged on every evaluation, so the current price is taken from the price snapshot
+        instead of being fetched, and nothing is computed when INFO is filtered out.
+        """
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
         side = SELL if sell_order[SIDE] == SELL else BUY if sell_order[SIDE] == BUY else None
+        current_price = self.price_snapshot.prices.get(sell_order[SYMBOL])
 
-        logger.info("="*50)
-        logger.info(f" Waiting for {side} order execution for {pair} ".center(50, "="))
-        logger.info("="*50)
-        logger.info(f" Symbol       : {sell_order[SYMBOL]}")
-        logger.info(f" Price        : {sell_order[PRICE]}")
-        logger.info(f" Current Price: {self.get_price(sell_order[SYMBOL]):.10f}")
-        logger.info(f" Quantity     : {sell_order[ORIG_QTY]}")
-        logger.info(f" Value        : {float(sell_order[ORIG_QTY]) * float(sell_order[PRICE]):.2f} USD")
-        logger.info(f" Order ID     : {sell_order[ORDER_ID]}")
+        logger.info(
+            "Waiting for %s order %s of %s: price %s, current price %s, quantity %s, value %.2f USD",
+            side, sell_order[ORDER_ID], pair, sell_order[PRICE], "unknown" if current_price is None else f"{current_price:.10f}",
+            sell_order[ORIG_QTY], float(sell_order[ORIG_QTY]) * float(sell_order[PRICE]),
+            extra={"pair": pair, "order_id": sell_order[ORDER_ID]},
+        )
 
-    def monitor_buy_orders(self, cryptoPair: CryptoPair, strategy: TradeStrategy):
+    async def monitor_buy_orders(self, cryptoPair: CryptoPair, strategy: TradeStrategy, order_store=None):
         """
-        Monitors all buy orders for a crypto pair. Updates Firebase if statuses change.
+        Monitors the open buy orders of a crypto pair. Updates Firebase if statuses change.
 
         Parameters:
             cryptoPair (CryptoPair): The crypto pair object being monitored.
             strategy (TradeStrategy): The strategy object associated with the buy orders.
+            order_store: Where status changes are recorded. Defaults to FirebaseManager.
         """
         global MONITORING
 
-        from firebase import FirebaseManager
+        if order_store is None:
+            from firebase import FirebaseManager
+            order_store = FirebaseManager()
 
         active_buy_counter = 0
 
-        for order in cryptoPair.buy_orders:
-            current_status = self.get_order_status(cryptoPair.pair, order_id=order.order_id)
+        open_orders = cryptoPair.buy_orders.open_orders()
 
-            if current_status[STATUS] != order.status:
+        statuses = await asyncio.gather(
+            *(self.get_order_status(cryptoPair.pair, order_id=order.order_id, droppable=True) for order in open_orders)
+        )
 
-                order.status = current_status[STATUS]
+        for order, current_status in zip(open_orders, statuses):
+            if not current_status:
+                continue
 
-                from firebase import FirebaseManager
-                FirebaseManager().add_order_to_firebase(
-                    cryptoPair.set_status(order_id=order.order_id, status=FILLED)
+            if current_status[STATUS] != order.status:
+                order_store.add_order_to_firebase(
+                    cryptoPair.set_status(order_id=order.order_id, status=current_status[STATUS])
                 )
 
                 if order.status == FILLED:
@@ -651,6 +1046,6 @@ class BinanceManager:
                     active_buy_counter += 1
             elif current_status[STATUS] != FILLED:
                 if MONITORING.show_buy_orders:
-                    self.print_order(pair=cryptoPair.pair, sell_order=current_status)
+                    await self.print_order(pair=cryptoPair.pair, sell_order=current_status)
 
-            logger.debug(f"Monitoring buy orders for {cryptoPair.pair} ({strategy.name}). Total buy orders: {active_buy_counter}")
\ No newline at end of file
+            logger.debug("Monitoring buy orders for %s (%s). Total buy orders: %s", cryptoPair.pair, strategy.name, active_buy_counter, extra={"pair": cryptoPair.pair})
\ No newline at end of file
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from data_classes import CryptoPair, CryptoPairs
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Bootstrap:
+    """
+    Concurrent startup of the traded pairs.
+
+    prepare() runs the fetches shared by every pair once and concurrently: wallet balances, the
+    symbol filter index and one bulk price refresh. start_pairs() then initializes the pairs on a
+    pool of at most workers concurrent pairs. Each pair gets its journaled state back from
+    state_store and is handed to on_ready as soon as it is built, so it can start trading while
+    the order histories are still being synced. The time of every stage and pair is kept in timings as it completes and logged by report().
+    Only the pairs accepted by owns are started, which is how a shard picks its share of the pairs.
+    """
+
+    def __init__(self, manager, on_ready: Optional[Callable[[CryptoPair], None]] = None, state_store=None, workers: int = BOOTSTRAP_WORKERS,
+                 owns: Optional[Callable[[str], bool]] = None):
+        self.manager = manager
+        self.on_ready = on_ready
+        self.state_store = state_store
+        self.workers = workers
+        self.owns = owns
+        self.wallet: Dict[str, dict] = {}
+        self.symbols: List[str] = []
+        self.crypto_pairs = CryptoPairs()
+        self.started_at = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.pair_timings: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def timed(self, timings: Dict[str, float], name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] = time.perf_counter() - started
+
+    async def timed_call(self, name: str, coroutine):
+        with self.timed(self.timings, name):
+            return await coroutine
+
+    async def prepare(self) -> List[str]:
+        """
+        Fetches the wallet, the symbol filters and the prices shared by all pairs.
+
+        Returns:
+            list: The configured pairs accepted by owns whose base asset is in the wallet.
+        """
+        global PAIRS
+
+        with self.timed(self.timings, "shared"):
+            self.wallet, _ = await asyncio.gather(
+                self.timed_call("wallet", self.manager.get_wallet_balances()),
+                self.timed_call("symbol_filters", self.manager.symbol_filters.load()),
+            )
+
+            self.symbols = [
+                pair_name for pair_name in PAIRS.pairs
+                if pair_name[:-4] in self.wallet and (self.owns is None or self.owns(pair_name))
+            ]
+            self.manager.price_snapshot.track(self.symbols)
+            await self.timed_call("prices", self.manager.price_snapshot.refresh())
+
+        return self.symbols
+
+    async def start_pairs(self, analyze_orders: bool = True) -> CryptoPairs:
+        """
+        Builds every pair, hands it to on_ready and syncs its order history, at most workers pairs at a time.
+
+        A pair that fails to initialize is logged and left out instead of stopping the startup.
+
+        Returns:
+            CryptoPairs: The initialized pairs, in configuration order.
+        """
+        semaphore = asyncio.Semaphore(self.workers)
+        ready: Dict[str, CryptoPair] = {}
+
+        async def start_pair(pair_name: str):
+            timings = self.pair_timings.setdefault(pair_name, {})
+
+            # The pool slot is taken once per phase, so slow order history syncs do not hold back cheap pair inits
+            async with semaphore:
+                try:
+                    with self.timed(timings, "init"):
+                        cryptoPair = await self.manager.build_crypto_pair(pair_name, self.wallet[pair_name[:-4]])
+                        if self.state_store:
+                            self.state_store.restore(cryptoPair)
+                except Exception as e:
+                    logger.exception(f"Failed to initialize {pair_name}, it will not be traded: {e}")
+                    return
+
+            ready[pair_name] = cryptoPair
+            timings["ready_at"] = time.perf_counter() - self.started_at
+            self.timings.setdefault("first_pair_ready", timings["ready_at"])
+            self.timings["all_pairs_ready"] = timings["ready_at"]
+            if self.on_ready:
+                self.on_ready(cryptoPair)
+
+            if analyze_orders:
+                async with semaphore:
+                    try:
+                        with self.timed(timings, "analyze_orders"):
+                            await self.manager.analyze_orders(pair_name, add_missing_orders=False)
+                    except Exception as e:
+                        logger.exception(f"Failed to analyze the orders of {pair_name}: {e}")
+
+        with self.timed(self.timings, "pairs"):
+            await asyncio.gather(*(start_pair(pair_name) for pair_name in self.symbols))
+
+        self.crypto_pairs.pairs = [ready[pair_name] for pair_name in self.symbols if pair_name in ready]
+        self.timings["total"] = time.perf_counter() - self.started_at
+
+        return self.crypto_pairs
+
+    def report(self):
+        """Logs the startup timing breakdown and the slowest pairs."""
+        if not self.crypto_pairs.pairs:
+            logger.info("No pairs to trade, waiting for conditions to be met.")
+
+        logger.info(
+            f"Startup of {len(self.crypto_pairs.pairs)}/{len(self.symbols)} pairs took {self.timings.get('total', 0.0):.2f} s: "
+            + ", ".join(f"{name} {seconds:.2f} s" for name, seconds in self.timings.items() if name != "total")
+        )
+
+        slowest = sorted(
+            self.pair_timings.items(),
+            key=lambda item: item[1].get("init", 0.0) + item[1].get("analyze_orders", 0.0),
+            reverse=True,
+        )[:BOOTSTRAP_SLOWEST_PAIRS]
+        for pair_name, timings in slowest:
+            logger.debug(f"Startup of {pair_name}: " + ", ".join(f"{name} {seconds:.3f} s" for name, seconds in timings.items()))
@@ -0,0 +1,193 @@
+import json
+import random
+import socket
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+import requests
+from google.auth.transport.requests import AuthorizedSession
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+STREAM_HEADERS = {"Accept": "text/event-stream", "Cache-Control": "no-cache"}
+
+
+@dataclass
+class ConfigEvent:
+    """A put of the Realtime Database, with its path relative to the route that receives it."""
+    event_type: str
+    path: str
+    data: Any
+
+
+class KeepAuthSession(AuthorizedSession):
+    """Authorized session that keeps its credentials when the stream is redirected to the server of the database."""
+
+    def rebuild_auth(self, prepared_request, response):
+        pass
+
+
+def split_path(path: str) -> Tuple[str, ...]:
+    return tuple(part for part in path.split("/") if part)
+
+
+class ConfigStream:
+    """
+    One streaming connection to a Realtime Database subtree, routing its events to handlers by path.
+
+    routes maps paths at or below root to handlers. An event at or below a route reaches its
+    handler with the path relative to the route. An event above a route, such as the snapshot of
+    the whole subtree that starts every connection, reaches every route below it with the route's
+    part of the data. Patches are split into one put per child, so the handlers only see puts.
+    Events no route covers, e.g. the profit written below CONFIG_PATH, are dropped.
+
+    The connection is read by one daemon thread. When it fails, is cancelled by the server or
+    stays silent (not even a keep-alive) for read_timeout seconds, it is reopened after an
+    exponential backoff with jitter between backoff_min and backoff_max seconds. The first event of
+    a new connection resets the backoff. Every connection starts with a snapshot, so the handlers
+    catch up on whatever changed while it was down.
+    """
+
+    def __init__(self, url: str, root: str, routes: Dict[str, Callable[[ConfigEvent], None]],
+                 session_factory: Callable[[], requests.Session] = requests.Session, on_event: Optional[Callable[[], None]] = None,
+                 read_timeout: float = CONFIG_STREAM_READ_TIMEOUT, backoff_min: float = CONFIG_STREAM_BACKOFF_MIN,
+                 backoff_max: float = CONFIG_STREAM_BACKOFF_MAX):
+        self.url = url
+        self.root = root
+        self.session_factory = session_factory
+        self.on_event = on_event
+        self.read_timeout = read_timeout
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+
+        root_parts = split_path(root)
+        self.routes: List[Tuple[Tuple[str, ...], Callable[[ConfigEvent], None]]] = []
+        for path, handler in routes.items():
+            parts = split_path(path)
+            if parts[:len(root_parts)] != root_parts:
+                raise ValueError(f"Route {path} is not below the stream root {root}.")
+            self.routes.append((parts[len(root_parts):], handler))
+
+        self.session: Optional[requests.Session] = None
+        self.response: Optional[requests.Response] = None
+        self.thread: Optional[threading.Thread] = None
+        self.closed = threading.Event()
+        self.connections = 0
+        self.events = 0
+
+    def stream_url(self) -> str:
+        scheme, netloc, path, query, fragment = urlsplit(self.url)
+        return urlunsplit((scheme, netloc, path.rstrip("/") + "/" + "/".join(split_path(self.root)) + ".json", query, fragment))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name=f"config-stream{self.root}", daemon=True)
+        self.thread.start()
+
+    def close(self, timeout: float = 5.0):
+        """Closes the connection and waits for the thread to stop."""
+        self.closed.set()
+        response = self.response
+        if response is not None:
+            # Closing the response does not wake the thread blocked reading it, shutting the socket down does
+            sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            response.close()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def run(self):
+        backoff = self.backoff_min
+        failures = 0
+
+        while not self.closed.is_set():
+            try:
+                if self.session is None:
+                    self.session = self.session_factory()
+
+                with self.session.get(self.stream_url(), headers=STREAM_HEADERS, stream=True, timeout=(self.read_timeout, self.read_timeout)) as response:
+                    self.response = response
+                    response.raise_for_status()
+                    self.connections += 1
+                    if failures:
+                        logger.info(f"Config stream {self.root} reconnected after {failures} failed attempts.")
+                    else:
+                        logger.debug(f"Config stream {self.root} connected.")
+
+                    for event_type, data in self.read_events(response):
+                        backoff, failures = self.backoff_min, 0
+                        if event_type in ("put", "patch"):
+                            self.dispatch(event_type, json.loads(data))
+                        elif event_type == "auth_revoked":
+                            # The token expired, the next connection gets a fresh one
+                            logger.info(f"Config stream {self.root} credentials expired, reconnecting.")
+                            self.session = None
+                            break
+                        elif event_type == "cancel":
+                            logger.error(f"Config stream {self.root} cancelled by the server: {data}")
+                            break
+            except Exception as e:
+                if self.closed.is_set():
+                    break
+                failures += 1
+                logger.warning(f"Config stream {self.root} failed ({failures} in a row): {e}")
+                self.session = None
+            finally:
+                self.response = None
+
+            self.closed.wait(backoff * random.uniform(0.5, 1.0))
+            backoff = min(backoff * 2, self.backoff_max)
+
+    def read_events(self, response: requests.Response) -> Iterator[Tuple[str, str]]:
+        """Yields the (event, data) pairs of the server-sent events as soon as each one is complete."""
+        event_type, data, buffer = None, [], b""
+        while True:
+            # read1 returns what has arrived instead of waiting for a full buffer
+            chunk = response.raw.read1(1 << 16, decode_content=True)
+            if not chunk:
+                return
+
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            for line in lines:
+                line = line.decode().rstrip("\r")
+                if not line:
+                    if event_type:
+                        self.events += 1
+                        yield event_type, "\n".join(data)
+                    event_type, data = None, []
+                elif line.startswith("event:"):
+                    event_type = line[6:].strip()
+                elif line.startswith("data:"):
+                    data.append(line[5:].strip())
+
+    def dispatch(self, event_type: str, message: dict):
+        path, data = split_path(message["path"]), message["data"]
+        if event_type == "patch":
+            updates = [(path + split_path(child), value) for child, value in (data or {}).items()]
+        else:
+            updates = [(path, data)]
+
+        for path, data in updates:
+            for route, handler in self.routes:
+                if path[:len(route)] == route:
+                    self.deliver(handler, ConfigEvent("put", "/" + "/".join(path[len(route):]), data))
+                elif route[:len(path)] == path:
+                    value = data
+                    for key in route[len(path):]:
+                        value = value.get(key) if isinstance(value, dict) else None
+                    self.deliver(handler, ConfigEvent("put", "/", value))
+
+        if self.on_event:
+            self.on_event()
+
+    def deliver(self, handler: Callable[[ConfigEvent], None], event: ConfigEvent):
+        try:
+            handler(event)
+        except Exception as e:
+            logger.exception(f"Config handler {getattr(handler, '__name__', handler)} failed on {event.path}: {e}")
@@ -1,11 +1,14 @@
 from dataclasses import dataclass, field
 import time
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
 import psutil
-from logger import logger
+from logger import get_logger
 from globals import *
 
+logger = get_logger(__name__)
+
+
 @dataclass
 class Order:
     symbol: str
@@ -33,13 +36,170 @@ class Order:
             STATUS: self.status,
         }
 
+class OrderHistory:
+    """
+    Bounded history of orders kept in a ring buffer.
+
+    An order_id -> slot index gives O(1) lookups and status updates, and orders that have not
+    reached a terminal status are additionally kept in a separate open set, so monitoring only
+    touches orders that can still change.
+    """
+
+    def __init__(self, capacity: int = MAX_ORDERS_HISTORY_IN_CRYPTO_PAIRS):
+        self.capacity = capacity
+        self.slots: List[Optional[Order]] = [None] * capacity
+        self.head = 0
+        self.size = 0
+        self.index: Dict[str, int] = {}
+        self.open: Dict[str, Order] = {}
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        """Iterates from the oldest to the newest order."""
+        start = (self.head - self.size) % self.capacity
+        for i in range(self.size):
+            yield self.slots[(start + i) % self.capacity]
+
+    def append(self, order: Order) -> Optional[Order]:
+        """
+        Stores the order, evicting the oldest one when the history is full. An order whose id is
+        already in the history replaces it in its slot.
+
+        Returns:
+            Order or None: The evicted order, if any.
+        """
+        slot = self.index.get(order.order_id)
+        if slot is not None:
+            self.slots[slot] = order
+            if order.status in TERMINAL_ORDER_STATUSES:
+                self.open.pop(order.order_id, None)
+            else:
+                self.open[order.order_id] = order
+            return None
+
+        evicted = self.slots[self.head] if self.size == self.capacity else None
+        if evicted is not None and self.index.get(evicted.order_id) == self.head:
+            del self.index[evicted.order_id]
+            self.open.pop(evicted.order_id, None)
+
+        self.slots[self.head] = order
+        self.index[order.order_id] = self.head
+        if order.status not in TERMINAL_ORDER_STATUSES:
+            self.open[order.order_id] = order
+
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return evicted
+
+    def get(self, order_id: str) -> Optional[Order]:
+        slot = self.index.get(order_id)
+        return self.slots[slot] if slot is not None else None
+
+    def set_status(self, order_id: str, status: str) -> Optional[Order]:
+        order = self.get(order_id)
+        if order is None:
+            return None
+
+        order.status = status
+        if status in TERMINAL_ORDER_STATUSES:
+            self.open.pop(order_id, None)
+        else:
+            self.open[order_id] = order
+        return order
+
+    def open_orders(self) -> List[Order]:
+        return list(self.open.values())
+
+@dataclass
+class SymbolFilters:
+    symbol: str
+    tick_size: float
+    step_size: float
+    min_notional: float
+    min_qty: float
+    max_qty: float
+
+@dataclass
+class OrderHistoryAggregate:
+    """
+    Running aggregates of the order history of one symbol.
+
+    Every order with an id below cursor has been seen: finished orders are folded into the
+    aggregates, open ones are kept in open_orders (keyed by the order id as a string, so the
+    history round-trips through JSON) until they finish.
+    """
+    symbol: str
+    cursor: int = 1
+    buy_count: int = 0
+    sell_count: int = 0
+    buy_quantity: float = 0.0
+    sell_quantity: float = 0.0
+    total_buy_value: float = 0.0
+    total_sell_value: float = 0.0
+    estimated_buy_fee: float = 0.0
+    estimated_sell_fee: float = 0.0
+    open_orders: Dict[str, dict] = field(default_factory=dict)
+
+    def fetch_from(self) -> int:
+        """Returns the first order id that has to be fetched: the oldest open order, or the cursor."""
+        return min((int(order_id) for order_id in self.open_orders), default=self.cursor)
+
+    def apply(self, order: dict) -> bool:
+        """
+        Folds an order returned by allOrders into the history.
+
+        Returns:
+            bool: True if the order was not seen before or its status changed.
+        """
+        order_id = int(order[ORDER_ID])
+        previous = self.open_orders.get(str(order_id))
+
+        if order_id < self.cursor and previous is None:
+            return False
+
+        self.cursor = max(self.cursor, order_id + 1)
+
+        if order[STATUS] not in TERMINAL_ORDER_STATUSES:
+            self.open_orders[str(order_id)] = {SIDE: order[SIDE], STATUS: order[STATUS], ORIG_QTY: order[ORIG_QTY], PRICE: order[PRICE]}
+            return previous is None or previous[STATUS] != order[STATUS]
+
+        self.open_orders.pop(str(order_id), None)
+
+        if order[STATUS] == FILLED:
+            executed_quantity = float(order[EXECUTED_QTY])
+            price = float(order[PRICE])
+
+            if price == 0 and executed_quantity > 0:
+                price = float(order[CUMMULATIVE_QUOTE_QTY]) / executed_quantity
+
+            order_value = executed_quantity * price
+
+            if order[SIDE] == BUY:
+                self.buy_count += 1
+                self.buy_quantity += executed_quantity
+                self.total_buy_value += order_value
+                self.estimated_buy_fee += order_value * FEE_BUY_BINANCE_VALUE
+            elif order[SIDE] == SELL:
+                self.sell_count += 1
+                self.sell_quantity += executed_quantity
+                self.total_sell_value += order_value
+                self.estimated_sell_fee += order_value * FEE_SELL_BINANCE_VALUE
+
+        return True
+
+    def pending(self, side: str) -> List[dict]:
+        """Returns the open orders of a side that have not been filled in part."""
+        return [order for order in self.open_orders.values() if order[SIDE] == side and order[STATUS] == NEW]
+
 @dataclass
 class CryptoPair:
     pair: str
     value: float
     crypto_amount_free: float
     crypto_amount_locked :float
-    buy_orders: List[Order] = field(default_factory=list)
+    buy_orders: OrderHistory = field(default_factory=OrderHistory)
     active_buy_order: Order = None
     active_sell_order: Order = None
     executed_sell_order: Order = None
@@ -57,11 +217,33 @@ class CryptoPair:
 
     def add_order(self, order: Order):
         self.buy_orders.append(order)
+        return order
+
+    def runtime_state(self) -> dict:
+        """
+        Returns the trading state that is not rebuilt from the exchange on startup, as JSON-compatible data.
+        Orders are flat dataclasses, so their attribute dicts are used as they are instead of copied.
+        """
+        return {
+            "current_state": {name: state.name for name, state in self.current_state.items()},
+            "active_buy_order": vars(self.active_buy_order) if self.active_buy_order else None,
+            "active_sell_order": vars(self.active_sell_order) if self.active_sell_order else None,
+            "executed_sell_order": vars(self.executed_sell_order) if self.executed_sell_order else None,
+            "cancelled_orders": self.cancelled_orders,
+            "buy_orders": [vars(order) for order in self.buy_orders],
+        }
 
-        if len(self.buy_orders) > MAX_ORDERS_HISTORY_IN_CRYPTO_PAIRS:
-            self.buy_orders.pop(0)
+    def restore_runtime_state(self, state: dict):
+        """Restores the trading state saved with runtime_state()."""
+        self.current_state.update({name: TradeState[value] for name, value in state["current_state"].items()})
+        self.active_buy_order = Order(**state["active_buy_order"]) if state["active_buy_order"] else None
+        self.active_sell_order = Order(**state["active_sell_order"]) if state["active_sell_order"] else None
+        self.executed_sell_order = Order(**state["executed_sell_order"]) if state["executed_sell_order"] else None
+        self.cancelled_orders = state["cancelled_orders"]
 
-        return order
+        self.buy_orders = OrderHistory()
+        for order in state["buy_orders"]:
+            self.buy_orders.append(Order(**order))
 
     def set_status(self, order_id: str, status: str):
         """
@@ -71,13 +253,14 @@ class CryptoPair:
             order_id (str): ID of the order whose status is to be changed.
             status (str): The new status that will be set.
         """
-        for order in self.buy_orders:
-            if order.order_id == order_id:
-                order.status = status
-                order.timestamp = int(time.time() * 1000)
-                logger.debug(f"Order with ID {order_id} status changed to {status}.")
-                return  order
-        logger.warning(f"No order found with ID {order_id}.")
+        order = self.buy_orders.set_status(order_id, status)
+        if order is None:
+            logger.warning(f"No order found with ID {order_id}.")
+            return None
+
+        order.timestamp = int(time.time() * 1000)
+        logger.debug(f"Order with ID {order_id} status changed to {status}.")
+        return order
 
 @dataclass
 class Heartbeat:
@@ -89,7 +272,7 @@ class Heartbeat:
 
     @staticmethod
     def collect_system_metrics():
-        cpu_per_core = psutil.cpu_percent(percpu=True, interval=1)
+        cpu_per_core = psutil.cpu_percent(percpu=True, interval=None)
         memory_info = psutil.virtual_memory()
         memory_usage = memory_info.used / (1024 ** 2)
 
@@ -99,8 +282,8 @@ class Heartbeat:
         }
 
     @staticmethod
-    def create_heartbeat(status: str, version: str):
-        system_metrics = Heartbeat.collect_system_metrics()
+    def create_heartbeat(status: str, version: str, system_metrics: dict = None):
+        system_metrics = system_metrics or Heartbeat.collect_system_metrics()
         return Heartbeat(
             timestamp=datetime.now(),
             status=status,
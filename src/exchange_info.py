@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+import time
+from dataclasses import asdict
+from typing import Awaitable, Callable, Dict, Optional
+from data_classes import SymbolFilters
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SymbolFilterCache:
+    """
+    Index of symbol filters (tick size, step size, min notional, lot limits) keyed by symbol.
+
+    The index is built from a single exchange-info download and refreshed when it is older than
+    the TTL. A small JSON snapshot of the index is kept on disk, so a restart within the TTL does
+    not need to download the exchange info again.
+    """
+
+    def __init__(self, fetch_exchange_info: Callable[[], Awaitable[dict]], ttl: float = EXCHANGE_INFO_TTL, snapshot_path: Optional[str] = None):
+        self.fetch_exchange_info = fetch_exchange_info
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+        self.filters: Dict[str, SymbolFilters] = {}
+        self.loaded_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def is_fresh(self) -> bool:
+        return bool(self.filters) and (time.time() - self.loaded_at) < self.ttl
+
+    async def get(self, symbol: str) -> Optional[SymbolFilters]:
+        """
+        Returns the filters for the given symbol, loading or refreshing the index if needed.
+
+        Args:
+            symbol (str): The trading pair symbol, e.g., 'BTCUSDT'.
+
+        Returns:
+            SymbolFilters or None: Filters of the symbol, or None if the symbol is unknown.
+        """
+        if not self.is_fresh():
+            await self.load()
+        return self.filters.get(symbol)
+
+    async def load(self, force: bool = False):
+        """
+        Fills the index from the on-disk snapshot if it is still fresh, otherwise from one exchange-info request.
+
+        Args:
+            force (bool): Skip the freshness checks and download the exchange info.
+        """
+        async with self.lock:
+            if not force and self.is_fresh():
+                return
+
+            if not force and self.load_snapshot():
+                return
+
+            try:
+                exchange_info = await self.fetch_exchange_info()
+            except Exception as e:
+                logger.exception(f"Failed to download exchange info: {e}")
+                return
+
+            self.filters = {s[SYMBOL]: self.parse_symbol(s) for s in exchange_info[SYMBOLS]}
+            self.loaded_at = time.time()
+            logger.debug(f"Symbol filter index built for {len(self.filters)} symbols.")
+
+            self.save_snapshot()
+
+    @staticmethod
+    def parse_symbol(symbol_info: dict) -> SymbolFilters:
+        filters = {f[FILTER_TYPE]: f for f in symbol_info[FILTERS]}
+
+        price_filter = filters.get(PRICE_FILTER, {})
+        lot_size = filters.get(LOT_SIZE, {})
+        notional = filters.get(NOTIONAL_FILTER) or filters.get(MIN_NOTIONAL_FILTER) or {}
+
+        return SymbolFilters(
+            symbol=symbol_info[SYMBOL],
+            tick_size=float(price_filter.get(TICK_SIZE, 0.0)),
+            step_size=float(lot_size.get(STEP_SIZE, 0.0)),
+            min_notional=float(notional.get(MIN_NOTIONAL, 0.0)),
+            min_qty=float(lot_size.get(MIN_QTY, 0.0)),
+            max_qty=float(lot_size.get(MAX_QTY, 0.0)),
+        )
+
+    def load_snapshot(self) -> bool:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+
+        try:
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+
+            if time.time() - snapshot[TIMESTAMP] >= self.ttl:
+                logger.debug("Exchange info snapshot expired.")
+                return False
+
+            self.filters = {symbol: SymbolFilters(**data) for symbol, data in snapshot[SYMBOLS].items()}
+            self.loaded_at = snapshot[TIMESTAMP]
+            logger.debug(f"Symbol filter index loaded from snapshot {self.snapshot_path} ({len(self.filters)} symbols).")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to read exchange info snapshot {self.snapshot_path}: {e}")
+            return False
+
+    def save_snapshot(self):
+        if not self.snapshot_path:
+            return
+
+        try:
+            # Shards of the supervisor share the snapshot, so every process writes its own temporary file
+            tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    TIMESTAMP: self.loaded_at,
+                    SYMBOLS: {symbol: asdict(filters) for symbol, filters in self.filters.items()},
+                }, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            logger.warning(f"Failed to write exchange info snapshot {self.snapshot_path}: {e}")
@@ -0,0 +1,611 @@
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import math
+import random
+import time
+import weakref
+from collections import Counter
+from decimal import Decimal
+from typing import Dict, List, Optional, Set
+from aiohttp import web, WSMsgType
+from globals import *
+from logger import logger
+
+
+# Request weight of every simulated endpoint, as documented for the Binance spot API
+ENDPOINT_WEIGHTS = {
+    ("GET", "ping"): 1,
+    ("GET", "time"): 1,
+    ("GET", "exchangeInfo"): 20,
+    ("GET", "ticker/price"): 2,
+    ("GET", "account"): 20,
+    ("POST", "order"): 1,
+    ("GET", "order"): 4,
+    ("DELETE", "order"): 1,
+    ("POST", "order/cancelReplace"): 1,
+    ("DELETE", "openOrders"): 1,
+    ("GET", "allOrders"): 20,
+    ("GET", "openOrders"): 6,
+    ("POST", "userDataStream"): 2,
+    ("PUT", "userDataStream"): 2,
+    ("DELETE", "userDataStream"): 2,
+}
+BULK_TICKER_WEIGHT = 4
+ALL_OPEN_ORDERS_WEIGHT = 80
+
+
+class SimulatedMarket:
+    """
+    Deterministic multi-symbol market and spot account.
+
+    Prices follow a seeded random walk that advances one step per tick(). Limit orders fill
+    completely at their limit price on the first tick whose price reaches them, so two runs with
+    the same seed and the same order flow produce the same fills. Every order and balance change is
+    reported to the registered event listeners as Binance user-data events.
+    """
+
+    def __init__(self, symbols: Dict[str, float], quote_asset: str = "USDT", quote_balance: float = 1_000_000.0,
+                 base_value: float = 1_000.0, tick_size: float = 0.0001, step_size: float = 0.0001,
+                 min_notional: float = 5.0, volatility: float = 0.001, seed: int = 0):
+        self.quote_asset = quote_asset
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.min_notional = min_notional
+        self.volatility = volatility
+        self.random = random.Random(seed)
+
+        self.prices: Dict[str, float] = {symbol: self.round_price(price) for symbol, price in symbols.items()}
+        self.free: Dict[str, float] = {quote_asset: quote_balance}
+        self.locked: Dict[str, float] = Counter()
+        for symbol, price in self.prices.items():
+            self.free[symbol[:-len(quote_asset)]] = math.floor(base_value / price / step_size) * step_size
+
+        self.orders: Dict[int, dict] = {}
+        self.open_orders: Dict[str, Dict[int, dict]] = {symbol: {} for symbol in self.prices}
+        self.next_order_id = 1
+        self.stats = Counter()
+        self.event_listeners = []
+        self.price_listeners = []
+
+    def round_price(self, price: float) -> float:
+        return round(round(price / self.tick_size) * self.tick_size, 10)
+
+    def base_asset(self, symbol: str) -> str:
+        return symbol[:-len(self.quote_asset)]
+
+    def exchange_info(self) -> dict:
+        return {
+            "timezone": "UTC",
+            "serverTime": int(time.time() * 1000),
+            SYMBOLS: [
+                {
+                    SYMBOL: symbol,
+                    STATUS: "TRADING",
+                    "baseAsset": self.base_asset(symbol),
+                    "quoteAsset": self.quote_asset,
+                    FILTERS: [
+                        {FILTER_TYPE: PRICE_FILTER, "minPrice": str(self.tick_size), "maxPrice": "1000000", TICK_SIZE: str(self.tick_size)},
+                        {FILTER_TYPE: LOT_SIZE, MIN_QTY: str(self.step_size), MAX_QTY: "9000000", STEP_SIZE: str(self.step_size)},
+                        {FILTER_TYPE: NOTIONAL_FILTER, MIN_NOTIONAL: str(self.min_notional)},
+                    ],
+                }
+                for symbol in self.prices
+            ],
+        }
+
+    def ticker(self, symbol: str) -> dict:
+        return {SYMBOL: symbol, PRICE: f"{self.prices[symbol]:.8f}"}
+
+    def account(self) -> dict:
+        return {
+            BALANCES: [
+                {ASSET: asset, FREE: f"{free:.8f}", LOCKED: f"{self.locked[asset]:.8f}"}
+                for asset, free in self.free.items()
+            ]
+        }
+
+    def create_order(self, symbol: str, side: str, quantity: str, price: str) -> dict:
+        """
+        Places a GTC limit order after the checks Binance applies to it.
+
+        Raises:
+            SimulatorError: On unknown symbols, filter failures and insufficient balance.
+        """
+        if symbol not in self.prices:
+            raise SimulatorError(400, -1121, "Invalid symbol.")
+
+        quantity_value, price_value = float(quantity), float(price)
+
+        if not self.is_multiple(price, self.tick_size):
+            raise SimulatorError(400, -1013, "Filter failure: PRICE_FILTER")
+        if quantity_value < self.step_size or not self.is_multiple(quantity, self.step_size):
+            raise SimulatorError(400, -1013, "Filter failure: LOT_SIZE")
+        if quantity_value * price_value < self.min_notional:
+            raise SimulatorError(400, -1013, "Filter failure: NOTIONAL")
+
+        asset, amount = self.reserved(symbol, side, quantity_value, price_value)
+        if self.free.get(asset, 0.0) < amount:
+            raise SimulatorError(400, -2010, "Account has insufficient balance for requested action.")
+
+        self.free[asset] -= amount
+        self.locked[asset] += amount
+
+        now = int(time.time() * 1000)
+        order = {
+            SYMBOL: symbol,
+            ORDER_ID: self.next_order_id,
+            "clientOrderId": f"sim{self.next_order_id}",
+            "transactTime": now,
+            PRICE: price,
+            ORIG_QTY: quantity,
+            EXECUTED_QTY: "0.00000000",
+            CUMMULATIVE_QUOTE_QTY: "0.00000000",
+            STATUS: NEW,
+            "timeInForce": "GTC",
+            "type": "LIMIT",
+            SIDE: side,
+            TIME: now,
+            "updateTime": now,
+            WORKING_TIME: now,
+        }
+        self.next_order_id += 1
+
+        self.orders[order[ORDER_ID]] = order
+        self.open_orders[symbol][order[ORDER_ID]] = order
+        self.stats["orders_created"] += 1
+        self.emit_order(order)
+
+        if self.crosses(side, price_value, self.prices[symbol]):
+            self.fill(order)
+
+        return dict(order)
+
+    def get_order(self, symbol: str, order_id) -> dict:
+        order = self.orders.get(int(order_id))
+        if order is None or order[SYMBOL] != symbol:
+            raise SimulatorError(400, -2013, "Order does not exist.")
+        return dict(order)
+
+    def cancel_order(self, symbol: str, order_id) -> dict:
+        order = self.open_orders.get(symbol, {}).pop(int(order_id), None)
+        if order is None:
+            raise SimulatorError(400, -2011, "Unknown order sent.")
+
+        asset, amount = self.reserved(symbol, order[SIDE], float(order[ORIG_QTY]), float(order[PRICE]))
+        self.locked[asset] -= amount
+        self.free[asset] += amount
+
+        order[STATUS] = CANCELED
+        order["updateTime"] = int(time.time() * 1000)
+        self.stats["orders_canceled"] += 1
+        self.emit_order(order, assets=[asset])
+        return dict(order)
+
+    def cancel_replace_order(self, symbol: str, order_id, side: str, quantity: str, price: str) -> dict:
+        """
+        Cancels an order and places a new one in its place (cancelReplaceMode STOP_ON_FAILURE).
+
+        Raises:
+            SimulatorError: -2022 when the cancellation fails, -2021 when only the new order fails.
+        """
+        try:
+            cancel_response = self.cancel_order(symbol, order_id)
+        except SimulatorError:
+            raise SimulatorError(400, -2022, "Order cancel-replace failed.")
+        try:
+            new_order_response = self.create_order(symbol, side, quantity, price)
+        except SimulatorError:
+            raise SimulatorError(400, -2021, "Order cancel-replace partially failed.")
+
+        return {
+            "cancelResult": "SUCCESS",
+            "newOrderResult": "SUCCESS",
+            "cancelResponse": cancel_response,
+            "newOrderResponse": new_order_response,
+        }
+
+    def cancel_open_orders(self, symbol: str) -> List[dict]:
+        if not self.open_orders.get(symbol):
+            raise SimulatorError(400, -2011, "Unknown order sent.")
+        return [self.cancel_order(symbol, order_id) for order_id in list(self.open_orders[symbol])]
+
+    def all_orders(self, symbol: str, from_id: Optional[int] = None, limit: int = 500) -> List[dict]:
+        """Orders of the symbol with an id >= from_id in ascending order, or the most recent ones without from_id."""
+        orders = [order for order in self.orders.values() if order[SYMBOL] == symbol]
+        if from_id is None:
+            orders = orders[-limit:]
+        else:
+            orders = [order for order in orders if order[ORDER_ID] >= from_id][:limit]
+        return [dict(order) for order in orders]
+
+    def get_open_orders(self, symbol: Optional[str] = None) -> List[dict]:
+        symbols = [symbol] if symbol else list(self.open_orders)
+        return [dict(order) for s in symbols for order in self.open_orders.get(s, {}).values()]
+
+    def tick(self) -> Set[str]:
+        """Advances every price by one random-walk step and fills the orders it reaches. Returns the symbols that moved."""
+        moved = set()
+        for symbol, price in self.prices.items():
+            new_price = self.round_price(price * math.exp(self.random.gauss(0.0, self.volatility)))
+            if new_price <= 0 or new_price == price:
+                continue
+
+            self.prices[symbol] = new_price
+            moved.add(symbol)
+
+            for order in [o for o in self.open_orders[symbol].values() if self.crosses(o[SIDE], float(o[PRICE]), new_price)]:
+                self.fill(order)
+
+        for listener in self.price_listeners:
+            listener(moved)
+
+        return moved
+
+    def fill(self, order: dict):
+        symbol, side = order[SYMBOL], order[SIDE]
+        quantity, price = float(order[ORIG_QTY]), float(order[PRICE])
+        base = self.base_asset(symbol)
+
+        if side == SELL:
+            self.locked[base] -= quantity
+            self.free[self.quote_asset] += quantity * price * (1 - FEE_SELL_BINANCE_VALUE)
+        else:
+            self.locked[self.quote_asset] -= quantity * price
+            self.free[base] = self.free.get(base, 0.0) + quantity * (1 - FEE_BUY_BINANCE_VALUE)
+
+        self.open_orders[symbol].pop(order[ORDER_ID], None)
+        order[STATUS] = FILLED
+        order[EXECUTED_QTY] = order[ORIG_QTY]
+        order[CUMMULATIVE_QUOTE_QTY] = f"{quantity * price:.8f}"
+        order["updateTime"] = int(time.time() * 1000)
+
+        self.stats["orders_filled"] += 1
+        self.emit_order(order, assets=[base, self.quote_asset])
+
+    def emit_order(self, order: dict, assets: Optional[List[str]] = None):
+        now = int(time.time() * 1000)
+        events = [{
+            "e": EXECUTION_REPORT,
+            "E": now,
+            "s": order[SYMBOL],
+            "c": order["clientOrderId"],
+            "S": order[SIDE],
+            "o": order["type"],
+            "f": order["timeInForce"],
+            "q": order[ORIG_QTY],
+            "p": order[PRICE],
+            "X": order[STATUS],
+            "i": order[ORDER_ID],
+            "z": order[EXECUTED_QTY],
+            "Z": order[CUMMULATIVE_QUOTE_QTY],
+            "O": order[TIME],
+            "W": order[WORKING_TIME],
+            "T": order["updateTime"],
+        }]
+
+        assets = assets or [self.reserved(order[SYMBOL], order[SIDE], 0.0, 0.0)[0]]
+        events.append({
+            "e": OUTBOUND_ACCOUNT_POSITION,
+            "E": now,
+            "B": [{"a": asset, "f": f"{self.free.get(asset, 0.0):.8f}", "l": f"{self.locked[asset]:.8f}"} for asset in assets],
+        })
+
+        for listener in self.event_listeners:
+            for event in events:
+                listener(event)
+
+    def reserved(self, symbol: str, side: str, quantity: float, price: float):
+        """Returns the asset and the amount an order locks."""
+        return (self.base_asset(symbol), quantity) if side == SELL else (self.quote_asset, quantity * price)
+
+    @staticmethod
+    def crosses(side: str, limit: float, price: float) -> bool:
+        return price >= limit if side == SELL else price <= limit
+
+    @staticmethod
+    def is_multiple(value: str, step: float) -> bool:
+        return Decimal(value) % Decimal(str(step)) == 0
+
+
+class SimulatorError(Exception):
+    """Error returned to the client as a Binance API error response."""
+
+    def __init__(self, status: int, code: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+class MockBinanceServer:
+    """
+    Local HTTP and websocket stand-in for the Binance spot endpoints used by the bot.
+
+    Serves ping, time, exchangeInfo, ticker/price, account, order (create, get, cancel), order/cancelReplace,
+    allOrders, openOrders (get, cancel) and userDataStream under /api/<version>/, the user-data stream under /ws/<listenKey>
+    and the combined market data stream under /stream. Every response carries the used request
+    weight of the current minute; requests over the weight limit are rejected with 429 like Binance.
+    Latency and a rate of injected server errors are configurable and drawn from a seeded generator.
+
+    The server clock runs clock_offset seconds ahead of the local one, and signed requests whose
+    timestamp is outside their recvWindow of it are rejected with -1021 like Binance. With a secret,
+    the signatures are checked too (-1022). The first request of every connection waits
+    connect_latency seconds more, the cost of a TCP and TLS handshake, and connections idle for
+    keepalive_timeout seconds are closed.
+
+    Point BINANCE_API_URL at http://host:port/api, USER_DATA_STREAM_URL at ws://host:port/ws and
+    MARKET_DATA_STREAM_URL at ws://host:port/stream to run the bot against it.
+    """
+
+    def __init__(self, market: SimulatedMarket, host: str = "127.0.0.1", port: int = SIMULATOR_PORT,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 weight_limit: int = SIMULATOR_WEIGHT_LIMIT, tick_interval: float = SIMULATOR_TICK_INTERVAL, seed: int = 0,
+                 clock_offset: float = 0.0, secret: Optional[str] = None, connect_latency: float = 0.0,
+                 keepalive_timeout: float = SIMULATOR_KEEPALIVE_TIMEOUT):
+        self.market = market
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.weight_limit = weight_limit
+        self.tick_interval = tick_interval
+        self.random = random.Random(seed)
+        self.clock_offset = clock_offset
+        self.secret = secret
+        self.connect_latency = connect_latency
+        self.keepalive_timeout = keepalive_timeout
+        self.connections = weakref.WeakSet()
+
+        self.weight_minute = 0
+        self.used_weight = 0
+        self.total_weight = 0
+        self.peak_weight = 0
+        self.stats = Counter()
+        self.listen_keys = 0
+        self.user_sockets: Set[web.WebSocketResponse] = set()
+        self.market_sockets: Dict[web.WebSocketResponse, Set[str]] = {}
+        self.runner = None
+        self.tick_task = None
+
+        market.event_listeners.append(self.push_user_event)
+        market.price_listeners.append(self.push_prices)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/api/{version}/{endpoint:.+}", self.handle_api)
+        app.router.add_get("/ws/{listen_key}", self.handle_user_stream)
+        app.router.add_get("/stream", self.handle_market_stream)
+        return app
+
+    async def start(self):
+        # Request handler options go to the runner itself: a handler_args mapping among them makes aiohttp drop them all
+        self.runner = web.AppRunner(self.app(), max_line_size=1 << 20, max_field_size=1 << 20, keepalive_timeout=self.keepalive_timeout, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        self.tick_task = asyncio.create_task(self.run_ticks())
+        logger.info(f"Binance simulator listening on http://{self.host}:{self.port}/api with {len(self.market.prices)} symbols.")
+
+    async def stop(self):
+        if self.tick_task:
+            self.tick_task.cancel()
+        for websocket in list(self.user_sockets) + list(self.market_sockets):
+            await websocket.close()
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def disconnect(self):
+        """Drops every open user-data and market data stream, to exercise the reconnection of the clients."""
+        websockets = list(self.user_sockets) + list(self.market_sockets)
+        self.user_sockets.clear()
+        self.market_sockets.clear()
+        for websocket in websockets:
+            await websocket.close()
+
+    async def run_ticks(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.market.tick()
+
+    def use_weight(self, weight: int):
+        minute = int(time.time() // 60)
+        if minute != self.weight_minute:
+            self.weight_minute = minute
+            self.used_weight = 0
+
+        self.used_weight += weight
+        self.total_weight += weight
+        self.peak_weight = max(self.peak_weight, self.used_weight)
+
+    def request_weight(self, method: str, endpoint: str, params: dict) -> int:
+        if endpoint == "ticker/price" and "symbol" not in params:
+            return BULK_TICKER_WEIGHT
+        if method == "GET" and endpoint == "openOrders" and "symbol" not in params:
+            return ALL_OPEN_ORDERS_WEIGHT
+        return ENDPOINT_WEIGHTS.get((method, endpoint), 1)
+
+    def now_ms(self) -> int:
+        """Current time of the server clock in milliseconds."""
+        return int((time.time() + self.clock_offset) * 1000)
+
+    def check_signature(self, payload: str, params: dict):
+        """Rejects a signed request like Binance: a timestamp outside recvWindow first, then a wrong signature if a secret is set."""
+        now = self.now_ms()
+        timestamp = int(params["timestamp"])
+        if timestamp >= now + 1000 or now - timestamp > int(params.get("recvWindow", DEFAULT_RECV_WINDOW)):
+            raise SimulatorError(400, TIMESTAMP_OUTSIDE_RECV_WINDOW, "Timestamp for this request is outside of the recvWindow.")
+
+        if self.secret:
+            signed, _, signature = payload.rpartition("&signature=")
+            if hmac.new(self.secret.encode(), signed.encode(), hashlib.sha256).hexdigest() != signature:
+                raise SimulatorError(400, INVALID_SIGNATURE, "Signature for this request is not valid.")
+
+    async def handle_api(self, request: web.Request) -> web.Response:
+        method, endpoint = request.method, request.match_info["endpoint"]
+        params = dict(request.query)
+        payload = request.query_string
+        if request.method in ("POST", "PUT", "DELETE"):
+            payload += await request.text()
+            params.update(await request.post())
+
+        delay = self.latency + self.random.uniform(0.0, self.jitter) if self.latency or self.jitter else 0.0
+        if request.transport not in self.connections:
+            self.connections.add(request.transport)
+            self.stats["connections"] += 1
+            delay += self.connect_latency
+        if delay:
+            await asyncio.sleep(delay)
+
+        self.stats[f"{method} {endpoint}"] += 1
+        self.use_weight(self.request_weight(method, endpoint, params))
+        headers = {USED_WEIGHT_HEADER: str(self.used_weight)}
+
+        try:
+            if self.used_weight > self.weight_limit:
+                self.stats["rate_limited"] += 1
+                headers[RETRY_AFTER_HEADER] = str(60 - int(time.time()) % 60)
+                raise SimulatorError(429, -1003, f"Too much request weight used; current limit is {self.weight_limit} request weight per 1 MINUTE.")
+
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.stats["injected_errors"] += 1
+                raise SimulatorError(503, -1008, "Server is currently overloaded with other requests. Please try again in a few minutes.")
+
+            if "timestamp" in params:
+                self.check_signature(payload, params)
+
+            body = self.dispatch(method, endpoint, params)
+            return web.json_response(body, headers=headers)
+        except SimulatorError as e:
+            return web.json_response({"code": e.code, "msg": e.message}, status=e.status, headers=headers)
+
+    def dispatch(self, method: str, endpoint: str, params: dict):
+        market = self.market
+
+        if endpoint == "ping":
+            return {}
+        if endpoint == "time":
+            return {SERVER_TIME: self.now_ms()}
+        if endpoint == "exchangeInfo":
+            return market.exchange_info()
+        if endpoint == "ticker/price":
+            if "symbol" in params:
+                if params["symbol"] not in market.prices:
+                    raise SimulatorError(400, -1121, "Invalid symbol.")
+                return market.ticker(params["symbol"])
+            symbols = json.loads(params["symbols"]) if "symbols" in params else list(market.prices)
+            if any(symbol not in market.prices for symbol in symbols):
+                raise SimulatorError(400, -1121, "Invalid symbol.")
+            return [market.ticker(symbol) for symbol in symbols]
+        if endpoint == "account":
+            return market.account()
+        if endpoint == "order":
+            if method == "POST":
+                return market.create_order(params["symbol"], params["side"], params["quantity"], params["price"])
+            if method == "GET":
+                return market.get_order(params["symbol"], params["orderId"])
+            if method == "DELETE":
+                return market.cancel_order(params["symbol"], params["orderId"])
+        if endpoint == "order/cancelReplace" and method == "POST":
+            return market.cancel_replace_order(params["symbol"], params["cancelOrderId"], params["side"], params["quantity"], params["price"])
+        if endpoint == "allOrders":
+            limit = min(int(params.get("limit", 500)), 1000)
+            from_id = int(params["orderId"]) if "orderId" in params else None
+            return market.all_orders(params["symbol"], from_id, limit)
+        if endpoint == "openOrders":
+            if method == "DELETE":
+                return market.cancel_open_orders(params["symbol"])
+            return market.get_open_orders(params.get("symbol"))
+        if endpoint == "userDataStream":
+            if method == "POST":
+                self.listen_keys += 1
+                return {"listenKey": f"simulator{self.listen_keys:08d}"}
+            return {}
+
+        raise SimulatorError(404, -1000, f"Endpoint {method} {endpoint} is not simulated.")
+
+    async def handle_user_stream(self, request: web.Request) -> web.WebSocketResponse:
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self.user_sockets.add(websocket)
+        try:
+            async for message in websocket:
+                if message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self.user_sockets.discard(websocket)
+        return websocket
+
+    async def handle_market_stream(self, request: web.Request) -> web.WebSocketResponse:
+        streams = request.query.get("streams", "")
+        symbols = {stream.split("@")[0].upper() for stream in streams.split("/") if stream}
+
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self.market_sockets[websocket] = symbols
+        try:
+            async for message in websocket:
+                if message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self.market_sockets.pop(websocket, None)
+        return websocket
+
+    def push_user_event(self, event: dict):
+        message = json.dumps(event)
+        for websocket in list(self.user_sockets):
+            asyncio.ensure_future(websocket.send_str(message))
+
+    def push_prices(self, symbols: Set[str]):
+        for websocket, subscribed in list(self.market_sockets.items()):
+            for symbol in symbols & subscribed:
+                price = self.market.prices[symbol]
+                data = {"u": 0, "s": symbol, "b": f"{price:.8f}", "B": "1.0", "a": f"{price:.8f}", "A": "1.0"}
+                asyncio.ensure_future(websocket.send_str(json.dumps({"stream": f"{symbol.lower()}@{BOOK_TICKER_STREAM}", "data": data})))
+
+    def report(self) -> dict:
+        return {
+            "requests": sum(count for name, count in self.stats.items() if " " in name),
+            "total_weight": self.total_weight,
+            "peak_weight_1m": self.peak_weight,
+            "rate_limited": self.stats["rate_limited"],
+            "injected_errors": self.stats["injected_errors"],
+            "connections": self.stats["connections"],
+            **{name: count for name, count in self.market.stats.items()},
+        }
+
+
+def make_symbols(count: int, quote_asset: str = "USDT", seed: int = 0) -> Dict[str, float]:
+    """Generates count synthetic symbols SIM0001<quote>, ... with deterministic start prices."""
+    generator = random.Random(seed)
+    return {f"SIM{index:04d}{quote_asset}": round(generator.uniform(1.0, 100.0), 4) for index in range(1, count + 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a simulated Binance spot API on localhost.")
+    parser.add_argument("--pairs", type=int, default=10)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=SIMULATOR_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency of every request in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random latency added on top, in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a server error.")
+    parser.add_argument("--weight-limit", type=int, default=SIMULATOR_WEIGHT_LIMIT)
+    parser.add_argument("--tick-interval", type=float, default=SIMULATOR_TICK_INTERVAL)
+    parser.add_argument("--volatility", type=float, default=0.001, help="Standard deviation of the log price change per tick.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--clock-offset", type=float, default=0.0, help="Seconds the server clock runs ahead of the local one.")
+    parser.add_argument("--secret", help="Secret key the signatures are checked with; unchecked if not given.")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="Latency added to the first request of every connection, in seconds.")
+    parser.add_argument("--keepalive-timeout", type=float, default=SIMULATOR_KEEPALIVE_TIMEOUT, help="Seconds after which an idle connection is closed.")
+    args = parser.parse_args()
+
+    async def serve():
+        market = SimulatedMarket(make_symbols(args.pairs, seed=args.seed), volatility=args.volatility, seed=args.seed)
+        server = MockBinanceServer(market, args.host, args.port, args.latency, args.jitter, args.error_rate, args.weight_limit, args.tick_interval, args.seed,
+                                   args.clock_offset, args.secret, args.connect_latency, args.keepalive_timeout)
+        await server.start()
+        await asyncio.Future()
+
+    asyncio.run(serve())
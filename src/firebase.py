@@ -1,16 +1,21 @@
 import asyncio
-from datetime import datetime, timedelta
 import signal
 import threading
 import time
+from dataclasses import replace
+from typing import Dict, Tuple
 import firebase_admin
 from firebase_admin import credentials, db
+from config_stream import ConfigStream, KeepAuthSession
 from data_classes import Order, Heartbeat
+from order_writer import OrderWriteBehind
+from profit import ProfitAggregate
 from globals import *
-from logger import logger, logging
+from logger import LOG_DEFAULT_SUBSYSTEM, get_logger, logging, set_levels
 from utils import get_private_ip, get_public_ip, get_ngrok_tunnel, update_and_reboot
 from os import getenv
 
+logger = get_logger(__name__)
 
 
 class FirebaseManager:
@@ -27,12 +32,16 @@ class FirebaseManager:
         if not hasattr(self, 'initialized'):
             logger.debug("Initializing FirebaseManager")
             self.initialized = True
-            self.dbUrl = 'https://bintrader-ffeeb-default-rtdb.firebaseio.com/'
+            self.dbUrl = getenv(FIREBASE_DATABASE_URL, 'https://bintrader-ffeeb-default-rtdb.firebaseio.com/')
             self.listeners = []
-            self.threads = []
-            self.cached_profit = 0.0
-            self.last_profit_update = None
-            self.profit_update_interval = timedelta(hours=1)
+            self.config_listeners = []
+            self.loop = None
+            self.profit = ProfitAggregate()
+            # Fills of orders this process had not seen yet, checked against their stored status before they are written
+            self.unverified_fills: Dict[str, Order] = {}
+            self.fills_lock = threading.Lock()
+            # A shard of the supervisor only counts the profit of its own orders, which the supervisor sums up
+            self.shard = getenv(SHARD_NAME)
 
             try:
                 firebase_key_path = getenv(FIREBASE_KEY_PATH)
@@ -51,6 +60,8 @@ class FirebaseManager:
                 self.ref = db.reference(DATABASE_PATH, url=self.dbUrl)
                 logger.debug("Firebase database reference set successfully.")
 
+                self.order_writer = OrderWriteBehind(write_batch=self.write_orders)
+
             except FileNotFoundError as e:
                 logger.error("Firebase credentials file not found.")
                 raise ValueError(f"Failed to initialize Firebase: {str(e)}")
@@ -60,16 +71,42 @@ class FirebaseManager:
                 raise ValueError(f"Failed to initialize Firebase: {str(e)}")
 
     def setup_firebase(self, loop):
+        self.loop = loop
         self.setup_signal_handler(loop)
         self.start_listener_in_thread()
+        if not self.shard:
+            self.load_profit()
+        loop.create_task(self.order_writer.run())
 
     def update_profit(self, profit: float):
         ref_profit = db.reference(PROFIT_PATH, url=self.dbUrl)
         ref_profit.set(profit)
 
-    def send_heartbeat(self, version, status="OK"):
-        heartbeat = Heartbeat.create_heartbeat(status=status, version=version)
-        self.calculate_and_cache_profit()
+    def send_heartbeat(self, version, profit: dict, status=HEARTBEAT_OK, metrics=None, system_metrics=None, profit_changed: bool = False) -> bool:
+        """
+        Writes the heartbeat, and the profit aggregate if it changed. Blocking, run in a worker thread:
+        every argument is plain data taken on the event loop, nothing shared with it is read here.
+
+        Args:
+            version (str): Version of the bot.
+            profit (dict): The profit aggregate, from snapshot_profit().
+            status (str): Heartbeat status.
+            metrics (dict): Metrics to publish with the heartbeat.
+            system_metrics (dict): CPU, memory and loop lag, from SystemMetricsSampler.snapshot().
+            profit_changed (bool): Whether the profit aggregate has to be written too.
+
+        Returns:
+            bool: False if the changed profit aggregate could not be written and has to be written again.
+        """
+        heartbeat = Heartbeat.create_heartbeat(status=status, version=version, system_metrics=system_metrics)
+
+        profit_written = True
+        if profit_changed:
+            try:
+                self.write_profit(profit)
+            except Exception as e:
+                logger.exception(f"Failed to persist profit aggregate: {e}")
+                profit_written = False
 
         heartbeat_data = {
             TIMESTAMP: heartbeat.timestamp.isoformat().replace("T"," | "),
@@ -77,37 +114,93 @@ class FirebaseManager:
             "version": heartbeat.version,
             "cpu_load": heartbeat.cpu_load,
             "memory_usage": heartbeat.memory_usage,
-            "profit" : self.cached_profit
+            "event_loop_lag": (system_metrics or {}).get("loop_lag_max"),
+            "profit" : profit["total"],
+            **(metrics or {}),
         }
 
         self.ref = db.reference(HEARTBEAT_PATH, url=self.dbUrl)
         self.ref.set(heartbeat_data)
+        return profit_written
 
     def add_order_to_firebase(self, order: Order):
         """
-        Adds an order to Firebase Realtime Database if it doesn't already exist, 
-        or updates it if the status or other attributes have changed.
+        Queues an order to be added to Firebase Realtime Database, or updated if its status has changed.
+        The write happens in the next batch flush of the order write-behind queue. A BUY order
+        that becomes FILLED adds its profit to the running profit aggregate. If this process has
+        not persisted a status of the order yet, e.g. it was restored after a restart, it may have
+        been FILLED and counted already: its stored status is checked by the flush that writes it.
 
         Parameters:
             order (Order): The order object to be added or updated.
         """
-        try:
-            self.ref = db.reference(ORDERS_PATH + '/' + str(order.order_id), url=self.dbUrl)
-
-            existing_order = self.ref.get()
+        if order is None:
+            return
 
-            if existing_order is not None:
-                if existing_order[STATUS] != order.status:
-                    self.ref.update({STATUS: order.status})
-                    logger.info(f"Order with ID {order.order_id} updated in Firebase (status changed from "
-                                f"{existing_order[STATUS]} to {order.status}).")
-                else:
-                    logger.debug(f"Order with ID {order.order_id} already exists in Firebase with the same status.")
+        if ProfitAggregate.counts_towards_profit(order.to_dict()) and self.order_writer.last_status(order.order_id) != FILLED:
+            if self.order_writer.is_persisted(order.order_id):
+                self.profit.add_order(order)
             else:
-                self.ref.set(order.to_dict())
-                logger.info(f"Order with ID {order.order_id} added successfully to Firebase.")
-        except Exception as e:
-            logger.exception(f"Failed to add or update order in Firebase: {e}")
+                with self.fills_lock:
+                    self.unverified_fills[str(order.order_id)] = order
+
+        self.order_writer.enqueue(order)
+
+    def push_strategy(self, strategy_name: str, parameters: dict):
+        """Replaces the parameters of a strategy under STRATEGIES_PATH, which the strategies listener picks up."""
+        db.reference(f"{STRATEGIES_PATH}/{strategy_name}", url=self.dbUrl).set(parameters)
+        logger.info(f"Strategy {strategy_name} updated in Firebase: {parameters}")
+
+    def write_orders(self, updates: dict):
+        """Applies a multi-path update below ORDERS_PATH, after counting the fills that turn out to be new. Blocking."""
+        self.count_unverified_fills()
+        db.reference(ORDERS_PATH, url=self.dbUrl).update(updates)
+
+    def count_unverified_fills(self):
+        """
+        Reads the stored status of the orders in unverified_fills, one order at a time, and adds
+        the profit of those that were not FILLED yet. Runs in the flusher thread before the fills
+        are written; the aggregate is updated on the event loop, which owns it.
+
+        Raises:
+            Exception: If a status could not be read; the unchecked fills stay queued with the batch.
+        """
+        with self.fills_lock:
+            fills, self.unverified_fills = self.unverified_fills, {}
+        if not fills:
+            return
+
+        checked, new_fills = len(fills), []
+
+        def add_new_fills():
+            for order in new_fills:
+                self.profit.add_order(order)
+
+        try:
+            for order_id, order in list(fills.items()):
+                if db.reference(f"{ORDERS_PATH}/{order_id}/{STATUS}", url=self.dbUrl).get() != FILLED:
+                    new_fills.append(order)
+                del fills[order_id]
+        finally:
+            if fills:
+                with self.fills_lock:
+                    for order_id, order in fills.items():
+                        self.unverified_fills.setdefault(order_id, order)
+            if new_fills:
+                self.call_on_loop(add_new_fills)
+
+        logger.debug(f"Checked the stored status of {checked} fills, {len(new_fills)} counted into the profit.")
+
+    def call_on_loop(self, callback):
+        """Runs callback on the event loop from another thread, or right away before the loop is set up."""
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(callback)
+        else:
+            callback()
+
+    def flush_orders(self):
+        """Writes all queued order updates to Firebase. Called on shutdown."""
+        self.order_writer.close()
 
     def save_ips_to_firebase(self):
         """
@@ -135,13 +228,13 @@ class FirebaseManager:
         except Exception as e:
             logger.exception(f"Failed to save or update IPs in Firebase: {e}")
 
-    def calculate_total_profit(self) -> float:
+    def calculate_total_profit(self) -> ProfitAggregate:
         """
-        Calculates the total profit from orders in Firebase Realtime Database 
-        with status 'FILLED' and side 'BUY'.
+        Recomputes the profit aggregate from all orders in Firebase Realtime Database
+        with status 'FILLED' and side 'BUY'. Only used on demand or when no aggregate is stored.
 
         Returns:
-            float: Total profit from matching orders.
+            ProfitAggregate: Profit per pair, per strategy and in total.
         """
         try:
             ref = db.reference(ORDERS_PATH, url=self.dbUrl)
@@ -149,36 +242,80 @@ class FirebaseManager:
 
             if not orders:
                 logger.info("No orders in database.")
-                return 0.0
 
-            total_profit = 0.0
-            for order_id, order in orders.items():
-                if order.get(STATUS) == FILLED and order.get(ORDER_TYPE) == BUY and order.get(PROFIT) != None:
-                    logger.debug(f"Order: {order}")
-                    total_profit += float(order.get(PROFIT))
-
-            return total_profit
+            return ProfitAggregate.from_orders(orders)
 
         except Exception as e:
             logger.exception(f"Error while calculating total profit: {e}")
-            return 0.0
+            return ProfitAggregate()
+
+    def recalculate_profit(self):
+        """Rebuilds the profit aggregate from the full order history and persists it."""
+        logger.info("Recalculating profit aggregate from all orders.")
+        self.profit = self.calculate_total_profit()
+        self.persist_profit()
 
-    def calculate_and_cache_profit(self):
+    def request_profit_recalculation(self):
         """
-        Updates the gain in the buffer if time has passed since the last update.
+        Rebuilds the profit aggregate on request, e.g. after orders were corrected by hand in the database.
+
+        Runs on the listener thread: the queued orders are flushed first so the rebuild sees them,
+        then the aggregate is swapped in and persisted on the event loop, which owns it.
         """
-        now = datetime.now()
-        if self.last_profit_update is None or (now - self.last_profit_update) >= self.profit_update_interval:
-            logger.info("Calculating and caching total profit.")
-            self.cached_profit = self.calculate_total_profit()
-            self.last_profit_update = now
+        logger.info("Profit recalculation requested.")
+        self.order_writer.flush()
+        profit = self.calculate_total_profit()
+
+        def replace_profit():
+            self.profit = profit
+            self.persist_profit()
+            logger.info(f"Profit aggregate recalculated: {profit.total} over {profit.filled_orders} filled orders.")
+
+        self.call_on_loop(replace_profit)
+
+    def load_profit(self):
+        """Loads the persisted profit aggregate, recalculating it if none is stored yet."""
+        try:
+            data = db.reference(PROFIT_SUMMARY_PATH, url=self.dbUrl).get()
+        except Exception as e:
+            logger.exception(f"Failed to load profit aggregate: {e}")
+            data = None
+
+        if data:
+            self.profit = ProfitAggregate.from_dict(data)
+            logger.info(f"Profit aggregate loaded: {self.profit.total}")
         else:
-            logger.debug("Using cached profit value.")
+            self.recalculate_profit()
+
+    def snapshot_profit(self) -> Tuple[dict, bool]:
+        """
+        Returns the profit aggregate as plain data, and whether it changed since the previous
+        snapshot, for a write in a worker thread. Called on the event loop, which owns the aggregate.
+        """
+        changed, self.profit.dirty = self.profit.dirty, False
+        return self.profit.to_dict(), changed
+
+    def write_profit(self, profit: dict):
+        """Writes a profit aggregate, given as ProfitAggregate.to_dict(), and its total profit. Blocking."""
+        db.reference(PROFIT_SUMMARY_PATH, url=self.dbUrl).set(profit)
+        self.update_profit(profit["total"])
+
+    def persist_profit(self):
+        """Writes the profit aggregate and the total profit if they changed since the last write."""
+        if not self.profit.dirty:
+            return
+
+        try:
+            self.write_profit(self.profit.to_dict())
+            self.profit.dirty = False
+        except Exception as e:
+            logger.exception(f"Failed to persist profit aggregate: {e}")
 
     async def shutdown(self, loop):
         """Closes active tasks and closes the loop safely."""
         logger.info("Shutting down tasks and closing listeners...")
         self.close_listeners()
+        self.flush_orders()
 
         tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
         for task in tasks:
@@ -195,46 +332,82 @@ class FirebaseManager:
             asyncio.ensure_future(self.shutdown(loop))
         signal.signal(signal.SIGINT, signal_handler)
 
-    def monitor_variable(self, path: str, listener):
-            ref = db.reference(path, url=self.dbUrl)
-            self.listeners.append(ref.listen(listener))
+    def add_config_listener(self, listener):
+        """Registers a callback run on the event loop after any config value changed in Firebase."""
+        self.config_listeners.append(listener)
+
+    def notify_config_change(self):
+        if not self.loop:
+            return
+        for listener in self.config_listeners:
+            self.loop.call_soon_threadsafe(listener)
+
+    def start_stream(self, root: str, routes: dict):
+        """Streams the root subtree on one connection, routing its events to the listeners of the routes."""
+        stream = ConfigStream(
+            self.dbUrl, root, routes,
+            session_factory=lambda: KeepAuthSession(self.cred.get_credential()),
+            on_event=self.notify_config_change,
+        )
+        stream.start()
+        self.listeners.append(stream)
 
     def close_listeners(self):
-        """Closes Firebase listeners and waits for threads to terminate.."""
+        """Closes the config streams and waits for their threads to terminate."""
         for listener in self.listeners:
             start_time = time.time()
             listener.close()
-            logger.debug(f"Listener {listener} closed in {time.time() - start_time:.2f} seconds.")
-        for thread in self.threads:
-            thread.join()
+            logger.debug(f"Stream {listener.root} closed in {time.time() - start_time:.2f} seconds.")
         logger.debug("Firebase listeners closed.")
 
     def start_listener_in_thread(self):
-        """Runs listeners in separate threads."""
-        thread1 = threading.Thread(target=self.monitor_variable, args=(LOGGING_VARIABLE_PATH, self.logging_level_listener), daemon=True)
-        thread2 = threading.Thread(target=self.monitor_variable, args=(POWER_STATUS_PATH, self.power_status_listener), daemon=True)
-        thread3 = threading.Thread(target=self.monitor_variable, args=(STRATEGIES_PATH, self.strategies_listener), daemon=True)
-        thread4 = threading.Thread(target=self.monitor_variable, args=(PAIRS_PATH, self.pairs_listener), daemon=True)
-        thread5 = threading.Thread(target=self.monitor_variable, args=(MONITORING_PATH, self.monitoring_buy_orders_listener), daemon=True)
-        thread6 = threading.Thread(target=self.monitor_variable, args=(UPDATE_PATH, self.update_listener), daemon=True)
-
-        self.threads.extend([thread1, thread2, thread3, thread4, thread5, thread6])
-        thread1.start()
-        thread2.start()
-        thread3.start()
-        thread4.start()
-        thread5.start()
-        thread6.start()
+        """
+        Streams the config subtree on one connection and thread, and the power status, which is
+        outside of it, on another. Shards leave the update listener to the supervisor.
+        """
+        routes = {
+            LOGGING_VARIABLE_PATH: self.logging_level_listener,
+            STRATEGIES_PATH: self.strategies_listener,
+            PAIRS_PATH: self.pairs_listener,
+            MONITORING_PATH: self.monitoring_buy_orders_listener,
+        }
+        if not self.shard:
+            routes[UPDATE_PATH] = self.update_listener
+
+        self.start_stream(CONFIG_PATH, routes)
+        self.start_stream(POWER_STATUS_PATH, {POWER_STATUS_PATH: self.power_status_listener})
+
+    def start_update_listener(self):
+        """Streams the update path alone, for the supervisor."""
+        self.start_stream(UPDATE_PATH, {UPDATE_PATH: self.update_listener})
 
     def logging_level_listener(self, event):
+        """
+        Listener of the LOGGING_LEVEL path.
+
+        A level sets every subsystem; an object of levels by subsystem name (e.g. {"default": 20,
+        "binance_api": 10}) or an update of one of its children sets only those subsystems, and a
+        deleted child makes the subsystem follow the default level again.
+        """
         global LOGGING_LEVEL
         allowed_levels = {logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL}
         previous_level = LOGGING_LEVEL.logging_level
 
-        if event.data in allowed_levels:
+        if event.path != "/" or isinstance(event.data, dict):
+            levels = {event.path.strip("/"): event.data} if event.path != "/" else event.data
+            invalid = {subsystem: level for subsystem, level in levels.items() if level is not None and level not in allowed_levels}
+            if invalid:
+                logger.error(f"Invalid logging levels: {invalid}. Choose one of {allowed_levels}.")
+
+            levels = {subsystem: level for subsystem, level in levels.items() if subsystem not in invalid}
+            if LOG_DEFAULT_SUBSYSTEM in levels and levels[LOG_DEFAULT_SUBSYSTEM] is not None:
+                LOGGING_LEVEL.logging_level = levels[LOG_DEFAULT_SUBSYSTEM]
+            set_levels(levels)
+            logger.info(f"Changing logging levels: {', '.join(f'{subsystem} {logging.getLevelName(level) if level is not None else LOG_DEFAULT_SUBSYSTEM}' for subsystem, level in levels.items())}")
+        elif event.data in allowed_levels:
             LOGGING_LEVEL.logging_level = event.data
             logger.info(f"Changing LOGGING_LEVEL: {logging.getLevelName(LOGGING_LEVEL.logging_level)}")
-            logger.setLevel(LOGGING_LEVEL.logging_level)
+            set_levels(LOGGING_LEVEL.logging_level)
         else:
             logger.error(f"Invalid logging level: {event.data}. Choose one of {allowed_levels}.")
 
@@ -255,20 +428,30 @@ class FirebaseManager:
         logger.info(f"Show buy orders changed to: {MONITORING.show_buy_orders}")
 
     def strategies_listener(self, event):
-        """Listener for updates in the STRATEGIES path."""
-        global STRATEGIES
+        """Listener for updates in the STRATEGIES path. Publishes a new config snapshot if the strategies changed."""
+        global CONFIG
+
+        with CONFIG.lock:
+            strategies = dict(CONFIG.snapshot.strategies)
+            self.apply_strategies_event(strategies, event.path.lstrip("/"), event.data)
+            if strategies == CONFIG.snapshot.strategies:
+                return
+            snapshot = CONFIG.publish(strategies=strategies)
 
-        path = event.path.lstrip("/")
-        event_data = event.data
+        logger.info(f"STRATEGIES (config version {snapshot.version}): {dict(snapshot.strategies)}")
 
+    def apply_strategies_event(self, strategies: dict, path: str, event_data):
+        """Applies an event of the STRATEGIES path to a copy of the strategies."""
         if not path:
             if isinstance(event_data, dict):
                 logger.info("Replacing entire strategies structure.")
                 try:
-                    STRATEGIES.strategies = {
+                    rebuilt = {
                         name: TradeStrategy(name=name, **data)
                         for name, data in event_data.items()
                     }
+                    strategies.clear()
+                    strategies.update(rebuilt)
                 except TypeError as e:
                     logger.error(f"Failed to rebuild strategies: {e}")
             else:
@@ -286,7 +469,7 @@ class FirebaseManager:
                         logger.warning(f"Multiplier for {strategy_name} is below 1.05. Setting to 1.05.")
                         event_data['multiplier'] = 1.05
 
-                    STRATEGIES.strategies[strategy_name] = TradeStrategy(name=strategy_name, **event_data)
+                    strategies[strategy_name] = TradeStrategy(name=strategy_name, **event_data)
                 except TypeError as e:
                     logger.error(f"Failed to update strategy {strategy_name}: {e}")
             else:
@@ -294,8 +477,8 @@ class FirebaseManager:
 
         elif len(path_parts) == 2:
             strategy_name, field = path_parts
-            if strategy_name in STRATEGIES.strategies:
-                current_strategy = STRATEGIES.strategies[strategy_name]
+            if strategy_name in strategies:
+                current_strategy = strategies[strategy_name]
                 if hasattr(current_strategy, field):
                     if field == 'multiplier' and event_data < 1.05:
                         logger.warning(f"Multiplier for {strategy_name} is below 1.05. Setting to 1.05.")
@@ -304,7 +487,7 @@ class FirebaseManager:
                     current_value = getattr(current_strategy, field)
                     if current_value != event_data:
                         logger.info(f"Updating {strategy_name}.{field} from {current_value} to {event_data}")
-                        setattr(current_strategy, field, event_data)
+                        strategies[strategy_name] = replace(current_strategy, **{field: event_data})
                 else:
                     logger.warning(f"Strategy {strategy_name} has no field '{field}' to update.")
             else:
@@ -313,26 +496,34 @@ class FirebaseManager:
         else:
             logger.warning(f"Unhandled path format: {path}")
 
-        logger.info(f"STRATEGIES: {STRATEGIES.strategies}")
-
     def pairs_listener(self, event):
-        """Listener for updates in the PAIRS path."""
-        global PAIRS
+        """Listener for updates in the PAIRS path. Publishes a new config snapshot if the pairs changed."""
+        global CONFIG
+
+        with CONFIG.lock:
+            pairs = dict(CONFIG.snapshot.pairs)
+            self.apply_pairs_event(pairs, event.path.lstrip("/"), event.data)
+            if pairs == CONFIG.snapshot.pairs:
+                return
+            snapshot = CONFIG.publish(pairs=pairs)
 
-        path = event.path.lstrip("/")
-        event_data = event.data
+        logger.info(f"PAIRS (config version {snapshot.version}): {list(snapshot.pairs)}")
 
+    def apply_pairs_event(self, pairs: dict, path: str, event_data):
+        """Applies an event of the PAIRS path to a copy of the pairs."""
         if not path:
             if isinstance(event_data, dict):
                 logger.info("Replacing entire pairs structure.")
                 try:
-                    PAIRS.pairs = {
+                    rebuilt = {
                         pair_name: {
                             "strategy_allocation": data["strategy_allocation"],
                             "trading_percentage": data["trading_percentage"]
                         }
                         for pair_name, data in event_data.items()
                     }
+                    pairs.clear()
+                    pairs.update(rebuilt)
                 except TypeError as e:
                     logger.error(f"Failed to rebuild pairs: {e}")
             else:
@@ -346,7 +537,7 @@ class FirebaseManager:
             if isinstance(event_data, dict):
                 logger.info(f"Replacing pair {pair_name} with new data: {event_data}")
                 try:
-                    PAIRS.pairs[pair_name] = {
+                    pairs[pair_name] = {
                         "strategy_allocation": event_data.get("strategy_allocation", {}),
                         "trading_percentage": event_data.get("trading_percentage", 1)
                     }
@@ -357,8 +548,8 @@ class FirebaseManager:
 
         elif len(path_parts) == 2:
             pair_name, field = path_parts
-            if pair_name in PAIRS.pairs:
-                current_pair = PAIRS.pairs[pair_name]
+            if pair_name in pairs:
+                current_pair = pairs[pair_name] = dict(pairs[pair_name])
                 if field == "strategy_allocation":
                     if isinstance(event_data, dict):
                         current_pair["strategy_allocation"] = event_data
@@ -379,8 +570,6 @@ class FirebaseManager:
         else:
             logger.warning(f"Unhandled path format: {path}")
 
-        logger.info(f"PAIRS: {PAIRS.pairs}")
-
     def update_listener(self, event):
         """
         Listener for the Update class. Reacts to changes in the update status or version from the database.
@@ -389,6 +578,13 @@ class FirebaseManager:
         """
         global UPDATE
 
+        # A recalculate_profit flag set to true rebuilds the profit aggregate and is reset right away
+        if event.path == f"/{RECALCULATE_PROFIT}":
+            if event.data:
+                db.reference(f"{UPDATE_PATH}/{RECALCULATE_PROFIT}", url=self.dbUrl).set(False)
+                self.request_profit_recalculation()
+            return
+
         # Check if this event is for 'update' or 'version' and update the respective attribute
         if event.path == "/update":
             # Update the `update` field
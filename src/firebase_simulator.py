@@ -0,0 +1,166 @@
+import argparse
+import asyncio
+import json
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+from aiohttp import web
+from config_stream import split_path
+from globals import *
+from logger import logger
+
+
+def get_node(tree: Any, parts: Tuple[str, ...]) -> Any:
+    for part in parts:
+        if not isinstance(tree, dict) or part not in tree:
+            return None
+        tree = tree[part]
+    return tree
+
+
+def set_node(tree: Any, parts: Tuple[str, ...], value: Any) -> Any:
+    """Returns the tree with the node at parts set to value, a None value deleting it and its emptied parents."""
+    if not parts:
+        return {} if value is None else value
+
+    tree = tree if isinstance(tree, dict) else {}
+    child = set_node(tree.get(parts[0]), parts[1:], value) if len(parts) > 1 else value
+    if child is None or child == {}:
+        tree.pop(parts[0], None)
+    else:
+        tree[parts[0]] = child
+    return tree
+
+
+class MockRealtimeDatabase:
+    """
+    Local stand-in of the Realtime Database REST API, streaming included, for one JSON tree.
+
+    GET <path>.json returns a node, or streams it when asked for text/event-stream: a put of the
+    whole node first, then a put or patch for every write at, below or above it and a keep-alive
+    every keepalive_interval seconds, like Firebase. PUT, PATCH and DELETE write the tree. The auth
+    and ns query parameters are ignored. disconnect() drops every open stream, to exercise the
+    reconnection of the clients.
+
+    Point FIREBASE_DATABASE_URL at http://host:port/ to stream the config from it.
+    """
+
+    def __init__(self, data: Optional[dict] = None, host: str = "127.0.0.1", port: int = FIREBASE_SIMULATOR_PORT,
+                 keepalive_interval: float = FIREBASE_KEEPALIVE_INTERVAL):
+        self.data = data or {}
+        self.host = host
+        self.port = port
+        self.keepalive_interval = keepalive_interval
+        self.streams: Dict[web.StreamResponse, Tuple[Tuple[str, ...], web.Request, asyncio.Task]] = {}
+        self.stats = Counter()
+        self.runner = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self.handle)
+        return app
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        logger.info(f"Realtime Database simulator listening on http://{self.host}:{self.port}/")
+
+    async def stop(self):
+        await self.disconnect()
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def disconnect(self):
+        """Drops every open stream."""
+        for response, (_, request, task) in list(self.streams.items()):
+            self.streams.pop(response, None)
+            # The transport is gone when the client closed the stream first
+            if request.transport is not None:
+                request.transport.close()
+            task.cancel()
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        path = request.match_info["path"]
+        if not path.endswith(".json"):
+            return web.json_response({"error": "404 Not Found"}, status=404)
+        parts = split_path(path[:-len(".json")])
+
+        if request.method == "GET":
+            if "text/event-stream" in request.headers.get("Accept", ""):
+                return await self.stream(request, parts)
+            node = get_node(self.data, parts)
+            if request.query.get("shallow") == "true" and isinstance(node, dict):
+                node = {key: True for key in node}
+            return web.json_response(node)
+
+        body = await request.json() if request.method in ("PUT", "PATCH") else None
+        if request.method == "PUT":
+            self.write("put", parts, body)
+        elif request.method == "PATCH":
+            self.write("patch", parts, body)
+        elif request.method == "DELETE":
+            self.write("put", parts, None)
+        else:
+            return web.json_response({"error": "405 Method Not Allowed"}, status=405)
+        return web.json_response(body)
+
+    def write(self, event_type: str, parts: Tuple[str, ...], value: Any):
+        """Applies a put or a patch and sends it to the streams it concerns."""
+        self.stats[event_type] += 1
+        if event_type == "patch":
+            for child, child_value in (value or {}).items():
+                self.data = set_node(self.data, parts + split_path(child), child_value)
+        else:
+            self.data = set_node(self.data, parts, value)
+
+        for response, (stream_parts, _, _) in list(self.streams.items()):
+            if parts[:len(stream_parts)] == stream_parts:
+                relative = "/" + "/".join(parts[len(stream_parts):])
+                self.send(response, event_type, {"path": relative, "data": value})
+            elif stream_parts[:len(parts)] == parts:
+                self.send(response, "put", {"path": "/", "data": get_node(self.data, stream_parts)})
+
+    def send(self, response: web.StreamResponse, event_type: str, message: Any):
+        payload = f"event: {event_type}\ndata: {json.dumps(message)}\n\n".encode()
+        asyncio.ensure_future(response.write(payload))
+
+    async def stream(self, request: web.Request, parts: Tuple[str, ...]) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        self.stats["connections"] += 1
+        self.streams[response] = (parts, request, asyncio.current_task())
+        self.send(response, "put", {"path": "/", "data": get_node(self.data, parts)})
+        try:
+            while True:
+                await asyncio.sleep(self.keepalive_interval)
+                await response.write(b"event: keep-alive\ndata: null\n\n")
+        except (asyncio.CancelledError, ConnectionResetError):
+            pass
+        finally:
+            self.streams.pop(response, None)
+        return response
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a Realtime Database stand-in with streaming on localhost.")
+    parser.add_argument("--data", help="JSON file with the initial tree.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=FIREBASE_SIMULATOR_PORT)
+    parser.add_argument("--keepalive-interval", type=float, default=FIREBASE_KEEPALIVE_INTERVAL)
+    parser.add_argument("--drop-interval", type=float, help="Drop every stream every this many seconds.")
+    args = parser.parse_args()
+
+    async def serve():
+        data = None
+        if args.data:
+            with open(args.data) as file:
+                data = json.load(file)
+        database = MockRealtimeDatabase(data, args.host, args.port, args.keepalive_interval)
+        await database.start()
+        while True:
+            await asyncio.sleep(args.drop_interval or 3600)
+            if args.drop_interval:
+                logger.info(f"Dropping {len(database.streams)} streams.")
+                await database.disconnect()
+
+    asyncio.run(serve())
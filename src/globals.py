@@ -7,8 +7,9 @@ from os import getenv
 #########################################################################################
 LOGGING_LEVEL = Config()
 POWER_STATUS = PowerStatus()
-STRATEGIES = Strategies()
-PAIRS = Pairs()
+CONFIG = ConfigStore(DEFAULT_STRATEGIES, DEFAULT_PAIRS)
+STRATEGIES = Strategies(CONFIG)
+PAIRS = Pairs(CONFIG)
 MONITORING = Monitoring()
 UPDATE = Update()
 #########################################################################################
@@ -30,6 +31,7 @@ MONITORING_PATH                 = CONFIG_PATH   + "/ShowBuyOrders"
 WALLET_PATH                     = CONFIG_PATH   + "/Wallet"
 UPDATE_PATH                     = CONFIG_PATH   + "/Update"
 PROFIT_PATH                     = WALLET_PATH   + "/Profit"
+PROFIT_SUMMARY_PATH             = WALLET_PATH   + "/ProfitSummary"
 #########################################################################################
 #FIREBASE PATH VARIABLES END
 #########################################################################################
@@ -42,6 +44,7 @@ BUY_PRICE             = "buy_price"
 TIMESTAMP             = "timestamp"
 STRATEGY              = "strategy"
 PROFIT                = "profit"
+RECALCULATE_PROFIT    = "recalculate_profit"
 FREE                  = "free"
 LOCKED                = "locked"
 SYMBOLS               = "symbols"
@@ -50,7 +53,13 @@ FILTERS               = "filters"
 FILTER_TYPE           = "filterType"
 LOT_SIZE              = "LOT_SIZE"
 STEP_SIZE             = "stepSize"
+MIN_QTY               = "minQty"
+MAX_QTY               = "maxQty"
+PRICE_FILTER          = "PRICE_FILTER"
+TICK_SIZE             = "tickSize"
 NOTIONAL              = "notional"
+NOTIONAL_FILTER       = "NOTIONAL"
+MIN_NOTIONAL_FILTER   = "MIN_NOTIONAL"
 MIN_NOTIONAL          = "minNotional"
 FILLED                = "FILLED"
 NEW                   = "NEW"
@@ -70,11 +79,127 @@ CUMMULATIVE_QUOTE_QTY = "cummulativeQuoteQty"
 CRYPTO_AMOUNT_FREE    = "crypto_amount_free"
 CRYPTO_AMOUNT_LOCKED  = "crypto_amount_locked"
 CANCELED              = "CANCELED"
+REJECTED              = "REJECTED"
+EXPIRED               = "EXPIRED"
+EXPIRED_IN_MATCH      = "EXPIRED_IN_MATCH"
+EXECUTION_REPORT      = "executionReport"
+OUTBOUND_ACCOUNT_POSITION = "outboundAccountPosition"
+
+TERMINAL_ORDER_STATUSES = {FILLED, CANCELED, REJECTED, EXPIRED, EXPIRED_IN_MATCH}
 
 BINANCE_API_KEY       = "BINANCE_API_KEY"
 BINANCE_SECRET_KEY    = "BINANCE_SECRET_KEY"
 FIREBASE_KEY_PATH     = "FIREBASE_KEY_PATH"
+FIREBASE_DATABASE_URL = "FIREBASE_DATABASE_URL"
+BINANCE_TRANSPORT     = "BINANCE_TRANSPORT"
+BINANCE_API_URL       = "BINANCE_API_URL"
+EXCHANGE_INFO_SNAPSHOT_PATH = "EXCHANGE_INFO_SNAPSHOT_PATH"
+ORDER_HISTORY_PATH    = "ORDER_HISTORY_PATH"
+STATE_STORE_PATH      = "STATE_STORE_PATH"
+SHARD_NAME            = "SHARD_NAME"
+
+TRANSPORT_SYNC   = "sync"
+TRANSPORT_ASYNC  = "async"
+
+HTTP_POOL_SIZE              = 100
+HTTP_MAX_REQUESTS_PER_HOST  = 20
+HTTP_KEEPALIVE_TIMEOUT      = 30
+
+SERVER_TIME                   = "serverTime"
+# Below HTTP_KEEPALIVE_TIMEOUT, so the syncs also keep the pooled connection of the next order open
+CLOCK_SYNC_INTERVAL           = 15
+CLOCK_SYNC_SAMPLES            = 8
+TIMESTAMP_OUTSIDE_RECV_WINDOW = -1021
+INVALID_SIGNATURE             = -1022
+DEFAULT_RECV_WINDOW           = 5000
+LATENCY_BUCKETS               = (0.001, 0.0015, 0.002, 0.003, 0.005, 0.0075, 0.01, 0.015, 0.02, 0.03, 0.05, 0.075,
+                                 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0)
+
+REQUEST_WEIGHT_LIMIT        = 6000
+REQUEST_WEIGHT_WINDOW       = 60
+REQUEST_BUDGET_NORMAL       = 0.9
+REQUEST_BUDGET_LOW          = 0.7
+REQUEST_PRIORITY_ORDER      = 0
+REQUEST_PRIORITY_NORMAL     = 1
+REQUEST_PRIORITY_LOW        = 2
+USED_WEIGHT_HEADER          = "X-MBX-USED-WEIGHT-1M"
+RETRY_AFTER_HEADER          = "Retry-After"
+
+EXCHANGE_INFO_TTL                = 6 * 60 * 60
+DEFAULT_EXCHANGE_INFO_SNAPSHOT   = "exchange_info_snapshot.json"
+
+DEFAULT_ORDER_HISTORY_DIR        = "order_history"
+ORDER_HISTORY_PAGE_SIZE          = 1000
+
+DEFAULT_STATE_STORE              = "state.db"
+
+PRICE_MAX_STALENESS              = 1.0
+
+MARKET_DATA_STREAM_URL           = getenv("MARKET_DATA_STREAM_URL", "wss://stream.binance.com:9443/stream")
+BOOK_TICKER_STREAM               = "bookTicker"
+MINI_TICKER_STREAM               = "miniTicker"
+STREAM_RECONNECT_MIN_DELAY       = 1
+STREAM_RECONNECT_MAX_DELAY       = 60
+STREAM_FALLBACK_POLL_INTERVAL    = 30
+
+USER_DATA_STREAM_URL             = getenv("USER_DATA_STREAM_URL", "wss://stream.binance.com:9443/ws")
+LISTEN_KEY_KEEPALIVE_INTERVAL    = 30 * 60
+ORDER_RECONCILE_INTERVAL         = 5 * 60
+# Orders in a terminal status kept in the order index, besides every open order
+ORDER_INDEX_TERMINAL_CAPACITY    = 1000
+
+SCHEDULER_POLL_INTERVAL          = 1
+BOOTSTRAP_WORKERS                = 16
+BOOTSTRAP_SLOWEST_PAIRS          = 5
+HEARTBEAT_INTERVAL               = 10
+METRICS_SAMPLE_INTERVAL          = 1
+METRICS_WINDOW                   = 60
+
+WALLET_MAX_STALENESS             = 2
+
+ORDER_FLUSH_INTERVAL             = 2
+ORDER_FLUSH_BATCH_SIZE           = 50
+
+ORDER_ACTION_PLACE               = "place"
+ORDER_ACTION_CANCEL              = "cancel"
+CANCEL_REPLACE_STOP_ON_FAILURE   = "STOP_ON_FAILURE"
+
+TICK_FORMAT_KLINES               = "klines"
+TICK_FORMAT_TRADES               = "trades"
+TICK_FORMAT_AGG_TRADES           = "aggTrades"
+
+SWEEP_BAR_SECONDS                = 1
+SWEEP_TOP_RESULTS                = 20
+
+SIMULATOR_PORT                   = 8766
+SIMULATOR_WEIGHT_LIMIT           = REQUEST_WEIGHT_LIMIT
+SIMULATOR_TICK_INTERVAL          = 0.5
+SIMULATOR_KEEPALIVE_TIMEOUT      = 75
+FIREBASE_SIMULATOR_PORT          = 8767
+FIREBASE_KEEPALIVE_INTERVAL      = 30
+
+CONFIG_STREAM_READ_TIMEOUT       = 3 * FIREBASE_KEEPALIVE_INTERVAL
+CONFIG_STREAM_BACKOFF_MIN        = 0.5
+CONFIG_STREAM_BACKOFF_MAX        = 60
+
+SHARD_REPORT_INTERVAL            = HEARTBEAT_INTERVAL
+SHARD_STALE_AFTER                = 3 * SHARD_REPORT_INTERVAL
+SHARD_RESTART_DELAY              = 5
+SHARD_STOP_TIMEOUT               = 30
+SHARD_OVERLOAD_LOOP_LAG          = 0.5
+SHARD_OVERLOAD_REPORTS           = 3
+SHARD_REBALANCE_COOLDOWN         = 120
+SHARD_LOAD_DECAY                 = 0.5
+SHARD_REPORT                     = "report"
+SHARD_RELEASE                    = "release"
+SHARD_RELEASED                   = "released"
+SHARD_ADOPT                      = "adopt"
+SHARD_STOP                       = "stop"
+HEARTBEAT_OK                     = "OK"
+HEARTBEAT_DEGRADED               = "DEGRADED"
+
 
+UNKNOWN_STRATEGY = "unknown"
 
 POOR_ORPHAN   = "poor_orphan"
 CRAZY_GIRL    = "crazy_girl"
@@ -0,0 +1,336 @@
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import replace
+from functools import partial
+from typing import Dict, List
+from globals import *
+from logger import logger
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def timed(function, samples: List[float]):
+    """Wraps a coroutine function so that the duration of every call is appended to samples."""
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await function(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - started)
+    return wrapper
+
+
+async def run_load_test(pairs: int, duration: float, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                        weight_limit: int = SIMULATOR_WEIGHT_LIMIT, tick_interval: float = SIMULATOR_TICK_INTERVAL,
+                        volatility: float = 0.001, port: int = SIMULATOR_PORT, seed: int = 0, strategy_overrides: Dict = None) -> dict:
+    """
+    Runs the trading scheduler against a local MockBinanceServer and measures it.
+
+    The bootstrap is the one of Trader.start_trade and the scheduler is the production one; only the
+    Binance endpoints point at the simulator and orders are recorded in memory instead of Firebase.
+
+    Args:
+        pairs (int): Number of simulated pairs to trade.
+        duration (float): Seconds to run the scheduler for after bootstrap.
+        error_rate (float): Fraction of trading-loop requests answered with a server error.
+        strategy_overrides (dict): TradeStrategy fields to override in every strategy, e.g. timeout.
+
+    Returns:
+        dict: Report with bootstrap time, request rate, latency percentiles and simulator statistics.
+    """
+    global PAIRS, POWER_STATUS, STRATEGIES
+
+    from exchange_simulator import MockBinanceServer, SimulatedMarket, make_symbols
+
+    market = SimulatedMarket(make_symbols(pairs, seed=seed), volatility=volatility, seed=seed)
+    server = MockBinanceServer(market, port=port, latency=latency, jitter=jitter,
+                               weight_limit=weight_limit, tick_interval=tick_interval, seed=seed)
+    await server.start()
+
+    # BinanceManager reads its endpoint, keys and local state paths once, on first construction
+    state_directory = tempfile.mkdtemp()
+    os.environ[BINANCE_API_URL] = f"http://{server.host}:{server.port}/api"
+    os.environ[EXCHANGE_INFO_SNAPSHOT_PATH] = os.path.join(state_directory, DEFAULT_EXCHANGE_INFO_SNAPSHOT)
+    os.environ[ORDER_HISTORY_PATH] = os.path.join(state_directory, DEFAULT_ORDER_HISTORY_DIR)
+    os.environ[STATE_STORE_PATH] = os.path.join(state_directory, DEFAULT_STATE_STORE)
+    os.environ.setdefault(BINANCE_API_KEY, "simulator")
+    os.environ.setdefault(BINANCE_SECRET_KEY, "simulator")
+
+    from backtest import BacktestOrderStore
+    from binance_api import BinanceManager
+    from data_classes import CryptoPairs
+    from scheduler import TradingScheduler
+    from trader import Trader
+
+    PAIRS.pairs = {
+        symbol: {
+            "strategy_allocation": {CRAZY_GIRL: 0.34, POOR_ORPHAN: 0.33, SENSIBLE_GUY: 0.33},
+            "trading_percentage": 1,
+        }
+        for symbol in market.prices
+    }
+    POWER_STATUS.power_status = True
+    if strategy_overrides:
+        STRATEGIES.strategies = {name: replace(strategy, **strategy_overrides) for name, strategy in STRATEGIES.strategies.items()}
+
+    manager = BinanceManager()
+    manager.request_governor.weight_limit = weight_limit
+    call_latency: Dict[str, List[float]] = defaultdict(list)
+    call = manager._call
+
+    async def timed_call(method: str, **params):
+        started = time.perf_counter()
+        try:
+            return await call(method, **params)
+        finally:
+            call_latency[method].append(time.perf_counter() - started)
+
+    manager._call = timed_call
+
+    trader = Trader()
+    trader.order_store = BacktestOrderStore()
+    step_latency: List[float] = []
+    trader.step = timed(trader.step, step_latency)
+
+    scheduler = TradingScheduler(trader, CryptoPairs())
+    manager.user_stream.url = f"ws://{server.host}:{server.port}/ws"
+
+    async def start_trade():
+        cryptoPairs = await trader.bootstrap(on_ready=scheduler.add_pair, market_stream_url=f"ws://{server.host}:{server.port}/stream")
+        # Errors are injected once every pair started: a failed pair is left out of trading, not retried
+        server.error_rate = error_rate
+        return cryptoPairs
+
+    background = []
+    try:
+        started = time.perf_counter()
+        run = asyncio.create_task(scheduler.run(watch_config=False))
+        startup = asyncio.create_task(start_trade())
+        background += [run, startup]
+        try:
+            await asyncio.wait_for(asyncio.shield(run), timeout=duration)
+        except asyncio.TimeoutError:
+            pass
+        elapsed = time.perf_counter() - started
+        order_latency = {stage: manager.order_latency.merged(stage).snapshot() for stage in manager.order_latency.STAGES}
+        scheduler_metrics = scheduler.metrics()
+        startup_timings = dict(trader.startup.timings) if trader.startup else {}
+    finally:
+        background += trader.stream_tasks
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        await manager.close()
+        await server.stop()
+        if trader.state_store:
+            trader.state_store.close()
+
+    requests = sum(len(samples) for samples in call_latency.values())
+    return {
+        "pairs": len(scheduler.cryptoPairs.pairs),
+        "startup": startup_timings,
+        "seconds": elapsed,
+        "requests": requests,
+        "requests_per_second": requests / elapsed if elapsed else 0.0,
+        "weight_per_minute": server.total_weight * 60 / elapsed if elapsed else 0.0,
+        "steps": len(step_latency),
+        "steps_per_second": len(step_latency) / elapsed if elapsed else 0.0,
+        "step_latency": {fraction: percentile(step_latency, fraction) for fraction in (0.5, 0.9, 0.99)},
+        "call_latency": {
+            method: {"count": len(samples), **{fraction: percentile(samples, fraction) for fraction in (0.5, 0.9, 0.99)}}
+            for method, samples in sorted(call_latency.items()) if samples
+        },
+        "order_latency": order_latency,
+        "clock_offset_ms": scheduler_metrics["clock_offset_ms"],
+        "max_loop_lag": scheduler_metrics["max_loop_lag"],
+        "iterations": scheduler_metrics["iterations"],
+        "governor": {name: scheduler_metrics[name] for name in ("peak_weight_utilization", "deferred_requests", "dropped_requests", "rate_limited_responses")},
+        "server": server.report(),
+    }
+
+
+def prepare_shard(symbols: List[str], weight_limit: int, user_stream_url: str, strategy_overrides: Dict = None, log_level: int = logging.WARNING):
+    """Setup hook of the shards of a sharded load test: configures the simulated pairs and keeps orders in memory."""
+    global PAIRS, POWER_STATUS, STRATEGIES
+
+    logger.setLevel(log_level)
+
+    from backtest import BacktestOrderStore
+    from binance_api import BinanceManager
+    from trader import Trader
+
+    PAIRS.pairs = {
+        symbol: {
+            "strategy_allocation": {CRAZY_GIRL: 0.34, POOR_ORPHAN: 0.33, SENSIBLE_GUY: 0.33},
+            "trading_percentage": 1,
+        }
+        for symbol in symbols
+    }
+    POWER_STATUS.power_status = True
+    if strategy_overrides:
+        STRATEGIES.strategies = {name: replace(strategy, **strategy_overrides) for name, strategy in STRATEGIES.strategies.items()}
+
+    BinanceManager().request_governor.weight_limit = weight_limit
+    BinanceManager().user_stream.url = user_stream_url
+    Trader().order_store = BacktestOrderStore()
+
+
+async def run_sharded_load_test(pairs: int, duration: float, shards: int, latency: float = 0.0, jitter: float = 0.0,
+                                weight_limit: int = SIMULATOR_WEIGHT_LIMIT, tick_interval: float = SIMULATOR_TICK_INTERVAL,
+                                volatility: float = 0.001, port: int = SIMULATOR_PORT, seed: int = 0, strategy_overrides: Dict = None,
+                                report_interval: float = SHARD_REPORT_INTERVAL, overload_loop_lag: float = SHARD_OVERLOAD_LOOP_LAG) -> dict:
+    """
+    Runs a Supervisor with shards processes against a local MockBinanceServer.
+
+    The shards share one simulated account, state store and order history directory, as the
+    shards of one account do in production.
+
+    Returns:
+        dict: The combined shard metrics, the pair moves of the rebalancing, the profit and the simulator statistics.
+    """
+    from exchange_simulator import MockBinanceServer, SimulatedMarket, make_symbols
+    from shard import ShardAccount, ShardPlan
+    from supervisor import Supervisor
+
+    market = SimulatedMarket(make_symbols(pairs, seed=seed), volatility=volatility, seed=seed)
+    server = MockBinanceServer(market, port=port, latency=latency, jitter=jitter,
+                               weight_limit=weight_limit, tick_interval=tick_interval, seed=seed)
+    await server.start()
+
+    state_directory = tempfile.mkdtemp()
+    os.environ.setdefault(BINANCE_API_KEY, "simulator")
+    os.environ.setdefault(BINANCE_SECRET_KEY, "simulator")
+    environment = {
+        BINANCE_API_URL: f"http://{server.host}:{server.port}/api",
+        EXCHANGE_INFO_SNAPSHOT_PATH: os.path.join(state_directory, DEFAULT_EXCHANGE_INFO_SNAPSHOT),
+        ORDER_HISTORY_PATH: os.path.join(state_directory, DEFAULT_ORDER_HISTORY_DIR),
+        STATE_STORE_PATH: os.path.join(state_directory, DEFAULT_STATE_STORE),
+    }
+    setup = partial(prepare_shard, list(market.prices), weight_limit, f"ws://{server.host}:{server.port}/ws", strategy_overrides, logger.level)
+
+    supervisor = Supervisor(
+        ShardPlan([ShardAccount(name="simulator", shards=shards)]),
+        version="load-test",
+        offline=True,
+        worker_options={"environment": environment, "setup": setup, "market_stream_url": f"ws://{server.host}:{server.port}/stream"},
+        report_interval=report_interval,
+        overload_loop_lag=overload_loop_lag,
+    )
+
+    started = time.perf_counter()
+    run = asyncio.create_task(supervisor.run())
+    try:
+        await asyncio.wait_for(asyncio.shield(run), timeout=duration)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics = supervisor.aggregate()
+        if supervisor.stopped:
+            supervisor.stop()
+        await asyncio.gather(run, return_exceptions=True)
+        await server.stop()
+
+    return {
+        "pairs": pairs,
+        "seconds": elapsed,
+        "metrics": metrics,
+        "moves": supervisor.moves,
+        "profit": supervisor.profit.total,
+        "filled_orders": supervisor.profit.filled_orders,
+        "weight_per_minute": server.total_weight * 60 / elapsed if elapsed else 0.0,
+        "server": server.report(),
+    }
+
+
+def print_sharded_report(report: dict):
+    metrics = report["metrics"]
+    logger.info("========== Sharded load test ==========")
+    logger.info(f" Pairs          : {report['pairs']} on {metrics['shards_alive']}/{metrics['shards']} shards")
+    logger.info(f" Duration       : {report['seconds']:.2f} s")
+    logger.info(f" Iterations     : {metrics['iterations']}")
+    logger.info(f" Max loop lag   : {metrics['max_loop_lag'] * 1000:.2f} ms")
+    logger.info(f" Request weight : {report['weight_per_minute']:.0f} weight/min, peak utilization {metrics['peak_weight_utilization']}")
+    logger.info(f" Profit         : {report['profit']:.6f} over {report['filled_orders']} filled orders")
+    slowest = sorted(metrics["order_latency"].items(), key=lambda item: item[1]["tick_to_order"]["p99_ms"], reverse=True)[:BOOTSTRAP_SLOWEST_PAIRS]
+    for pair, stages in slowest:
+        logger.info(f"   tick to order {pair:<12}: {stages['tick_to_order']['count']:>5} orders  p50 {stages['tick_to_order']['p50_ms']:.2f} ms  p99 {stages['tick_to_order']['p99_ms']:.2f} ms")
+    for name, shard in metrics["shard_metrics"].items():
+        logger.info(f"   {name:<22}: {shard['pairs']:>5} pairs  {shard['iterations']:>7} iterations  loop lag {shard['loop_lag_max'] * 1000:.2f} ms  load {shard['load'] * 1000:.1f} ms  restarts {shard['restarts']}")
+    for move in report["moves"]:
+        logger.info(f" Moved {len(move['pairs'])} pairs from {move['from']} to {move['to']}")
+    for name, value in report["server"].items():
+        logger.info(f" {name:<23}: {value}")
+
+
+def print_report(report: dict):
+    logger.info("========== Load test ==========")
+    logger.info(f" Pairs          : {report['pairs']}")
+    startup = report["startup"]
+    synced = f"{startup['total']:.2f} s" if "total" in startup else "still running"
+    logger.info(f" Startup        : first pair ready {startup.get('first_pair_ready', 0.0):.2f} s, all ready {startup.get('all_pairs_ready', 0.0):.2f} s, order histories synced {synced}")
+    logger.info(f" Duration       : {report['seconds']:.2f} s")
+    logger.info(f" Requests       : {report['requests']} ({report['requests_per_second']:.1f}/s, {report['weight_per_minute']:.0f} weight/min)")
+    logger.info(f" Steps          : {report['steps']} ({report['steps_per_second']:.1f}/s)")
+    step = report["step_latency"]
+    logger.info(f" Step latency   : p50 {step[0.5] * 1000:.2f} ms  p90 {step[0.9] * 1000:.2f} ms  p99 {step[0.99] * 1000:.2f} ms")
+    logger.info(f" Max loop lag   : {report['max_loop_lag'] * 1000:.2f} ms")
+    logger.info(f" Clock offset   : {report['clock_offset_ms']:.1f} ms")
+    for stage, stats in report["order_latency"].items():
+        logger.info(f"   {stage:<22}: {stats['count']:>7}  p50 {stats['p50_ms']:.2f} ms  p90 {stats['p90_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms")
+    for method, stats in report["call_latency"].items():
+        logger.info(f"   {method:<22}: {stats['count']:>7}  p50 {stats[0.5] * 1000:.2f} ms  p90 {stats[0.9] * 1000:.2f} ms  p99 {stats[0.99] * 1000:.2f} ms")
+    for name, value in report["governor"].items():
+        logger.info(f" {name:<23}: {value}")
+    for name, value in report["server"].items():
+        logger.info(f" {name:<23}: {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the trading scheduler against a local Binance simulator and report throughput and latency.")
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run after bootstrap.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated latency of every request in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random latency added on top, in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a server error.")
+    parser.add_argument("--weight-limit", type=int, default=SIMULATOR_WEIGHT_LIMIT)
+    parser.add_argument("--tick-interval", type=float, default=SIMULATOR_TICK_INTERVAL)
+    parser.add_argument("--volatility", type=float, default=0.001)
+    parser.add_argument("--port", type=int, default=SIMULATOR_PORT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=int, help="Override the sell timeout of every strategy.")
+    parser.add_argument("--cooldown", type=int, help="Override the cooldown of every strategy.")
+    parser.add_argument("--shards", type=int, default=0, help="Run the pairs on this many shard processes under the supervisor.")
+    parser.add_argument("--report-interval", type=float, default=SHARD_REPORT_INTERVAL, help="Seconds between shard reports.")
+    parser.add_argument("--overload-loop-lag", type=float, default=SHARD_OVERLOAD_LOOP_LAG, help="Loop lag in seconds above which a shard gives pairs away.")
+    args = parser.parse_args()
+
+    overrides = {name: value for name, value in (("timeout", args.timeout), ("cooldown", args.cooldown)) if value is not None}
+
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        if args.shards:
+            report = asyncio.run(run_sharded_load_test(args.pairs, args.duration, args.shards, args.latency, args.jitter, args.weight_limit,
+                                                       args.tick_interval, args.volatility, args.port, args.seed, overrides,
+                                                       args.report_interval, args.overload_loop_lag))
+        else:
+            report = asyncio.run(run_load_test(args.pairs, args.duration, args.latency, args.jitter, args.error_rate, args.weight_limit,
+                                               args.tick_interval, args.volatility, args.port, args.seed, overrides))
+    finally:
+        logger.setLevel(level)
+
+    if args.shards:
+        print_sharded_report(report)
+    else:
+        print_report(report)
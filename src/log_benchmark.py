@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import replace
+from typing import List, Tuple
+from backtest import Backtest, load_ticks
+from data_classes import SymbolFilters
+from globals import *
+from logger import logger, create_console_handler, queue_handler, rate_limit_filter, set_levels, set_output, stop_listener
+
+
+class CountingHandler(logging.StreamHandler):
+    """Console handler writing to the null device, counting the records it formats."""
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.records = 0
+
+    def emit(self, record: logging.LogRecord):
+        self.records += 1
+        super().emit(record)
+
+
+def random_walk(ticks: int, start: float = 60000.0, volatility: float = 0.0005, seed: int = 1) -> Tuple[List[float], List[float]]:
+    """Returns one tick per second of a seeded geometric random walk, so every run replays the same prices."""
+    generator = random.Random(seed)
+    times, prices = [], []
+    now, price = time.time() - ticks, start
+    for _ in range(ticks):
+        now += 1.0
+        price *= 1.0 + generator.gauss(0.0, volatility)
+        times.append(now)
+        prices.append(round(price, 2))
+    return times, prices
+
+
+def run(level: int, times: List[float], prices: List[float], filters: SymbolFilters, strategies, base_balance: float,
+        monitor_interval: float, synchronous: bool) -> dict:
+    """
+    Replays the ticks once with the logging level set to level.
+
+    Returns:
+        dict: Time per evaluation as seen by the trading loop, records written, suppressed and
+            dropped, and the time the listener took to write the queued records afterwards.
+    """
+    sink = CountingHandler(open(os.devnull, "w"))
+    sink.setFormatter(create_console_handler().formatter)
+    if synchronous:
+        sink.addFilter(rate_limit_filter)
+        logger.removeHandler(queue_handler)
+        logger.addHandler(sink)
+    else:
+        set_output(sink)
+
+    suppressed, dropped = rate_limit_filter.suppressed, queue_handler.dropped
+    set_levels(level)
+    try:
+        result = asyncio.run(Backtest(filters, strategies, base_balance, monitor_interval=monitor_interval).run(times, prices))
+    finally:
+        set_levels(logging.WARNING)
+        drained = time.perf_counter()
+        if synchronous:
+            logger.removeHandler(sink)
+            logger.addHandler(queue_handler)
+        else:
+            stop_listener()
+        drained = time.perf_counter() - drained
+
+    return {
+        "level": logging.getLevelName(level),
+        "evaluations": result.evaluations,
+        "evaluation_us": result.evaluation_time * 1e6,
+        "written": sink.records,
+        "suppressed": rate_limit_filter.suppressed - suppressed,
+        "dropped": queue_handler.dropped - dropped,
+        "drain_ms": drained * 1000,
+    }
+
+
+def print_results(results: List[dict]):
+    print(f"{'level':<8}{'evaluations':>12}{'us/eval':>10}{'written':>10}{'suppressed':>12}{'dropped':>9}{'drain ms':>10}")
+    for result in results:
+        print(
+            f"{result['level']:<8}{result['evaluations']:>12}{result['evaluation_us']:>10.1f}{result['written']:>10}"
+            f"{result['suppressed']:>12}{result['dropped']:>9}{result['drain_ms']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the cost of logging on the strategy cycle by replaying prices at several logging levels.")
+    parser.add_argument("ticks_path", nargs="?", help="Klines file to replay (see backtest.py). Defaults to a seeded random walk.")
+    parser.add_argument("--ticks", type=int, default=200000, help="Number of random walk ticks.")
+    parser.add_argument("--symbol", default="BTCUSDC")
+    parser.add_argument("--base-balance", type=float, default=0.05)
+    parser.add_argument("--multiplier", type=float, default=3)
+    parser.add_argument("--monitor-interval", type=float, default=SCHEDULER_POLL_INTERVAL, help="Seconds of simulated time between evaluations while MONITORING.")
+    parser.add_argument("--levels", default="DEBUG,INFO", help="Comma separated logging levels to compare.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per level, the fastest is reported.")
+    parser.add_argument("--no-rate-limit", action="store_true", help="Write every record instead of sampling repeated lines.")
+    parser.add_argument("--sync", action="store_true", help="Write the records in the trading loop instead of the listener thread.")
+    args = parser.parse_args()
+
+    times, prices = load_ticks(args.ticks_path) if args.ticks_path else random_walk(args.ticks)
+    filters = SymbolFilters(symbol=args.symbol, tick_size=0.01, step_size=0.00001, min_notional=5.0, min_qty=0.0, max_qty=0.0)
+    strategies = [replace(strategy, multiplier=args.multiplier) for strategy in STRATEGIES.strategies.values()]
+    if args.no_rate_limit:
+        rate_limit_filter.burst = 0
+
+    results = []
+    for name in args.levels.split(","):
+        level = logging.getLevelName(name.strip().upper())
+        runs = [
+            run(level, times, prices, filters, strategies, args.base_balance, args.monitor_interval, args.sync)
+            for _ in range(args.repeat)
+        ]
+        results.append(min(runs, key=lambda result: result["evaluation_us"]))
+
+    print_results(results)
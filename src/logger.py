@@ -1,23 +1,247 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import threading
+import time
+from os import getenv
+from typing import Dict, Optional, Union
 import colorlog
 
+# Kept here rather than in globals, which imports this module through observable
+LOG_FORMAT_TEXT = "text"
+LOG_FORMAT_JSON = "json"
+LOG_FORMAT = getenv("LOG_FORMAT", LOG_FORMAT_TEXT)
+LOG_QUEUE_SIZE = 10000
+LOG_RATE_LIMIT_INTERVAL = 10.0
+LOG_RATE_LIMIT_BURST = 5
+LOG_RATE_LIMIT_KEYS = 10000
+LOG_STOP_TIMEOUT = 5.0
+LOG_DEFAULT_SUBSYSTEM = "default"
+
+# Attributes every LogRecord has, anything else was passed through extra and is a structured field
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "suppressed"}
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
-console_handler = logging.StreamHandler()
 
-formatter = colorlog.ColoredFormatter(
-    '%(asctime)s [%(log_color)s%(levelname)-5s%(reset)s] : %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    log_colors={
-        'DEBUG': 'yellow',      # Yellow for DEBUG
-        'INFO': 'green',        # Green for INFO
-        'WARNING': 'yellow',    # Orange-yellow for WARNING
-        'ERROR': 'red',         # Red for ERROR
-        'CRITICAL': 'white,bg_red',  # White on red for CRITICAL
-    }
-)
+def subsystem_of(record: logging.LogRecord) -> str:
+    return record.name[len(logger.name) + 1:] or LOG_DEFAULT_SUBSYSTEM
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most burst records of the same line through every interval seconds.
+
+    A line is identified by its logger, level and message template, plus the pair field of the
+    record when there is one, so a line repeated for every pair on every cycle (e.g. 'Waiting for
+    SELL order') is sampled per pair. The first record let through after some were dropped says
+    how many. Records above max_level, by default warnings and errors, are never dropped.
+    suppressed counts every dropped record.
+    """
+
+    def __init__(self, interval: float = LOG_RATE_LIMIT_INTERVAL, burst: int = LOG_RATE_LIMIT_BURST, max_level: int = logging.INFO):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.max_level = max_level
+        self.windows: Dict[tuple, list] = {}
+        self.suppressed = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or self.burst <= 0:
+            return True
+
+        key = (record.name, record.levelno, record.msg, getattr(record, "pair", None))
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                if len(self.windows) >= LOG_RATE_LIMIT_KEYS:
+                    self.prune(now)
+                suppressed = window[2] if window else 0
+                self.windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                window[1] += 1
+                suppressed, window[2] = window[2], 0
+            else:
+                window[2] += 1
+                self.suppressed += 1
+                return False
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+    def prune(self, now: float):
+        for key in [key for key, window in self.windows.items() if now - window[0] >= self.interval]:
+            del self.windows[key]
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object: time, level, subsystem, message, the extra fields and the exception."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": record.created,
+            "level": record.levelname,
+            "subsystem": subsystem_of(record),
+            "message": record.getMessage(),
+        }
+        entry.update((name, value) for name, value in vars(record).items() if name not in RECORD_ATTRIBUTES)
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(colorlog.ColoredFormatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        if getattr(record, "suppressed", 0):
+            text += f" ({record.suppressed} similar lines suppressed)"
+        return text
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands the records to the listener thread without ever blocking the caller.
+
+    Only the message arguments are merged in the calling thread, so they cannot change before
+    the record is written; the time stamp, colors or JSON are formatted by the listener. When the
+    queue is full the record is dropped and counted in dropped.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BlockingStopQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener whose stop waits for room in the queue rather than failing when it is full.
+
+    The sentinel is put with a blocking put, so the records already queued are written before the
+    thread stops. Should the listener not make room within timeout seconds, the queued records are
+    discarded so the sentinel always gets in.
+    """
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler, respect_handler_level: bool = False, timeout: float = LOG_STOP_TIMEOUT):
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.timeout = timeout
+
+    def enqueue_sentinel(self):
+        try:
+            self.queue.put(self._sentinel, timeout=self.timeout)
+            return
+        except queue.Full:
+            pass
+
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.queue.put_nowait(self._sentinel)
+
+
+def create_console_handler(stream=None, log_format: str = LOG_FORMAT) -> logging.Handler:
+    handler = logging.StreamHandler(stream)
+    if log_format == LOG_FORMAT_JSON:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(TextFormatter(
+            '%(asctime)s [%(log_color)s%(levelname)-5s%(reset)s] : %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S',
+            log_colors={
+                'DEBUG': 'yellow',      # Yellow for DEBUG
+                'INFO': 'green',        # Green for INFO
+                'WARNING': 'yellow',    # Orange-yellow for WARNING
+                'ERROR': 'red',         # Red for ERROR
+                'CRITICAL': 'white,bg_red',  # White on red for CRITICAL
+            }
+        ))
+    return handler
+
+
+log_queue = queue.Queue(LOG_QUEUE_SIZE)
+queue_handler = NonBlockingQueueHandler(log_queue)
+rate_limit_filter = RateLimitFilter()
+queue_handler.addFilter(rate_limit_filter)
+logger.addHandler(queue_handler)
+logger.propagate = False
+
+console_handler = create_console_handler()
+listener = BlockingStopQueueListener(log_queue, console_handler, respect_handler_level=True)
+listener.start()
+
+
+def stop_listener():
+    """Writes the queued records and stops the listener thread."""
+    if listener._thread is not None:
+        listener.stop()
+
+
+atexit.register(stop_listener)
+
+
+def set_output(*handlers: logging.Handler):
+    """
+    Replaces the handlers the listener writes the records to, e.g. to write them to a file.
+
+    Args:
+        handlers (logging.Handler): The new handlers.
+    """
+    stop_listener()
+    listener.handlers = handlers
+    listener.start()
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """
+    Returns the logger of a subsystem, whose level can be set on its own with set_levels().
+
+    Its records go through the same queue, rate limit and output as the main logger.
+
+    Args:
+        subsystem (str): Name of the subsystem, usually the module name, e.g. 'binance_api'.
+    """
+    return logger.getChild(subsystem)
+
+
+def set_levels(levels: Union[int, Dict[str, Optional[int]]]):
+    """
+    Sets the logging levels.
 
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+    Args:
+        levels (int | dict): The level of every subsystem, or a level per subsystem name. The
+            'default' entry sets the main logger, which the subsystems without a level of their
+            own follow; a None level resets a subsystem to the default.
+    """
+    if isinstance(levels, int):
+        levels = {LOG_DEFAULT_SUBSYSTEM: levels}
 
+    for subsystem, level in levels.items():
+        if subsystem == LOG_DEFAULT_SUBSYSTEM:
+            logger.setLevel(logging.DEBUG if level is None else level)
+        else:
+            get_logger(subsystem).setLevel(logging.NOTSET if level is None else level)
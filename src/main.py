@@ -2,27 +2,46 @@ import asyncio
 from logger import logger
 from utils import get_tag
 from trader import Trader
-from globals import POWER_STATUS
+from scheduler import TradingScheduler
+from data_classes import CryptoPairs
+from metrics import SystemMetricsSampler, HeartbeatPublisher
+from binance_api import BinanceManager
+from firebase import FirebaseManager
 
 VERSION = get_tag()
 
 
 async def main():
-    global POWER_STATUS
-
     trader = Trader()
-    cryptoPairs = trader.start_trade()
-
-    iteration = 0
-
-    while True:
-        if POWER_STATUS.power_status:
-            await trader.run_trading_cycle(cryptoPairs, VERSION)
-            iteration += 1
-            logger.debug(f"Iteration {iteration}")
-        else:
-            logger.info("Power status is OFF. Waiting...")
-            await asyncio.sleep(1)
+    scheduler = TradingScheduler(trader, CryptoPairs())
+
+    sampler = SystemMetricsSampler()
+    heartbeat = HeartbeatPublisher(version=VERSION, sampler=sampler)
+    heartbeat.add_source(scheduler.metrics)
+
+    background_tasks = [asyncio.create_task(sampler.run()), asyncio.create_task(heartbeat.run())]
+
+    # Pairs start trading as soon as they are initialized, while the others are still starting
+    startup = asyncio.create_task(trader.start_trade(on_ready=scheduler.add_pair))
+    background_tasks.append(startup)
+
+    def on_startup_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            scheduler.stop()
+
+    startup.add_done_callback(on_startup_done)
+
+    try:
+        await scheduler.run()
+        if startup.done() and not startup.cancelled() and startup.exception():
+            raise startup.exception()
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        FirebaseManager().flush_orders()
+        await BinanceManager().close()
+        if trader.state_store:
+            trader.state_store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+import websockets
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PriceSnapshot:
+    """
+    Latest prices of all tracked symbols, shared by every caller within a trading cycle.
+
+    All tracked symbols are refreshed with one bulk ticker request. A price is served from the
+    snapshot as long as it is younger than max_staleness seconds, so repeated lookups of the same
+    pair in one cycle do not hit the REST API again.
+    """
+
+    def __init__(self, fetch_ticker: Callable[..., Awaitable], max_staleness: float = PRICE_MAX_STALENESS):
+        self.fetch_ticker = fetch_ticker
+        self.max_staleness = max_staleness
+        self.symbols = set()
+        self.prices: Dict[str, float] = {}
+        self.updated_at: Dict[str, float] = {}
+        self.lock = asyncio.Lock()
+
+    def track(self, symbols: Iterable[str]):
+        self.symbols.update(symbols)
+
+    def is_fresh(self, symbol: str) -> bool:
+        return symbol in self.prices and (time.time() - self.updated_at[symbol]) < self.max_staleness
+
+    def update(self, symbol: str, price: float, timestamp: Optional[float] = None):
+        """Stores a price pushed from outside the REST path, e.g. a market data stream."""
+        self.prices[symbol] = price
+        self.updated_at[symbol] = timestamp or time.time()
+
+    async def refresh(self):
+        """Fetches the prices of all tracked symbols with one bulk ticker request."""
+        if not self.symbols:
+            return
+
+        symbols = sorted(self.symbols)
+        tickers = await self.fetch_ticker(symbols=json.dumps(symbols, separators=(",", ":")))
+
+        now = time.time()
+        for ticker in tickers:
+            self.update(ticker[SYMBOL], float(ticker[PRICE]), now)
+
+        logger.debug(f"Price snapshot refreshed for {len(tickers)} symbols.")
+
+    async def get(self, symbol: str) -> float:
+        """
+        Returns the price of the symbol, refreshing the snapshot if the price is stale.
+
+        Symbols seen for the first time are fetched on their own and only then added to the bulk
+        refresh, so one invalid symbol cannot break the bulk request for all the others.
+
+        Args:
+            symbol (str): The trading pair symbol, e.g., 'BTCUSDT'.
+
+        Returns:
+            float: The latest known price of the symbol.
+        """
+        if self.is_fresh(symbol):
+            return self.prices[symbol]
+
+        async with self.lock:
+            if self.is_fresh(symbol):
+                return self.prices[symbol]
+
+            if symbol in self.symbols:
+                await self.refresh()
+            else:
+                ticker = await self.fetch_ticker(symbol=symbol)
+                self.update(symbol, float(ticker[PRICE]))
+                self.symbols.add(symbol)
+
+        return self.prices[symbol]
+
+
+class MarketDataStream:
+    """
+    Multiplexed bookTicker/miniTicker websocket stream feeding the shared PriceSnapshot.
+
+    Besides keeping the latest price of every streamed pair, the stream holds one-shot price
+    triggers: a trigger registered for a key (e.g. a (pair, strategy) tuple) calls on_trigger(key)
+    once the pair's price leaves the [low, high] band, which lets the trader sleep while the price
+    has not moved far enough to matter for the current state. A trigger without a band fires on
+    the next price of the pair.
+    """
+
+    def __init__(self, snapshot: PriceSnapshot, symbols: Iterable[str], on_trigger: Callable[[Hashable], None], url: str = MARKET_DATA_STREAM_URL, stream_type: str = BOOK_TICKER_STREAM):
+        self.snapshot = snapshot
+        self.on_trigger = on_trigger
+        self.symbols = sorted(set(symbols))
+        self.url = url
+        self.stream_type = stream_type
+        self.connected = False
+        self.running = False
+        self.websocket = None
+        self.triggers: Dict[str, Dict[Hashable, Tuple[Optional[float], Optional[float]]]] = {}
+        self.trigger_symbols: Dict[Hashable, str] = {}
+
+    def stream_url(self) -> str:
+        streams = "/".join(f"{symbol.lower()}@{self.stream_type}" for symbol in self.symbols)
+        return f"{self.url}?streams={streams}"
+
+    def set_symbols(self, symbols: Iterable[str]):
+        """Changes the streamed symbols, reconnecting the stream if they changed."""
+        symbols = sorted(set(symbols))
+        if symbols == self.symbols:
+            return
+
+        self.symbols = symbols
+        if self.websocket:
+            asyncio.ensure_future(self.websocket.close())
+
+    def watch(self, key: Hashable, symbol: str, low: Optional[float] = None, high: Optional[float] = None):
+        """
+        Registers a price trigger for the key, replacing the previous one.
+
+        Args:
+            key (Hashable): Identifier of the watcher, e.g. (pair, strategy name).
+            symbol (str): The trading pair symbol, e.g., 'BTCUSDT'.
+            low (float): Fire when the price drops to or below this value.
+            high (float): Fire when the price rises to or above this value.
+                Without low and high, fire on the next price.
+        """
+        self.unwatch(key)
+        self.triggers.setdefault(symbol, {})[key] = (low, high)
+        self.trigger_symbols[key] = symbol
+
+    def unwatch(self, key: Hashable):
+        symbol = self.trigger_symbols.pop(key, None)
+        if symbol is not None:
+            self.triggers[symbol].pop(key, None)
+
+    def handle_message(self, message: str):
+        payload = json.loads(message)
+        data = payload.get("data", payload)
+
+        symbol = data.get("s")
+        if not symbol:
+            return
+
+        if self.stream_type == BOOK_TICKER_STREAM:
+            price = (float(data["b"]) + float(data["a"])) / 2
+        else:
+            price = float(data["c"])
+
+        self.snapshot.update(symbol, price)
+
+        fired = [
+            key for key, (low, high) in self.triggers.get(symbol, {}).items()
+            if (low is None and high is None) or (low is not None and price <= low) or (high is not None and price >= high)
+        ]
+
+        for key in fired:
+            logger.debug("Price trigger %s fired for %s at %s.", key, symbol, price, extra={"pair": symbol})
+            self.unwatch(key)
+            self.on_trigger(key)
+
+    async def run(self):
+        """Keeps the stream connected, reconnecting with exponential backoff."""
+        self.running = True
+        backoff = STREAM_RECONNECT_MIN_DELAY
+
+        while self.running:
+            try:
+                async with websockets.connect(self.stream_url()) as websocket:
+                    self.websocket = websocket
+                    self.connected = True
+                    backoff = STREAM_RECONNECT_MIN_DELAY
+                    logger.info(f"Market data stream connected for {len(self.symbols)} symbols.")
+
+                    async for message in websocket:
+                        self.handle_message(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Market data stream disconnected: {e}. Reconnecting in {backoff}s.")
+            finally:
+                self.websocket = None
+                self.connected = False
+
+            if self.running:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, STREAM_RECONNECT_MAX_DELAY)
+
+    def stop(self):
+        self.running = False
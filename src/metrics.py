@@ -0,0 +1,107 @@
+import asyncio
+from collections import deque
+from functools import partial
+from statistics import mean
+from typing import Callable, List
+import psutil
+from firebase import FirebaseManager
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SystemMetricsSampler:
+    """
+    Background sampler keeping rolling CPU, memory and event-loop-lag series.
+
+    CPU usage is read with a non-blocking psutil call (usage since the previous sample) and the
+    loop lag is how late the sampler's own sleep wakes up, so sampling never stalls the loop.
+    """
+
+    def __init__(self, interval: float = METRICS_SAMPLE_INTERVAL, window: int = METRICS_WINDOW):
+        self.interval = interval
+        self.cpu = deque(maxlen=window)
+        self.memory = deque(maxlen=window)
+        self.loop_lag = deque(maxlen=window)
+
+    def sample(self):
+        self.cpu.append(psutil.cpu_percent(percpu=True, interval=None))
+        self.memory.append(psutil.virtual_memory().used / (1024 ** 2))
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        psutil.cpu_percent(percpu=True, interval=None)
+
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.loop_lag.append(max(0.0, loop.time() - expected))
+            self.sample()
+
+    def snapshot(self) -> dict:
+        if not self.cpu:
+            self.sample()
+
+        return {
+            "cpu_per_core": self.cpu[-1],
+            "cpu_avg": mean(mean(sample) for sample in self.cpu if sample) if any(self.cpu) else 0.0,
+            "memory_usage": self.memory[-1],
+            "loop_lag_avg": mean(self.loop_lag) if self.loop_lag else 0.0,
+            "loop_lag_max": max(self.loop_lag, default=0.0),
+        }
+
+
+class HeartbeatPublisher:
+    """
+    Publishes the heartbeat on its own cadence.
+
+    Metrics and the profit aggregate are snapshotted on the event loop from the sampler, the
+    registered sources and the FirebaseManager, while the blocking Firebase write runs in a worker
+    thread on that plain data, so publishing never blocks trading nor races with it.
+    """
+
+    def __init__(self, version: str, sampler: SystemMetricsSampler, interval: float = HEARTBEAT_INTERVAL):
+        self.version = version
+        self.sampler = sampler
+        self.interval = interval
+        self.sources: List[Callable[[], dict]] = []
+
+    def add_source(self, source: Callable[[], dict]):
+        self.sources.append(source)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+
+            metrics = {}
+            for source in self.sources:
+                metrics.update(source())
+            logger.debug(f"Heartbeat metrics: {metrics}")
+            await publish_heartbeat(self.version, metrics, self.sampler.snapshot())
+
+
+async def publish_heartbeat(version: str, metrics: dict, system_metrics: dict, status: str = HEARTBEAT_OK):
+    """
+    Sends the heartbeat and the changed profit aggregate from a worker thread. The aggregate is
+    snapshotted here, on the event loop, and marked as changed again if it could not be written.
+    """
+    manager = FirebaseManager()
+    profit, profit_changed = manager.snapshot_profit()
+
+    try:
+        profit_written = await asyncio.get_running_loop().run_in_executor(None, partial(
+            manager.send_heartbeat,
+            version=version,
+            profit=profit,
+            status=status,
+            metrics=metrics,
+            system_metrics=system_metrics,
+            profit_changed=profit_changed,
+        ))
+    except Exception as e:
+        logger.exception(f"Failed to send heartbeat: {e}")
+        profit_written = not profit_changed
+
+    if not profit_written:
+        manager.profit.dirty = True
@@ -1,6 +1,11 @@
-from dataclasses import dataclass
-from typing import Dict
-from logger import logger, logging
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+from logger import get_logger, logging
+
+logger = get_logger(__name__)
+
 
 @dataclass
 class Config:
@@ -21,7 +26,7 @@ class Config:
             self._logging_level = value
             logger.debug(f"Logging level set to {logging.getLevelName(value)}")
 
-@dataclass
+@dataclass(frozen=True)
 class TradeStrategy:
     name: str
     buy_increase_indicator: float
@@ -34,17 +39,6 @@ class TradeStrategy:
 class PowerStatus:
     power_status = False
 
-@dataclass
-class Pairs:
-    pairs = {
-    "BTCUSDC"  : { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
-    "ETHUSDC"  : { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
-    "LTCUSDC"  : { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
-    "WBETHUSDT": { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
-    "SHIBUSDT" : { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
-    "XLMUSDT"  : { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
-}
-
 @dataclass
 class Monitoring:
     show_buy_orders = False
@@ -55,9 +49,116 @@ class Update:
     version = None
 
 
-class Strategies:
-    strategies: Dict[str, TradeStrategy]  = {
+DEFAULT_PAIRS = {
+    "BTCUSDC"  : { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
+    "ETHUSDC"  : { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
+    "LTCUSDC"  : { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
+    "WBETHUSDT": { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
+    "SHIBUSDT" : { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
+    "XLMUSDT"  : { "strategy_allocation": { "crazy_girl": 1, "poor_orphan": 0, "sensible_guy": 0 }, "trading_percentage": 1 },
+}
+
+DEFAULT_STRATEGIES = {
     "crazy_girl": TradeStrategy(name="crazy_girl", buy_increase_indicator=0.001, profit_target=0.996, timeout=1000, cooldown=1000, multiplier=1.05),
     "poor_orphan": TradeStrategy(name="poor_orphan", buy_increase_indicator=0.001, profit_target=0.996, timeout=1000, cooldown=1000, multiplier=1.05),
     "sensible_guy": TradeStrategy(name="sensible_guy", buy_increase_indicator=0.001, profit_target=0.996, timeout=1000, cooldown=1000, multiplier=1.05),
-}
\ No newline at end of file
+}
+
+
+def freeze(value: Any) -> Any:
+    """Returns value with every dict, nested ones included, replaced by a read-only view of a copy."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    return value
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    One immutable version of the strategies and pairs config.
+
+    allocations holds the strategy allocation of every (pair, strategy) as a float, computed once
+    when the snapshot is published instead of on every evaluation.
+    """
+    version: int
+    strategies: Mapping[str, TradeStrategy]
+    pairs: Mapping[str, Mapping[str, Any]]
+    allocations: Mapping[Tuple[str, str], float] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, version: int, strategies: Mapping[str, TradeStrategy], pairs: Mapping[str, Mapping[str, Any]]) -> "ConfigSnapshot":
+        allocations = {}
+        for pair_name, pair in pairs.items():
+            for strategy_name, allocation in (pair.get("strategy_allocation") or {}).items():
+                try:
+                    allocations[(pair_name, strategy_name)] = float(allocation)
+                except (TypeError, ValueError):
+                    logger.error(f"Invalid allocation {allocation!r} of {strategy_name} on {pair_name}, using 0.")
+                    allocations[(pair_name, strategy_name)] = 0.0
+
+        return cls(version=version, strategies=freeze(strategies), pairs=freeze(pairs), allocations=MappingProxyType(allocations))
+
+    def allocation(self, pair_name: str, strategy_name: str) -> float:
+        return self.allocations.get((pair_name, strategy_name), 0.0)
+
+
+class ConfigStore:
+    """
+    Holder of the current ConfigSnapshot.
+
+    Readers take snapshot once and use it for a whole evaluation, without locking: a snapshot never
+    changes. Writers, such as the Firebase listeners, publish a new version, which replaces the
+    reference in one assignment. A writer that derives the new config from the current one holds
+    lock around reading and publishing, so concurrent writers cannot lose each other's changes.
+    """
+
+    def __init__(self, strategies: Mapping[str, TradeStrategy], pairs: Mapping[str, Mapping[str, Any]]):
+        self.lock = threading.RLock()
+        self.snapshot = ConfigSnapshot.build(0, strategies, pairs)
+
+    def publish(self, strategies: Optional[Mapping[str, TradeStrategy]] = None,
+                pairs: Optional[Mapping[str, Mapping[str, Any]]] = None) -> ConfigSnapshot:
+        """
+        Publishes a new version with the given strategies and/or pairs, keeping the current value of the other.
+
+        Returns:
+            ConfigSnapshot: The published snapshot.
+        """
+        with self.lock:
+            current = self.snapshot
+            self.snapshot = ConfigSnapshot.build(
+                current.version + 1,
+                current.strategies if strategies is None else strategies,
+                current.pairs if pairs is None else pairs,
+            )
+            return self.snapshot
+
+
+class Strategies:
+    """The strategies of the current config snapshot; assigning strategies publishes a new snapshot."""
+
+    def __init__(self, store: ConfigStore):
+        self.store = store
+
+    @property
+    def strategies(self) -> Mapping[str, TradeStrategy]:
+        return self.store.snapshot.strategies
+
+    @strategies.setter
+    def strategies(self, strategies: Dict[str, TradeStrategy]):
+        self.store.publish(strategies=strategies)
+
+
+class Pairs:
+    """The pairs of the current config snapshot; assigning pairs publishes a new snapshot."""
+
+    def __init__(self, store: ConfigStore):
+        self.store = store
+
+    @property
+    def pairs(self) -> Mapping[str, Mapping[str, Any]]:
+        return self.store.snapshot.pairs
+
+    @pairs.setter
+    def pairs(self, pairs: Dict[str, dict]):
+        self.store.publish(pairs=pairs)
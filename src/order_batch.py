@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from data_classes import CryptoPair
+from globals import *
+
+
+@dataclass
+class OrderRequest:
+    """One order placement or cancellation of an OrderBatch. A placement with replaces set takes the place of that cancellation's order."""
+    action: str
+    cryptoPair: CryptoPair
+    side: Optional[str] = None
+    quantity: Optional[float] = None
+    price: Optional[float] = None
+    order_id: Optional[int] = None
+    strategy: Optional[str] = None
+    replaces: Optional["OrderRequest"] = None
+
+    @property
+    def symbol(self) -> str:
+        return self.cryptoPair.pair
+
+
+@dataclass
+class OrderOutcome:
+    """
+    Result of one OrderRequest.
+
+    status is the status of the order once the request completed: the status of the new order for a
+    placement, CANCELED for a cancellation, or FILLED when the order to cancel was filled first.
+    error says why the request did not do what it asked, and is None when it did.
+    """
+    request: OrderRequest
+    status: Optional[str] = None
+    order: Optional[dict] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class OrderBatch:
+    """
+    Order placements and cancellations to send together (see BinanceManager.submit_batch).
+
+    The requests are grouped per symbol: a cancellation and the placement replacing it go out as one
+    cancel-replace request, the symbols marked with cancel_all are cleared with one cancel-all request
+    before their placements, and everything else is sent concurrently.
+    """
+
+    def __init__(self):
+        self.requests: List[OrderRequest] = []
+        self.cancel_all_pairs: Dict[str, CryptoPair] = {}
+
+    def place(self, cryptoPair: CryptoPair, side: str, quantity: float, price: float, strategy: Optional[str] = None) -> OrderRequest:
+        request = OrderRequest(ORDER_ACTION_PLACE, cryptoPair, side=side, quantity=quantity, price=price, strategy=strategy)
+        self.requests.append(request)
+        return request
+
+    def cancel(self, cryptoPair: CryptoPair, order_id: int, strategy: Optional[str] = None) -> OrderRequest:
+        request = OrderRequest(ORDER_ACTION_CANCEL, cryptoPair, order_id=order_id, strategy=strategy)
+        self.requests.append(request)
+        return request
+
+    def replace(self, cryptoPair: CryptoPair, order_id: int, side: str, quantity: float, price: float, strategy: Optional[str] = None) -> OrderRequest:
+        """
+        Cancels order_id and places a new order in its place. The new order is not placed if the cancellation fails.
+
+        Returns:
+            OrderRequest: The placement; its replaces attribute is the cancellation.
+        """
+        cancel = self.cancel(cryptoPair, order_id, strategy)
+        placement = self.place(cryptoPair, side, quantity, price, strategy)
+        placement.replaces = cancel
+        return placement
+
+    def cancel_all(self, cryptoPair: CryptoPair):
+        """Cancels every open order of the pair, those of every strategy and those placed by hand included."""
+        self.cancel_all_pairs[cryptoPair.pair] = cryptoPair
+
+    def by_symbol(self) -> Dict[str, List[OrderRequest]]:
+        groups = {symbol: [] for symbol in self.cancel_all_pairs}
+        for request in self.requests:
+            groups.setdefault(request.symbol, []).append(request)
+        return groups
+
+    def __len__(self):
+        return len(self.requests)
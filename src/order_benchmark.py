@@ -0,0 +1,394 @@
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from statistics import mean
+from typing import Dict, List, Optional
+from globals import *
+from logger import logger
+from binance.client import Client
+from load_test import percentile
+from order_format import OrderFormatter
+from data_classes import Order, OrderHistory
+
+# Value of every benchmark order in the quote asset, well above the simulator's min_notional
+ORDER_VALUE = 10.0
+SIGNING_SAMPLES = 20000
+
+# History sizes of the order history benchmark, and the share of its orders still open
+HISTORY_SIZES = [25, 1000, 100000]
+HISTORY_OPEN_SHARE = 0.1
+HISTORY_OPERATIONS = 1000
+
+TESTS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests")
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {"count": len(samples), "mean": mean(samples) if samples else 0.0, 0.5: percentile(samples, 0.5), 0.9: percentile(samples, 0.9)}
+
+
+async def run_benchmark(orders: int, symbols: int, cancels: int, latency: float, jitter: float, port: int = SIMULATOR_PORT, seed: int = 0) -> dict:
+    """
+    Measures the order requests of the SELLING timeout path and of bulk cancellations against a local MockBinanceServer.
+
+    The prices of the simulated market do not move, so no benchmark order fills.
+
+    Args:
+        orders (int): Expired sell orders to replace with each method.
+        symbols (int): Symbols the orders are spread over.
+        cancels (int): Open orders cancelled at once with each bulk method.
+        latency (float): Simulated latency of every request in seconds.
+
+    Returns:
+        dict: Time per operation of each method.
+    """
+    from exchange_simulator import MockBinanceServer, SimulatedMarket, make_symbols
+
+    market = SimulatedMarket(make_symbols(symbols, seed=seed), volatility=0.0, seed=seed)
+    server = MockBinanceServer(market, port=port, latency=latency, jitter=jitter, seed=seed)
+    await server.start()
+
+    # BinanceManager reads its endpoint, keys and local state paths once, on first construction
+    state_directory = tempfile.mkdtemp()
+    os.environ[BINANCE_API_URL] = f"http://{server.host}:{server.port}/api"
+    os.environ[EXCHANGE_INFO_SNAPSHOT_PATH] = os.path.join(state_directory, DEFAULT_EXCHANGE_INFO_SNAPSHOT)
+    os.environ[ORDER_HISTORY_PATH] = os.path.join(state_directory, DEFAULT_ORDER_HISTORY_DIR)
+    os.environ.setdefault(BINANCE_API_KEY, "simulator")
+    os.environ.setdefault(BINANCE_SECRET_KEY, "simulator")
+
+    from binance_api import BinanceManager
+    from data_classes import CryptoPair
+    from order_batch import OrderBatch
+
+    manager = BinanceManager()
+    await manager.start()
+
+    cryptoPairs = [
+        CryptoPair(pair=symbol, value=0.0, crypto_amount_free=0.0, crypto_amount_locked=0.0,
+                   min_notional=market.min_notional, tick_size=market.tick_size, step_size=market.step_size)
+        for symbol in market.prices
+    ]
+
+    async def place(cryptoPair: CryptoPair, markup: float) -> dict:
+        price = market.prices[cryptoPair.pair] * markup
+        return await manager.limit_order(cryptoPair, ORDER_VALUE / price, price, SELL)
+
+    try:
+        sequential, replaced = [], []
+        for index in range(orders):
+            cryptoPair = cryptoPairs[index % len(cryptoPairs)]
+
+            # Before cancel-replace, the timeout path cancelled the expired order, then placed the new one
+            expired = await place(cryptoPair, 1.5)
+            started = time.perf_counter()
+            if await manager.cancel_order(cryptoPair.pair, expired[ORDER_ID]):
+                await place(cryptoPair, 1.4)
+            sequential.append(time.perf_counter() - started)
+
+            expired = await place(cryptoPair, 1.5)
+            batch = OrderBatch()
+            batch.replace(cryptoPair, expired[ORDER_ID], SELL, ORDER_VALUE / (market.prices[cryptoPair.pair] * 1.4), market.prices[cryptoPair.pair] * 1.4)
+            started = time.perf_counter()
+            await manager.submit_batch(batch)
+            replaced.append(time.perf_counter() - started)
+
+        cleanup = OrderBatch()
+        for cryptoPair in cryptoPairs:
+            cleanup.cancel_all(cryptoPair)
+        await manager.submit_batch(cleanup)
+
+        cryptoPair = cryptoPairs[0]
+        bulk = {"sequential cancels": [], "batch of cancels": [], "cancel-all": []}
+        for method, samples in bulk.items():
+            for _ in range(3):
+                open_orders = [await place(cryptoPair, 1.5) for _ in range(cancels)]
+                started = time.perf_counter()
+                if method == "sequential cancels":
+                    for order in open_orders:
+                        await manager.cancel_order(cryptoPair.pair, order[ORDER_ID])
+                else:
+                    batch = OrderBatch()
+                    if method == "cancel-all":
+                        batch.cancel_all(cryptoPair)
+                    else:
+                        for order in open_orders:
+                            batch.cancel(cryptoPair, order[ORDER_ID])
+                    await manager.submit_batch(batch)
+                samples.append(time.perf_counter() - started)
+    finally:
+        await manager.close()
+        await server.stop()
+
+    return {
+        "latency": latency,
+        "timeout_path": {"cancel, then place": summarize(sequential), "cancel-replace": summarize(replaced)},
+        "cancels": cancels,
+        "bulk_cancel": {method: summarize(samples) for method, samples in bulk.items()},
+        "server": server.report(),
+    }
+
+
+async def run_order_path_benchmark(orders: int, idle: float, latency: float, connect_latency: float, keepalive_timeout: float,
+                                   sync_interval: float, port: int = SIMULATOR_PORT, seed: int = 0) -> dict:
+    """
+    Measures the tick-to-order latency of sell orders placed after idle seconds without requests, against a
+    local MockBinanceServer that closes connections idle for keepalive_timeout seconds and checks the signatures.
+
+    The orders are placed once through python-binance without the server clock, so every order opens a new
+    connection, and once through the OrderPath with the server clock syncing every sync_interval seconds,
+    which keeps the connection open.
+
+    Returns:
+        dict: Tick-to-order latency and connections opened per method, and the time to build and sign an order payload.
+    """
+    from exchange_simulator import MockBinanceServer, SimulatedMarket, make_symbols
+
+    os.environ.setdefault(BINANCE_API_KEY, "simulator")
+    os.environ.setdefault(BINANCE_SECRET_KEY, "simulator")
+
+    market = SimulatedMarket(make_symbols(1, seed=seed), volatility=0.0, seed=seed)
+    server = MockBinanceServer(market, port=port, latency=latency, seed=seed, secret=os.environ[BINANCE_SECRET_KEY],
+                               connect_latency=connect_latency, keepalive_timeout=keepalive_timeout)
+    await server.start()
+
+    state_directory = tempfile.mkdtemp()
+    os.environ[BINANCE_API_URL] = f"http://{server.host}:{server.port}/api"
+    os.environ[EXCHANGE_INFO_SNAPSHOT_PATH] = os.path.join(state_directory, DEFAULT_EXCHANGE_INFO_SNAPSHOT)
+    os.environ[ORDER_HISTORY_PATH] = os.path.join(state_directory, DEFAULT_ORDER_HISTORY_DIR)
+
+    from binance_api import BinanceManager
+    from data_classes import CryptoPair
+    from order_batch import OrderBatch
+
+    manager = BinanceManager()
+    manager.server_clock.interval = sync_interval
+    await manager.start()
+    order_path = manager.order_path
+
+    symbol, price = next(iter(market.prices.items()))
+    cryptoPair = CryptoPair(pair=symbol, value=0.0, crypto_amount_free=0.0, crypto_amount_locked=0.0,
+                            min_notional=market.min_notional, tick_size=market.tick_size, step_size=market.step_size)
+    manager.prepare_orders(cryptoPair)
+
+    results = {}
+    try:
+        for method in ("python-binance, local clock", "order path, server clock"):
+            if order_path is None or method.startswith("order path"):
+                manager.order_path = order_path
+                if not manager.clock_task:
+                    await manager.start_server_clock()
+            else:
+                manager.order_path = None
+                manager.clock_task.cancel()
+                manager.clock_task = None
+                manager.apply_clock_offset(0.0)
+
+            connections = server.stats["connections"]
+            manager.order_latency.snapshot(reset=True)
+            for _ in range(orders):
+                await asyncio.sleep(idle)
+                manager.price_snapshot.update(symbol, price)
+                await manager.limit_order(cryptoPair, ORDER_VALUE / (price * 1.5), price * 1.5, SELL, tick_at=manager.price_received_at(symbol))
+
+            results[method] = {"connections": server.stats["connections"] - connections, **manager.order_latency.merged("tick_to_order").snapshot()}
+
+        cleanup = OrderBatch()
+        cleanup.cancel_all(cryptoPair)
+        await manager.submit_batch(cleanup)
+
+        params = {"symbol": symbol, "side": SELL, "type": Client.ORDER_TYPE_LIMIT, "timeInForce": Client.TIME_IN_FORCE_GTC, "quantity": "0.0788", "price": "126.8967"}
+        signing = {}
+        if order_path:
+            started = time.perf_counter()
+            for _ in range(SIGNING_SAMPLES):
+                order_path.client._get_request_kwargs("post", True, data=dict(params))
+            signing["python-binance"] = (time.perf_counter() - started) / SIGNING_SAMPLES
+            started = time.perf_counter()
+            for _ in range(SIGNING_SAMPLES):
+                order_path.payload(**params)
+            signing["order path"] = (time.perf_counter() - started) / SIGNING_SAMPLES
+    finally:
+        await manager.close()
+        await server.stop()
+
+    return {"idle": idle, "connect_latency": connect_latency, "latency": latency, "methods": results,
+            "signing": signing, "rejected": server.stats.get("POST order", 0) - market.stats.get("orders_created", 0)}
+
+
+def print_order_path_results(report: dict):
+    print(f"Sell orders after {report['idle']:.2f} s idle, request latency {report['latency'] * 1000:.1f} ms, "
+          f"connection setup {report['connect_latency'] * 1000:.1f} ms, {report['rejected']} rejected")
+    print(f"{'Tick to order':<34}{'count':>7}{'conns':>7}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for method, stats in report["methods"].items():
+        print(f"  {method:<32}{stats['count']:>7}{stats['connections']:>7}{stats['mean_ms']:>10.2f}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+    for method, seconds in report["signing"].items():
+        print(f"  {'build and sign, ' + method:<46}{seconds * 1e6:>10.2f} us/order")
+
+
+def benchmark_formatter(samples: int, seed: int = 0) -> dict:
+    """
+    Times the formatting of random orders with the former Decimal rounding and with OrderFormatter.
+    The orders and the Decimal reference are those of tests/test_order_format.py, which checks that
+    both give the same results.
+
+    Returns:
+        dict: The time per order of each method.
+    """
+    sys.path.insert(0, TESTS_DIRECTORY)
+    from test_order_format import decimal_format_order, formatter_cases, formatter_format_order
+
+    cases = formatter_cases(samples, seed)
+    formatters = {filters: OrderFormatter("BENCHMARK", *filters) for filters in {filters for filters, _, _ in cases}}
+
+    started = time.perf_counter()
+    expected = [decimal_format_order(*filters, quantity, price) for filters, quantity, price in cases]
+    decimal_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for filters, quantity, price in cases:
+        formatter_format_order(formatters[filters], quantity, price)
+    formatter_time = time.perf_counter() - started
+
+    return {
+        "samples": samples,
+        "rejected": sum(result is None for result in expected),
+        "decimal_us": decimal_time / samples * 1e6,
+        "formatter_us": formatter_time / samples * 1e6,
+    }
+
+
+def print_formatter_results(report: dict):
+    print(f"Formatted {report['samples']} random orders ({report['rejected']} rejected by min_notional or max_qty)")
+    print(f"  {'Decimal':<32}{report['decimal_us']:>10.2f} us/order")
+    print(f"  {'OrderFormatter':<32}{report['formatter_us']:>10.2f} us/order")
+
+
+class ListOrderHistory:
+    """The list CryptoPair kept its orders in before OrderHistory, kept as the baseline of the history benchmark."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.orders: List[Order] = []
+
+    def append(self, order: Order):
+        self.orders.append(order)
+        if len(self.orders) > self.capacity:
+            self.orders.pop(0)
+
+    def set_status(self, order_id: str, status: str) -> Optional[Order]:
+        for order in self.orders:
+            if order.order_id == order_id:
+                order.status = status
+                return order
+        return None
+
+    def open_orders(self) -> List[Order]:
+        return [order for order in self.orders if order.status not in TERMINAL_ORDER_STATUSES]
+
+
+def history_order(order_id: int, status: str) -> Order:
+    return Order("BENCHMARK", str(order_id), BUY, 1.0, 0.0, 1.0, 0, "benchmark", status, 0.0)
+
+
+def benchmark_history(sizes: List[int] = HISTORY_SIZES, operations: int = HISTORY_OPERATIONS, seed: int = 0) -> dict:
+    """
+    Times append (with eviction), set_status and the open orders scan of the monitoring cycle on a
+    full history of every size, with the list baseline and with OrderHistory.
+
+    Returns:
+        dict: The time per operation in microseconds of every size, method and operation.
+    """
+    generator = random.Random(seed)
+    report = {}
+    for size in sizes:
+        statuses = [NEW if generator.random() < HISTORY_OPEN_SHARE else FILLED for _ in range(size + operations)]
+        lookups = [str(generator.randrange(operations, size + operations)) for _ in range(operations)]
+        report[size] = {}
+        for method, history in (("list", ListOrderHistory(size)), ("OrderHistory", OrderHistory(size))):
+            for order_id in range(size):
+                history.append(history_order(order_id, statuses[order_id]))
+
+            started = time.perf_counter()
+            for order_id in range(size, size + operations):
+                history.append(history_order(order_id, statuses[order_id]))
+            append_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for order_id in lookups:
+                history.set_status(order_id, FILLED)
+            set_status_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for _ in range(operations):
+                history.open_orders()
+            open_orders_time = time.perf_counter() - started
+
+            report[size][method] = {
+                "append": append_time / operations * 1e6,
+                "set_status": set_status_time / operations * 1e6,
+                "open_orders": open_orders_time / operations * 1e6,
+            }
+    return report
+
+
+def print_history_results(report: dict):
+    print(f"{'Order history':<32}{'append us':>12}{'set_status us':>15}{'open_orders us':>16}")
+    for size, methods in report.items():
+        for method, stats in methods.items():
+            print(f"  {method + ', ' + str(size) + ' orders':<30}{stats['append']:>12.2f}{stats['set_status']:>15.2f}{stats['open_orders']:>16.2f}")
+
+
+def print_results(report: dict):
+    print(f"Simulated request latency: {report['latency'] * 1000:.1f} ms")
+    print(f"{'SELLING timeout path':<34}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}")
+    for method, stats in report["timeout_path"].items():
+        print(f"  {method:<32}{stats['count']:>7}{stats['mean'] * 1000:>10.2f}{stats[0.5] * 1000:>10.2f}{stats[0.9] * 1000:>10.2f}")
+    print(f"{'Cancel ' + str(report['cancels']) + ' open orders':<34}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}")
+    for method, stats in report["bulk_cancel"].items():
+        print(f"  {method:<32}{stats['count']:>7}{stats['mean'] * 1000:>10.2f}{stats[0.5] * 1000:>10.2f}{stats[0.9] * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the order requests of the SELLING timeout path and of bulk cancellations against the local Binance simulator.")
+    parser.add_argument("--orders", type=int, default=50, help="Expired sell orders to replace with each method.")
+    parser.add_argument("--symbols", type=int, default=5)
+    parser.add_argument("--cancels", type=int, default=20, help="Open orders cancelled at once with each bulk method.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated latency of every request in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random latency added on top, in seconds.")
+    parser.add_argument("--port", type=int, default=SIMULATOR_PORT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--formatter", type=int, metavar="SAMPLES", help="Instead, time the order formatting on this many random orders, without the simulator.")
+    parser.add_argument("--history", action="store_true", help="Instead, time the order history operations at 25, 1,000 and 100,000 orders, without the simulator.")
+    parser.add_argument("--order-path", action="store_true", help="Instead, measure the tick-to-order latency of orders placed after idle periods.")
+    parser.add_argument("--idle", type=float, default=0.5, help="Seconds without requests before every --order-path order.")
+    parser.add_argument("--connect-latency", type=float, default=0.03, help="Simulated connection setup time of --order-path, in seconds.")
+    parser.add_argument("--keepalive-timeout", type=float, default=0.25, help="Seconds after which the simulator closes an idle connection in --order-path.")
+    parser.add_argument("--sync-interval", type=float, default=0.1, help="Server clock sync interval of --order-path, in seconds.")
+    args = parser.parse_args()
+
+    if args.formatter:
+        print_formatter_results(benchmark_formatter(args.formatter, args.seed))
+        raise SystemExit(0)
+
+    if args.history:
+        print_history_results(benchmark_history(seed=args.seed))
+        raise SystemExit(0)
+
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        if args.order_path:
+            report = asyncio.run(run_order_path_benchmark(args.orders, args.idle, args.latency, args.connect_latency, args.keepalive_timeout,
+                                                          args.sync_interval, args.port, args.seed))
+        else:
+            report = asyncio.run(run_benchmark(args.orders, args.symbols, args.cancels, args.latency, args.jitter, args.port, args.seed))
+    finally:
+        logger.setLevel(level)
+
+    if args.order_path:
+        print_order_path_results(report)
+    else:
+        print_results(report)
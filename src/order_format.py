@@ -0,0 +1,90 @@
+from decimal import Decimal
+from typing import Tuple, Union
+from data_classes import CryptoPair
+
+Number = Union[float, int, Decimal]
+
+
+def decimal_places(size: float) -> int:
+    """Decimal places of a tick or step size as written by str(), e.g. 2 for 0.01 and 1 for 1.0."""
+    return abs(Decimal(str(size)).as_tuple().exponent)
+
+
+def exact_ratio(value: Union[Number, str]) -> Tuple[int, int]:
+    """Exact (numerator, denominator) of a number, with the binary value of a float rather than its shortest repr."""
+    if isinstance(value, str):
+        value = Decimal(value)
+    return value.as_integer_ratio()
+
+
+def truncate(value: Union[Number, str], scale: int) -> int:
+    """value * scale rounded toward zero, computed exactly."""
+    numerator, denominator = value.as_integer_ratio() if type(value) is float else exact_ratio(value)
+    if numerator < 0:
+        return -(-numerator * scale // denominator)
+    return numerator * scale // denominator
+
+
+class OrderFormatter:
+    """
+    Order formatting of one symbol, built once from its filters.
+
+    Prices and quantities are truncated to whole units of 10^-decimals of the tick and step sizes
+    with integer arithmetic on the exact value of the float, which rounds exactly like quantizing
+    Decimal(value) to the tick or step size with ROUND_DOWN. The min_notional and max_qty limits are
+    kept as integer ratios in the same units, so checking an order builds no Decimal.
+    """
+
+    def __init__(self, symbol: str, tick_size: float, step_size: float, min_notional: float, max_qty: float = 0.0):
+        self.symbol = symbol
+        self.key = (tick_size, step_size, min_notional)
+
+        self.price_precision = decimal_places(tick_size)
+        # A step size of 1 means whole units, formatted without a decimal point
+        self.quantity_precision = 0 if step_size == 1 else decimal_places(step_size)
+        self.price_scale = 10 ** self.price_precision
+        self.quantity_scale = 10 ** self.quantity_precision
+
+        # quantity_units * price_units < min_notional * quantity_scale * price_scale, as numerator / denominator
+        numerator, self.min_notional_denominator = exact_ratio(str(min_notional))
+        self.min_notional_numerator = numerator * self.quantity_scale * self.price_scale
+        self.min_notional = min_notional
+
+        numerator, self.max_qty_denominator = exact_ratio(str(max_qty))
+        self.max_qty_numerator = numerator * self.quantity_scale
+        self.max_qty = max_qty
+
+    @classmethod
+    def for_pair(cls, cryptoPair: CryptoPair, max_qty: float = 0.0) -> "OrderFormatter":
+        return cls(cryptoPair.pair, cryptoPair.tick_size, cryptoPair.step_size, cryptoPair.min_notional, max_qty)
+
+    def matches(self, cryptoPair: CryptoPair) -> bool:
+        return self.key == (cryptoPair.tick_size, cryptoPair.step_size, cryptoPair.min_notional)
+
+    @staticmethod
+    def format_units(units: int, precision: int, scale: int) -> str:
+        if not precision:
+            return str(units)
+        whole, fraction = divmod(abs(units), scale)
+        return f"{'-' if units < 0 else ''}{whole}.{fraction:0{precision}d}"
+
+    def price_units(self, price: Union[Number, str]) -> int:
+        return truncate(price, self.price_scale)
+
+    def quantity_units(self, quantity: Union[Number, str]) -> int:
+        return truncate(quantity, self.quantity_scale)
+
+    def format_price(self, price_units: int) -> str:
+        return self.format_units(price_units, self.price_precision, self.price_scale)
+
+    def format_quantity(self, quantity_units: int) -> str:
+        return self.format_units(quantity_units, self.quantity_precision, self.quantity_scale)
+
+    def format_notional(self, quantity_units: int, price_units: int) -> str:
+        return self.format_units(quantity_units * price_units, self.quantity_precision + self.price_precision, self.quantity_scale * self.price_scale)
+
+    def below_min_notional(self, quantity_units: int, price_units: int) -> bool:
+        return quantity_units * price_units * self.min_notional_denominator < self.min_notional_numerator
+
+    def above_max_qty(self, quantity_units: int) -> bool:
+        return self.max_qty_numerator > 0 and quantity_units * self.max_qty_denominator > self.max_qty_numerator
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+from collections import defaultdict
+from dataclasses import asdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from data_classes import OrderHistoryAggregate
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class OrderHistoryStore:
+    """
+    Incremental sync of the order history per symbol.
+
+    The aggregates and the order id cursor of every symbol are kept in a small JSON file in
+    directory, so a restart only fetches the orders placed since the previous sync, plus the ones
+    that were still open then. allOrders is paged with orderId, ORDER_HISTORY_PAGE_SIZE orders at
+    a time.
+    """
+
+    def __init__(self, fetch_orders: Callable[..., Awaitable[List[dict]]], directory: Optional[str] = None, page_size: int = ORDER_HISTORY_PAGE_SIZE):
+        self.fetch_orders = fetch_orders
+        self.directory = directory
+        self.page_size = page_size
+        self.histories: Dict[str, OrderHistoryAggregate] = {}
+        self.locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.directory, f"{symbol}.json")
+
+    def load(self, symbol: str) -> OrderHistoryAggregate:
+        if not self.directory or not os.path.exists(self.path(symbol)):
+            return OrderHistoryAggregate(symbol=symbol)
+
+        try:
+            with open(self.path(symbol), "r") as f:
+                return OrderHistoryAggregate(**json.load(f))
+        except Exception as e:
+            logger.warning(f"Failed to read order history of {symbol}, fetching it again: {e}")
+            return OrderHistoryAggregate(symbol=symbol)
+
+    def save(self, history: OrderHistoryAggregate):
+        if not self.directory:
+            return
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self.path(history.symbol) + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(asdict(history), f)
+            os.replace(tmp_path, self.path(history.symbol))
+        except Exception as e:
+            logger.warning(f"Failed to write order history of {history.symbol}: {e}")
+
+    async def sync(self, symbol: str) -> Tuple[OrderHistoryAggregate, List[dict]]:
+        """
+        Fetches the orders placed or still open since the previous sync and folds them into the history.
+
+        Args:
+            symbol (str): Trading pair, e.g. 'BTCUSDT'.
+
+        Returns:
+            tuple: (the updated history, the orders that are new or changed status)
+        """
+        async with self.locks[symbol]:
+            history = self.histories.get(symbol) or self.load(symbol)
+            from_id = history.fetch_from()
+            changed = []
+            pages = 0
+
+            while True:
+                orders = await self.fetch_orders(symbol=symbol, orderId=from_id, limit=self.page_size)
+                pages += 1
+                changed.extend(order for order in orders if history.apply(order))
+
+                if len(orders) < self.page_size:
+                    break
+                from_id = int(orders[-1][ORDER_ID]) + 1
+
+            self.histories[symbol] = history
+            self.save(history)
+
+            logger.debug(f"Order history of {symbol} synced in {pages} pages, {len(changed)} orders changed, next sync from order {history.fetch_from()}.")
+            return history, changed
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import hmac
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+from binance.client import Client
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+class ServerClock:
+    """
+    Offset between the exchange clock and the local clock, measured continuously.
+
+    Every sync reads the server time and takes the midpoint of the request as the local time it
+    corresponds to. Of the last samples, the one with the shortest round trip is the most accurate
+    and sets the offset. The syncs run every interval seconds, below the keep-alive timeout of the
+    HTTP pool, so they also keep the connection the next order will use open. request_sync runs one
+    right away, e.g. after the exchange rejected a timestamp.
+    """
+
+    def __init__(self, fetch_server_time: Callable[[], Awaitable[dict]], interval: float = CLOCK_SYNC_INTERVAL, samples: int = CLOCK_SYNC_SAMPLES):
+        self.fetch_server_time = fetch_server_time
+        self.interval = interval
+        self.samples: deque = deque(maxlen=samples)
+        self.offset_ms = 0.0
+        self.round_trip_ms = 0.0
+        self.synced_at = 0.0
+        self.wakeup = asyncio.Event()
+
+    def now_ms(self) -> int:
+        """Current time of the exchange clock in milliseconds."""
+        return int(time.time() * 1000 + self.offset_ms)
+
+    async def sync(self) -> float:
+        """
+        Measures the offset once.
+
+        Returns:
+            float: The offset in milliseconds, to add to the local time to get the server time.
+        """
+        sent_at = time.time()
+        response = await self.fetch_server_time()
+        received_at = time.time()
+
+        self.samples.append(((received_at - sent_at) * 1000, response[SERVER_TIME] - (sent_at + received_at) * 500))
+        self.round_trip_ms, self.offset_ms = min(self.samples)
+        self.synced_at = received_at
+        return self.offset_ms
+
+    def request_sync(self, reset: bool = False):
+        """Runs a sync right away. With reset, the earlier samples are discarded, e.g. after the local clock jumped."""
+        if reset:
+            self.samples.clear()
+        self.wakeup.set()
+
+    async def run(self, on_sync: Optional[Callable[[float], None]] = None):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            try:
+                offset = await self.sync()
+            except Exception as e:
+                logger.warning(f"Server time sync failed: {e}")
+                continue
+
+            logger.debug(f"Server clock offset {offset:.1f} ms (round trip {self.round_trip_ms:.1f} ms).")
+            if on_sync:
+                on_sync(offset)
+
+
+class OrderSigner:
+    """HMAC-SHA256 signer of request payloads. The key schedule is computed once, every signature starts from a copy of it."""
+
+    def __init__(self, secret_key: str):
+        self.mac = hmac.new(secret_key.encode(), digestmod=hashlib.sha256)
+
+    def sign(self, payload: str) -> str:
+        mac = self.mac.copy()
+        mac.update(payload.encode())
+        return mac.hexdigest()
+
+
+class OrderPath:
+    """
+    Order placement that skips the generic request building of python-binance.
+
+    The fixed part of the payload of every (symbol, side, type, time in force) is encoded once, by
+    prepare, so placing an order only appends the quantity, the price and the timestamp from the
+    ServerClock, signs the result and posts it on the pooled session of the client. Responses and
+    errors are handled by the client, exactly like its own create_order.
+    """
+
+    def __init__(self, client, clock: ServerClock, signer: OrderSigner):
+        self.client = client
+        self.clock = clock
+        self.signer = signer
+        self.url = client._create_api_uri("order", True, client.PRIVATE_API_VERSION)
+        self.prefixes: Dict[Tuple[str, str, str, str], str] = {}
+
+    def prepare(self, symbol: str, side: str, type: str = Client.ORDER_TYPE_LIMIT, timeInForce: str = Client.TIME_IN_FORCE_GTC) -> str:
+        """Returns the encoded fixed part of the payload of the orders of the symbol and side, encoding it on first use."""
+        key = (symbol, side, type, timeInForce)
+        prefix = self.prefixes.get(key)
+        if prefix is None:
+            prefix = self.prefixes[key] = urlencode({"symbol": symbol, "side": side, "type": type, "timeInForce": timeInForce})
+        return prefix
+
+    def payload(self, symbol: str, side: str, type: str, timeInForce: str, quantity: str, price: str, **params) -> str:
+        """Returns the signed payload of an order."""
+        payload = f"{self.prepare(symbol, side, type, timeInForce)}&quantity={quantity}&price={price}"
+        if params:
+            payload = f"{payload}&{urlencode(params)}"
+        payload = f"{payload}&timestamp={self.clock.now_ms()}"
+        return f"{payload}&signature={self.signer.sign(payload)}"
+
+    async def create_order(self, **params) -> dict:
+        data = self.payload(**params)
+        async with self.client.session.post(self.url, data=data, headers=FORM_HEADERS, timeout=self.client.REQUEST_TIMEOUT) as response:
+            self.client.response = response
+            return await self.client._handle_response(response)
+
+
+class LatencyHistogram:
+    """Counts of latencies in fixed, roughly logarithmic buckets; percentiles are reported as the upper bound of their bucket."""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.count:
+            return 0.0
+        rank, seen = fraction * self.count, 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 2),
+            "p90_ms": round(self.percentile(0.9) * 1000, 2),
+            "p99_ms": round(self.percentile(0.99) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class OrderLatency:
+    """
+    Tick-to-order latency of the order placements of every pair, in three histograms:
+
+    tick_to_order: from the arrival of the price the order was computed from to the acknowledgment of the order.
+    decision: from the arrival of the price to the call of limit_order.
+    submit: from the call of limit_order to the acknowledgment, i.e. formatting, signing, waiting for the
+        request weight budget and the round trip to the exchange.
+    """
+
+    STAGES = ("tick_to_order", "decision", "submit")
+
+    def __init__(self):
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+
+    def record(self, pair: str, tick_at: float, submitted_at: float, acknowledged_at: float):
+        histograms = self.histograms.get(pair)
+        if histograms is None:
+            histograms = self.histograms[pair] = {stage: LatencyHistogram() for stage in self.STAGES}
+        histograms["tick_to_order"].record(acknowledged_at - tick_at)
+        histograms["decision"].record(submitted_at - tick_at)
+        histograms["submit"].record(acknowledged_at - submitted_at)
+
+    def merged(self, stage: str) -> LatencyHistogram:
+        """Returns the histogram of the stage over all pairs."""
+        merged = LatencyHistogram()
+        for histograms in self.histograms.values():
+            histogram = histograms[stage]
+            merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+            merged.count += histogram.count
+            merged.total += histogram.total
+            merged.max = max(merged.max, histogram.max)
+        return merged
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Dict[str, dict]]:
+        """Returns the statistics of every pair and stage; with reset, the histograms start over."""
+        snapshot = {pair: {stage: histogram.snapshot() for stage, histogram in histograms.items()} for pair, histograms in self.histograms.items()}
+        if reset:
+            self.histograms = {}
+        return snapshot
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+from typing import Callable, Dict, Optional
+from data_classes import Order
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class OrderWriteBehind:
+    """
+    Write-behind queue for order records in the Realtime Database.
+
+    Order updates are coalesced by order ID and flushed as one multi-path update every
+    flush_interval seconds or as soon as batch_size orders are pending. A local cache of the
+    last persisted status replaces the read-before-write: new orders are written in full,
+    known orders only get their status path updated, and unchanged statuses are skipped.
+    Updates of one order are always flushed in the order they were enqueued.
+    """
+
+    def __init__(self, write_batch: Callable[[Dict[str, object]], None], flush_interval: float = ORDER_FLUSH_INTERVAL, batch_size: int = ORDER_FLUSH_BATCH_SIZE):
+        self.write_batch = write_batch
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.pending: Dict[str, dict] = {}
+        self.known_status: Dict[str, Optional[str]] = {}
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = asyncio.Event()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.running = False
+
+    def last_status(self, order_id) -> Optional[str]:
+        """Returns the most recent status queued or persisted for the order, if known."""
+        order_id = str(order_id)
+        with self.lock:
+            entry = self.pending.get(order_id)
+            if entry is not None:
+                return entry["record"][STATUS] if "record" in entry else entry[STATUS]
+            return self.known_status.get(order_id)
+
+    def is_persisted(self, order_id) -> bool:
+        """Whether a status of the order was written by this process."""
+        with self.lock:
+            return str(order_id) in self.known_status
+
+    def enqueue(self, order: Optional[Order]):
+        if order is None:
+            return
+
+        order_id = str(order.order_id)
+
+        with self.lock:
+            entry = self.pending.get(order_id)
+
+            if entry is None:
+                if order_id in self.known_status:
+                    if self.known_status[order_id] == order.status:
+                        logger.debug(f"Order with ID {order_id} already exists in Firebase with the same status.")
+                        return
+                    entry = {STATUS: order.status}
+                else:
+                    entry = {"record": order.to_dict()}
+                self.pending[order_id] = entry
+            elif "record" in entry:
+                entry["record"] = order.to_dict()
+            else:
+                entry[STATUS] = order.status
+
+            pending_count = len(self.pending)
+
+        if pending_count >= self.batch_size:
+            self.wake()
+
+    def wake(self):
+        """Wakes the flusher. Safe to call from any thread: off the event loop, the event is set through the loop."""
+        if self.loop is None or self.loop.is_closed():
+            self.wakeup.set()
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self.loop:
+            self.wakeup.set()
+        else:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    def flush(self):
+        """Writes all pending order updates as one multi-path update. Blocking."""
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, {}
+
+            if not batch:
+                return
+
+            updates = {}
+            for order_id, entry in batch.items():
+                if "record" in entry:
+                    updates[order_id] = entry["record"]
+                else:
+                    updates[f"{order_id}/{STATUS}"] = entry[STATUS]
+
+            try:
+                self.write_batch(updates)
+            except Exception as e:
+                logger.exception(f"Failed to flush {len(batch)} orders to Firebase, keeping them queued: {e}")
+                with self.lock:
+                    for order_id, entry in batch.items():
+                        newer = self.pending.get(order_id)
+                        if newer is None:
+                            self.pending[order_id] = entry
+                        elif "record" in entry and "record" not in newer:
+                            entry["record"][STATUS] = newer[STATUS]
+                            self.pending[order_id] = entry
+                return
+
+            with self.lock:
+                for order_id, entry in batch.items():
+                    self.known_status[order_id] = entry["record"][STATUS] if "record" in entry else entry[STATUS]
+
+            logger.info(f"Flushed {len(batch)} order updates to Firebase.")
+
+    async def run(self):
+        """Flushes pending updates on the configured interval or when a batch is full."""
+        self.running = True
+        loop = self.loop = asyncio.get_running_loop()
+
+        while self.running:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            await loop.run_in_executor(None, self.flush)
+
+    def close(self):
+        """Stops the flusher and writes everything that is still pending."""
+        self.running = False
+        self.wake()
+        self.flush()
@@ -0,0 +1,75 @@
+from typing import Dict
+from data_classes import Order
+from globals import *
+
+
+class ProfitAggregate:
+    """
+    Running profit totals per pair, per strategy and overall.
+
+    Updated incrementally whenever a BUY order transitions to FILLED, so the current profit is
+    available at O(1) cost. The aggregate can always be rebuilt from the full order tree.
+    """
+
+    def __init__(self, total: float = 0.0, pairs: Dict[str, float] = None, strategies: Dict[str, float] = None, filled_orders: int = 0):
+        self.total = total
+        self.pairs = pairs or {}
+        self.strategies = strategies or {}
+        self.filled_orders = filled_orders
+        self.dirty = False
+
+    @staticmethod
+    def counts_towards_profit(order: dict) -> bool:
+        return order.get(STATUS) == FILLED and order.get(ORDER_TYPE) == BUY and order.get(PROFIT) is not None
+
+    def add(self, symbol: str, strategy: str, profit: float):
+        strategy = strategy or UNKNOWN_STRATEGY
+
+        self.total += profit
+        self.pairs[symbol] = self.pairs.get(symbol, 0.0) + profit
+        self.strategies[strategy] = self.strategies.get(strategy, 0.0) + profit
+        self.filled_orders += 1
+        self.dirty = True
+
+    def add_order(self, order: Order):
+        self.add(order.symbol, order.strategy, float(order.profit))
+
+    def merge(self, data: dict):
+        """Adds the totals of another aggregate, given as to_dict(), e.g. the profit reported by a shard."""
+        if not data or not data.get("filled_orders"):
+            return
+
+        self.total += float(data.get("total", 0.0))
+        for symbol, profit in (data.get("pairs") or {}).items():
+            self.pairs[symbol] = self.pairs.get(symbol, 0.0) + profit
+        for strategy, profit in (data.get("strategies") or {}).items():
+            self.strategies[strategy] = self.strategies.get(strategy, 0.0) + profit
+        self.filled_orders += int(data["filled_orders"])
+        self.dirty = True
+
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "pairs": dict(self.pairs),
+            "strategies": dict(self.strategies),
+            "filled_orders": self.filled_orders,
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "ProfitAggregate":
+        return ProfitAggregate(
+            total=float(data.get("total", 0.0)),
+            pairs=dict(data.get("pairs") or {}),
+            strategies=dict(data.get("strategies") or {}),
+            filled_orders=int(data.get("filled_orders", 0)),
+        )
+
+    @staticmethod
+    def from_orders(orders: Dict[str, dict]) -> "ProfitAggregate":
+        """Rebuilds the aggregate from the full ORDERS_PATH tree."""
+        aggregate = ProfitAggregate()
+        for order in (orders or {}).values():
+            if ProfitAggregate.counts_towards_profit(order):
+                aggregate.add(order.get(SYMBOL, ""), order.get(STRATEGY, ""), float(order[PROFIT]))
+        aggregate.dirty = True
+        return aggregate
@@ -0,0 +1,182 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, Mapping, Optional
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Request weight of the python-binance client methods used by the bot (Binance spot API, weight per 1 minute)
+METHOD_WEIGHTS = {
+    'ping': 1,
+    'get_server_time': 1,
+    'get_exchange_info': 20,
+    'get_symbol_ticker': 2,
+    'get_account': 20,
+    'create_order': 1,
+    'get_order': 4,
+    'cancel_order': 1,
+    'cancel_replace_order': 1,
+    'cancel_open_orders': 1,
+    'get_all_orders': 20,
+    'get_open_orders': 6,
+    'stream_get_listen_key': 2,
+    'stream_keepalive': 2,
+    'stream_close': 2,
+}
+
+METHOD_PRIORITIES = {
+    'create_order': REQUEST_PRIORITY_ORDER,
+    'cancel_order': REQUEST_PRIORITY_ORDER,
+    'cancel_replace_order': REQUEST_PRIORITY_ORDER,
+    'cancel_open_orders': REQUEST_PRIORITY_ORDER,
+    'stream_get_listen_key': REQUEST_PRIORITY_ORDER,
+    'stream_keepalive': REQUEST_PRIORITY_ORDER,
+    'get_all_orders': REQUEST_PRIORITY_LOW,
+    'get_exchange_info': REQUEST_PRIORITY_LOW,
+}
+
+
+class RequestDropped(Exception):
+    """Raised for a droppable request that does not fit in the remaining weight budget."""
+
+
+class RequestGovernor:
+    """
+    Request weight budget shared by every REST call.
+
+    Binance counts request weight per IP in fixed one-minute windows and answers 429, then 418
+    (IP ban), once the limit is exceeded. The governor adds the weight of every request when it is
+    sent and takes the X-MBX-USED-WEIGHT-1M header of each response as the authoritative count.
+
+    Each priority may use a share of the limit: order placement and cancellation the whole limit,
+    normal calls REQUEST_BUDGET_NORMAL of it and analytics calls such as allOrders and exchangeInfo
+    REQUEST_BUDGET_LOW. A request over its share waits for the next window, behind any waiting
+    request of higher priority, unless it is droppable, in which case RequestDropped is raised.
+    After a 429 or 418 every request waits for the Retry-After delay.
+    """
+
+    def __init__(self, weight_limit: int = REQUEST_WEIGHT_LIMIT, window: float = REQUEST_WEIGHT_WINDOW):
+        self.weight_limit = weight_limit
+        self.window = window
+        self.budgets = {
+            REQUEST_PRIORITY_ORDER: 1.0,
+            REQUEST_PRIORITY_NORMAL: REQUEST_BUDGET_NORMAL,
+            REQUEST_PRIORITY_LOW: REQUEST_BUDGET_LOW,
+        }
+        self.window_index = self.current_window()
+        self.used_weight = 0
+        self.peak_weight = 0
+        self.blocked_until = 0.0
+        self.waiting = Counter()
+        self.stats = Counter()
+
+    def current_window(self) -> int:
+        return int(time.time() // self.window)
+
+    def roll_window(self):
+        window_index = self.current_window()
+        if window_index != self.window_index:
+            self.window_index = window_index
+            self.used_weight = 0
+
+    @staticmethod
+    def weight(method: str, params: Mapping) -> int:
+        if method == 'get_symbol_ticker' and 'symbol' not in params:
+            return 4
+        if method == 'get_open_orders' and 'symbol' not in params:
+            return 80
+        return METHOD_WEIGHTS.get(method, 1)
+
+    @staticmethod
+    def priority(method: str) -> int:
+        return METHOD_PRIORITIES.get(method, REQUEST_PRIORITY_NORMAL)
+
+    def allows(self, priority: int, weight: int) -> bool:
+        if time.time() < self.blocked_until:
+            return False
+        if any(self.waiting[higher] for higher in range(priority)):
+            return False
+        return self.used_weight + weight <= self.budgets[priority] * self.weight_limit
+
+    def delay(self) -> float:
+        """Returns the seconds until the weight budget can next change: the end of a ban or of the current window."""
+        now = time.time()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        return (self.window_index + 1) * self.window - now
+
+    async def acquire(self, method: str, params: Mapping, priority: Optional[int] = None, droppable: bool = False):
+        """
+        Waits until the request fits in the budget of its priority and reserves its weight.
+
+        Args:
+            method (str): Name of the python-binance client method.
+            params (Mapping): Parameters of the request, used for weights that depend on them.
+            priority (int): REQUEST_PRIORITY_*; defaults to the priority of the method.
+            droppable (bool): Raise RequestDropped instead of waiting when the budget is exhausted.
+        """
+        priority = self.priority(method) if priority is None else priority
+        weight = self.weight(method, params)
+
+        self.roll_window()
+        if not self.allows(priority, weight):
+            if droppable:
+                self.stats["dropped"] += 1
+                raise RequestDropped(f"{method} dropped: {self.used_weight}/{self.weight_limit} request weight used.")
+
+            self.stats["deferred"] += 1
+            logger.debug("%s deferred: %s/%s request weight used.", method, self.used_weight, self.weight_limit)
+
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    await asyncio.sleep(self.delay())
+                    self.roll_window()
+                    if self.allows(priority, weight):
+                        break
+            finally:
+                self.waiting[priority] -= 1
+
+        self.used_weight += weight
+        self.peak_weight = max(self.peak_weight, self.used_weight)
+
+    def observe(self, status: Optional[int], headers: Optional[Mapping]):
+        """
+        Updates the budget from a response.
+
+        Args:
+            status (int): HTTP status code of the response.
+            headers (Mapping): Response headers.
+        """
+        if headers is None:
+            return
+
+        used_weight = headers.get(USED_WEIGHT_HEADER)
+        if used_weight is not None:
+            self.roll_window()
+            self.used_weight = max(self.used_weight, int(used_weight))
+            self.peak_weight = max(self.peak_weight, self.used_weight)
+
+        if status in (429, 418):
+            retry_after = float(headers.get(RETRY_AFTER_HEADER) or self.delay())
+            self.blocked_until = max(self.blocked_until, time.time() + retry_after)
+            self.stats["rate_limited"] += 1
+            logger.warning(f"Binance request rate limit hit (HTTP {status}), pausing requests for {retry_after:.0f} s.")
+
+    def pop_metrics(self) -> Dict[str, float]:
+        """Returns the weight utilization and the deferred, dropped and rate limited requests since the previous call."""
+        self.roll_window()
+        metrics = {
+            "used_weight": self.used_weight,
+            "weight_utilization": round(self.used_weight / self.weight_limit, 4),
+            "peak_weight_utilization": round(self.peak_weight / self.weight_limit, 4),
+            "deferred_requests": self.stats["deferred"],
+            "dropped_requests": self.stats["dropped"],
+            "rate_limited_responses": self.stats["rate_limited"],
+        }
+        self.stats.clear()
+        self.peak_weight = self.used_weight
+        return metrics
@@ -0,0 +1,177 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from binance_api import BinanceManager
+from data_classes import CryptoPair, CryptoPairs
+from firebase import FirebaseManager
+from globals import *
+from logger import get_logger
+from trader import Trader
+
+logger = get_logger(__name__)
+
+
+class TradingScheduler:
+    """
+    Event-driven scheduler running one long-lived task per (pair, strategy).
+
+    Each task sleeps until its next deadline from Trader.next_wakeup or until it is woken by an
+    event (price trigger, order fill, config change), then runs one Trader.step. A per-pair lock
+    guarantees that a pair never has more than one evaluation in flight.
+    """
+
+    def __init__(self, trader: Trader, cryptoPairs: CryptoPairs):
+        self.trader = trader
+        self.cryptoPairs = cryptoPairs
+        self.power_on = asyncio.Event()
+        self.stopped = asyncio.Event()
+        self.pair_locks: Dict[str, asyncio.Lock] = {}
+        self.tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.loop_lag: Dict[Tuple[str, str], float] = {}
+        self.step_time: Dict[Tuple[str, str], float] = {}
+        self.busy_time: Dict[str, float] = defaultdict(float)
+        self.iterations = 0
+
+    async def run(self, watch_config: bool = True):
+        """
+        Starts all (pair, strategy) tasks and runs until stop() is called or the run is cancelled.
+        Pairs added with add_pair while running are started right away.
+
+        Args:
+            watch_config: Whether to follow the Firebase config. Offline runs set it to False.
+        """
+        for cryptoPair in self.cryptoPairs.pairs:
+            self.start_pair(cryptoPair)
+
+        self.on_config_change()
+        if watch_config:
+            FirebaseManager().add_config_listener(self.on_config_change)
+
+        try:
+            await self.stopped.wait()
+        finally:
+            self.stop()
+
+    def add_pair(self, cryptoPair: CryptoPair):
+        """Adds a pair that finished initializing and starts its strategy tasks."""
+        if all(existing.pair != cryptoPair.pair for existing in self.cryptoPairs.pairs):
+            self.cryptoPairs.pairs.append(cryptoPair)
+        self.start_pair(cryptoPair)
+
+    def start_pair(self, cryptoPair: CryptoPair):
+        self.pair_locks.setdefault(cryptoPair.pair, asyncio.Lock())
+        for strategy_name in (POOR_ORPHAN, CRAZY_GIRL, SENSIBLE_GUY):
+            key = (cryptoPair.pair, strategy_name)
+            if key not in self.tasks:
+                self.tasks[key] = asyncio.create_task(self.run_strategy_task(cryptoPair, strategy_name))
+
+    async def remove_pair(self, pair_name: str) -> Optional[CryptoPair]:
+        """
+        Stops the strategy tasks of a pair once its evaluation in flight, if any, finished.
+
+        Returns:
+            CryptoPair: The removed pair, or None if it is not scheduled.
+        """
+        cryptoPair = next((existing for existing in self.cryptoPairs.pairs if existing.pair == pair_name), None)
+        if cryptoPair is None:
+            return None
+
+        async with self.pair_locks[pair_name]:
+            tasks = [self.tasks.pop(key) for key in list(self.tasks) if key[0] == pair_name]
+            for task in tasks:
+                task.cancel()
+            self.cryptoPairs.pairs.remove(cryptoPair)
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for key in [key for key in self.loop_lag if key[0] == pair_name]:
+            self.loop_lag.pop(key, None)
+            self.step_time.pop(key, None)
+        self.busy_time.pop(pair_name, None)
+
+        return cryptoPair
+
+    def pop_busy_time(self) -> Dict[str, float]:
+        """Returns the seconds spent evaluating each pair since the previous call."""
+        busy_time = dict(self.busy_time)
+        self.busy_time.clear()
+        return busy_time
+
+    def stop(self):
+        self.stopped.set()
+        for task in self.tasks.values():
+            task.cancel()
+
+    def on_config_change(self):
+        """Called on the event loop after any config listener fired: updates power state and wakes every task."""
+        global CONFIG, POWER_STATUS
+
+        logger.debug(f"Config version {CONFIG.snapshot.version}, waking {len(self.tasks)} tasks.")
+        if POWER_STATUS.power_status:
+            self.power_on.set()
+        else:
+            logger.info("Power status is OFF. Waiting...")
+            self.power_on.clear()
+
+        for key in self.tasks:
+            self.trader.wake(key)
+
+    async def run_strategy_task(self, cryptoPair: CryptoPair, strategy_name: str):
+        global CONFIG
+
+        key = (cryptoPair.pair, strategy_name)
+        wake_event = self.trader.wake_events[key]
+
+        while True:
+            await self.power_on.wait()
+
+            # One snapshot per iteration, so the wait and the step see the same config version
+            config = CONFIG.snapshot
+            strategy = config.strategies[strategy_name]
+            deadline = self.trader.next_wakeup(cryptoPair, strategy)
+            timeout = max(0.0, deadline - time.time())
+
+            try:
+                await asyncio.wait_for(wake_event.wait(), timeout=timeout)
+                woken_by_event = True
+            except asyncio.TimeoutError:
+                woken_by_event = False
+            wake_event.clear()
+
+            if not self.power_on.is_set():
+                continue
+
+            if CONFIG.snapshot is not config:
+                config = CONFIG.snapshot
+                strategy = config.strategies[strategy_name]
+
+            self.loop_lag[key] = 0.0 if woken_by_event else max(0.0, time.time() - deadline)
+
+            async with self.pair_locks[cryptoPair.pair]:
+                started = time.perf_counter()
+                try:
+                    await self.trader.step(cryptoPair, strategy, config)
+                except Exception as e:
+                    logger.exception(f"Strategy {strategy_name} failed on {cryptoPair.pair}: {e}")
+                self.step_time[key] = time.perf_counter() - started
+                self.busy_time[cryptoPair.pair] += self.step_time[key]
+
+            self.iterations += 1
+
+    def metrics(self) -> dict:
+        """
+        Returns scheduler metrics, the REST request count, the request weight utilization and the
+        tick-to-order latency of every pair since the previous call, and the server clock offset.
+        """
+        request_counts = BinanceManager().pop_request_counts()
+
+        return {
+            "iterations": self.iterations,
+            "max_loop_lag": max(self.loop_lag.values(), default=0.0),
+            "max_step_time": max(self.step_time.values(), default=0.0),
+            "loop_lag": {f"{pair}_{strategy}": round(lag, 4) for (pair, strategy), lag in self.loop_lag.items()},
+            "requests_per_interval": sum(request_counts.values()),
+            **BinanceManager().request_governor.pop_metrics(),
+            "clock_offset_ms": round(BinanceManager().server_clock.offset_ms, 1),
+            "order_latency": BinanceManager().order_latency.snapshot(reset=True),
+        }
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from binance_api import BinanceManager
+from data_classes import CryptoPairs
+from firebase import FirebaseManager
+from metrics import SystemMetricsSampler
+from profit import ProfitAggregate
+from scheduler import TradingScheduler
+from trader import Trader
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ShardAccount:
+    """
+    Binance account traded by one or more shards.
+
+    The keys are read from the environment variables named by api_key_env and secret_key_env, so
+    account files never hold secrets. An account with pairs only trades those pairs; the pairs
+    no account lists are split among the accounts without pairs.
+    """
+    name: str
+    api_key_env: str = BINANCE_API_KEY
+    secret_key_env: str = BINANCE_SECRET_KEY
+    shards: int = 1
+    pairs: Optional[List[str]] = None
+
+
+@dataclass
+class ShardPlan:
+    """Assignment of the configured pairs to the shards of the accounts, overridden pair by pair by rebalancing."""
+    accounts: List[ShardAccount]
+    overrides: Dict[str, str] = field(default_factory=dict)
+
+    def account_shards(self, account: ShardAccount) -> List[str]:
+        return [f"{account.name}-{index}" for index in range(account.shards)]
+
+    def shard_names(self) -> List[str]:
+        return [shard for account in self.accounts for shard in self.account_shards(account)]
+
+    def account_of(self, shard: str) -> ShardAccount:
+        return next(account for account in self.accounts if shard in self.account_shards(account))
+
+    def owner(self, pair_name: str) -> Optional[str]:
+        """
+        Returns the shard trading the pair: its override, or a shard picked by a stable hash of the
+        name among the shards of the accounts that may trade it.
+        """
+        if pair_name in self.overrides:
+            return self.overrides[pair_name]
+
+        accounts = [account for account in self.accounts if account.pairs and pair_name in account.pairs]
+        accounts = accounts or [account for account in self.accounts if not account.pairs]
+        candidates = [shard for account in accounts for shard in self.account_shards(account)]
+        if not candidates:
+            return None
+
+        return candidates[zlib.crc32(pair_name.encode()) % len(candidates)]
+
+
+class ShardWorker:
+    """
+    One shard of the supervisor: the regular trader and scheduler, on the event loop of its own process.
+
+    The process has its own BinanceManager, Trader and FirebaseManager singletons, bound to the
+    keys of its account, and only starts the pairs the plan assigns to it. Every report_interval
+    it sends a report on the reports pipe: scheduler and system metrics, the time spent on each
+    pair and the profit made since the previous report. Commands of the supervisor (release or
+    adopt pairs, stop) are read from the commands queue.
+    """
+
+    def __init__(self, name: str, plan: ShardPlan, reports, commands, market_stream_url: str = MARKET_DATA_STREAM_URL,
+                 offline: bool = False, report_interval: float = SHARD_REPORT_INTERVAL):
+        self.name = name
+        self.plan = plan
+        self.reports = reports
+        self.commands = commands
+        self.market_stream_url = market_stream_url
+        self.offline = offline
+        self.report_interval = report_interval
+        self.trader = None
+        self.scheduler = None
+        self.sampler = None
+
+    def owns(self, pair_name: str) -> bool:
+        return self.plan.owner(pair_name) == self.name
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.trader = Trader()
+        self.scheduler = TradingScheduler(self.trader, CryptoPairs())
+        self.sampler = SystemMetricsSampler()
+
+        if self.offline:
+            startup = asyncio.create_task(self.trader.bootstrap(on_ready=self.scheduler.add_pair, market_stream_url=self.market_stream_url, owns=self.owns))
+        else:
+            startup = asyncio.create_task(self.trader.start_trade(on_ready=self.scheduler.add_pair, owns=self.owns))
+
+        def on_startup_done(task: asyncio.Task):
+            if not task.cancelled() and task.exception():
+                self.scheduler.stop()
+
+        startup.add_done_callback(on_startup_done)
+        background_tasks = [startup, asyncio.create_task(self.sampler.run()), asyncio.create_task(self.report_loop())]
+
+        # The commands queue is read by a daemon thread, so a blocked read never keeps the process alive
+        threading.Thread(target=self.read_commands, args=(loop,), daemon=True).start()
+
+        try:
+            await self.scheduler.run(watch_config=not self.offline)
+            if startup.done() and not startup.cancelled() and startup.exception():
+                raise startup.exception()
+        finally:
+            background_tasks += self.trader.stream_tasks
+            for task in background_tasks:
+                task.cancel()
+            await asyncio.gather(*background_tasks, return_exceptions=True)
+            if not self.offline:
+                FirebaseManager().flush_orders()
+            await BinanceManager().close()
+            if self.trader.state_store:
+                self.trader.state_store.close()
+            self.reports.send(self.report())
+
+    def read_commands(self, loop: asyncio.AbstractEventLoop):
+        while True:
+            command = self.commands.get()
+            loop.call_soon_threadsafe(self.dispatch, command)
+            if command["command"] == SHARD_STOP:
+                return
+
+    def dispatch(self, command: dict):
+        asyncio.ensure_future(self.handle(command))
+
+    async def handle(self, command: dict):
+        try:
+            if command["command"] == SHARD_RELEASE:
+                await self.release(command["pairs"], command["to"])
+            elif command["command"] == SHARD_ADOPT:
+                await self.trader.adopt_pairs(command["pairs"], on_ready=self.scheduler.add_pair, market_stream_url=self.market_stream_url)
+            elif command["command"] == SHARD_STOP:
+                self.scheduler.stop()
+        except Exception as e:
+            logger.exception(f"Shard {self.name} failed to {command['command']}: {e}")
+
+    async def release(self, pair_names: List[str], target: str):
+        """Stops trading the pairs and tells the supervisor, which hands them over to the target shard."""
+        released = []
+        for pair_name in pair_names:
+            cryptoPair = await self.scheduler.remove_pair(pair_name)
+            if cryptoPair:
+                self.trader.release_pair(cryptoPair)
+                released.append(pair_name)
+
+        logger.info(f"Shard {self.name} released {', '.join(released) or 'no pairs'} to {target}.")
+        self.reports.send({"type": SHARD_RELEASED, "shard": self.name, "pairs": released, "to": target})
+
+    def pop_profit(self) -> dict:
+        """Returns the profit aggregate of the orders since the previous call and starts a new one."""
+        order_store = self.trader.order_store
+        profit = order_store.profit
+        order_store.profit = ProfitAggregate()
+        return profit.to_dict()
+
+    def report(self) -> dict:
+        metrics = self.scheduler.metrics()
+        metrics.pop("loop_lag", None)
+
+        return {
+            "type": SHARD_REPORT,
+            "shard": self.name,
+            "pid": os.getpid(),
+            "timestamp": time.time(),
+            "pairs": [cryptoPair.pair for cryptoPair in self.scheduler.cryptoPairs.pairs],
+            "busy_time": self.scheduler.pop_busy_time(),
+            "metrics": metrics,
+            "system": self.sampler.snapshot(),
+            "profit": self.pop_profit(),
+        }
+
+    async def report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            try:
+                self.reports.send(self.report())
+            except Exception as e:
+                logger.exception(f"Shard {self.name} failed to report: {e}")
+
+
+def run_shard(name: str, plan: ShardPlan, reports, commands, environment: Dict[str, str] = None,
+              setup: Optional[Callable[[], None]] = None, **options):
+    """
+    Entry point of a shard process.
+
+    Binds the process to the keys of its account before any singleton reads them, runs the
+    optional setup hook and then the ShardWorker until it is stopped.
+
+    Args:
+        name (str): Name of the shard, e.g. 'main-0'.
+        plan (ShardPlan): Assignment of the pairs to the shards.
+        reports: Connection the reports are sent on.
+        commands: Queue the commands of the supervisor are read from.
+        environment (dict): Additional environment variables of the shard.
+        setup (callable): Run in the shard process before the worker starts, e.g. by the load test.
+        options: Additional ShardWorker arguments.
+    """
+    account = plan.account_of(name)
+    os.environ.update(environment or {})
+    os.environ[SHARD_NAME] = name
+    os.environ[BINANCE_API_KEY] = os.getenv(account.api_key_env, "")
+    os.environ[BINANCE_SECRET_KEY] = os.getenv(account.secret_key_env, "")
+
+    if setup:
+        setup()
+
+    worker = ShardWorker(name, plan, reports, commands, **options)
+    try:
+        asyncio.run(worker.run())
+    except asyncio.CancelledError:
+        logger.info(f"Shard {name} cancelled.")
+    except KeyboardInterrupt:
+        logger.info(f"Shard {name} interrupted.")
+    except Exception as e:
+        logger.exception(f"Shard {name} stopped on an unhandled exception: {e}")
@@ -0,0 +1,102 @@
+import json
+import sqlite3
+import time
+from typing import Dict, Iterable, Optional
+from data_classes import CryptoPair
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class StateStore:
+    """
+    Local journal of the trading state of every pair, in an SQLite database in WAL mode.
+
+    save() is called after every evaluation and writes the pair's runtime state (strategy states,
+    active and executed orders, cancellation count and buy order history) only when it changed.
+    Each write is one small transaction appended to the write-ahead log, so journaling a state
+    transition costs no fsync; the log is checkpointed into the database by SQLite. On startup
+    restore() puts the last journaled state back into the freshly built pair, and the first
+    evaluation of each strategy reconciles the in-flight orders with the exchange.
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_STORE):
+        self.path = path
+        self.connection: Optional[sqlite3.Connection] = None
+        self.states: Dict[str, str] = {}
+
+    def open(self):
+        if self.connection:
+            return
+
+        self.connection = sqlite3.connect(self.path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pair_state (pair TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+        started = time.perf_counter()
+        self.states = dict(self.connection.execute("SELECT pair, state FROM pair_state"))
+        logger.debug(f"State store {self.path} loaded {len(self.states)} pairs in {(time.perf_counter() - started) * 1000:.1f} ms.")
+
+    def reload(self, pairs: Iterable[str]):
+        """
+        Reads the journaled state of the pairs again, for pairs another process traded since open().
+
+        Args:
+            pairs (Iterable[str]): Names of the pairs, e.g. the pairs a shard adopts from another shard.
+        """
+        if not self.connection:
+            return
+
+        for pair in pairs:
+            row = self.connection.execute("SELECT state FROM pair_state WHERE pair = ?", (pair,)).fetchone()
+            if row:
+                self.states[pair] = row[0]
+            else:
+                self.states.pop(pair, None)
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def restore(self, cryptoPair: CryptoPair) -> bool:
+        """
+        Restores the journaled runtime state of the pair.
+
+        Returns:
+            bool: True if a state was found and restored.
+        """
+        state = self.states.get(cryptoPair.pair)
+        if state is None:
+            return False
+
+        try:
+            cryptoPair.restore_runtime_state(json.loads(state))
+            logger.info(f"Restored state of {cryptoPair.pair}: {', '.join(f'{name} {state.name}' for name, state in cryptoPair.current_state.items())}.")
+            return True
+        except Exception as e:
+            logger.exception(f"Failed to restore the state of {cryptoPair.pair}, starting from MONITORING: {e}")
+            return False
+
+    def save(self, cryptoPair: CryptoPair):
+        """Journals the runtime state of the pair if it changed since the last save."""
+        if not self.connection:
+            return
+
+        state = json.dumps(cryptoPair.runtime_state(), separators=(",", ":"))
+        if self.states.get(cryptoPair.pair) == state:
+            return
+
+        try:
+            self.connection.execute(
+                "INSERT INTO pair_state (pair, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(pair) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                (cryptoPair.pair, state, time.time()),
+            )
+            self.states[cryptoPair.pair] = state
+        except sqlite3.Error as e:
+            logger.exception(f"Failed to journal the state of {cryptoPair.pair}: {e}")
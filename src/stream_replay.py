@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import websockets
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TickReplayServer:
+    """
+    Local websocket stand-in for the Binance market data stream.
+
+    Replays recorded combined-stream messages (one JSON message per line) to every client that
+    connects, so MarketDataStream can be exercised without a connection to Binance.
+    Point MARKET_DATA_STREAM_URL at ws://host:port/stream to use it.
+    """
+
+    def __init__(self, ticks_path: str, host: str = "127.0.0.1", port: int = 8765, interval: float = 0.0, loop_forever: bool = False):
+        self.ticks_path = ticks_path
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.loop_forever = loop_forever
+
+        with open(ticks_path, "r") as f:
+            self.ticks = [line.strip() for line in f if line.strip()]
+
+    async def handler(self, websocket):
+        logger.info(f"Replaying {len(self.ticks)} ticks from {self.ticks_path}.")
+        while True:
+            for tick in self.ticks:
+                await websocket.send(tick)
+                await asyncio.sleep(self.interval)
+            if not self.loop_forever:
+                break
+
+    async def serve(self):
+        async with websockets.serve(self.handler, self.host, self.port):
+            logger.info(f"Tick replay server listening on ws://{self.host}:{self.port}/stream")
+            await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded market data ticks over a local websocket.")
+    parser.add_argument("ticks_path", help="File with one combined-stream JSON message per line.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.0, help="Delay between ticks in seconds.")
+    parser.add_argument("--loop", action="store_true", help="Replay the file in a loop.")
+    args = parser.parse_args()
+
+    asyncio.run(TickReplayServer(args.ticks_path, args.host, args.port, args.interval, args.loop).serve())
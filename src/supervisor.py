@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import signal
+import threading
+import time
+from collections import Counter
+from multiprocessing.connection import Connection, wait
+from typing import Dict, List, Optional
+from firebase import FirebaseManager
+from metrics import SystemMetricsSampler, publish_heartbeat
+from profit import ProfitAggregate
+from shard import ShardAccount, ShardPlan, run_shard
+from utils import get_tag
+from globals import *
+from logger import logger
+
+
+class Supervisor:
+    """
+    Runs the pairs on several shard processes and publishes one heartbeat for all of them.
+
+    Every shard is a process with its own event loop and singletons (see ShardWorker), started
+    for the account it belongs to and given its share of the pairs by the ShardPlan. The
+    supervisor collects the shard reports, adds their profit to the profit aggregate and
+    publishes the combined metrics as the heartbeat. A shard that exits is started again; it
+    resumes its pairs from the state store. A shard whose event loop lags more than
+    overload_loop_lag in SHARD_OVERLOAD_REPORTS reports in a row hands its busiest pairs over to
+    the least loaded shard of the same account.
+
+    Shards of one host share the IP request weight limit. Every response carries the used weight
+    of the whole IP, so the RequestGovernor of each shard follows the shared count.
+    """
+
+    def __init__(self, plan: ShardPlan, version: str, offline: bool = False, worker_options: Optional[dict] = None,
+                 report_interval: float = SHARD_REPORT_INTERVAL, overload_loop_lag: float = SHARD_OVERLOAD_LOOP_LAG):
+        self.plan = plan
+        self.version = version
+        self.offline = offline
+        self.worker_options = worker_options or {}
+        self.report_interval = report_interval
+        self.overload_loop_lag = overload_loop_lag
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: Dict[str, multiprocessing.Process] = {}
+        self.commands: Dict[str, multiprocessing.Queue] = {}
+        self.connections: Dict[str, Connection] = {}
+        self.connections_lock = threading.Lock()
+        self.closing = False
+        self.started_at: Dict[str, float] = {}
+        self.last_reports: Dict[str, dict] = {}
+        self.overloaded = Counter()
+        self.pair_load: Dict[str, Counter] = {}
+        self.rebalanced_at: Dict[str, float] = {}
+        self.moves: List[dict] = []
+        self.restarts = Counter()
+        self.sampler = SystemMetricsSampler()
+        self.local_profit = ProfitAggregate()
+        self.stopped: Optional[asyncio.Event] = None
+        self.drained: Optional[asyncio.Event] = None
+
+    @property
+    def profit(self) -> ProfitAggregate:
+        return self.local_profit if self.offline else FirebaseManager().profit
+
+    def start_shard(self, name: str):
+        # Every shard reports on its own pipe: a shard killed while writing cannot block the others
+        reports, shard_reports = self.context.Pipe(duplex=False)
+        commands = self.context.Queue()
+        process = self.context.Process(
+            target=run_shard,
+            name=f"shard-{name}",
+            args=(name, self.plan, shard_reports, commands),
+            kwargs=dict(self.worker_options, offline=self.offline, report_interval=self.report_interval),
+        )
+        process.start()
+        shard_reports.close()
+
+        with self.connections_lock:
+            self.connections[name] = reports
+        self.processes[name] = process
+        self.commands[name] = commands
+        self.started_at[name] = time.time()
+        self.last_reports.pop(name, None)
+        self.pair_load.pop(name, None)
+        logger.info(f"Shard {name} started (pid {process.pid}).")
+
+    async def run(self):
+        """Starts every shard and supervises them until stop() is called."""
+        loop = asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        self.drained = asyncio.Event()
+
+        if not self.offline:
+            FirebaseManager().loop = loop
+            FirebaseManager().load_profit()
+            FirebaseManager().start_update_listener()
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+
+        for name in self.plan.shard_names():
+            self.start_shard(name)
+
+        # The report pipes are read by a daemon thread, so a blocked read never keeps the process alive
+        threading.Thread(target=self.read_reports, args=(loop,), daemon=True).start()
+        background_tasks = [asyncio.create_task(self.sampler.run()), asyncio.create_task(self.monitor())]
+
+        try:
+            await self.stopped.wait()
+        finally:
+            for task in background_tasks:
+                task.cancel()
+            await asyncio.gather(*background_tasks, return_exceptions=True)
+            await self.shutdown()
+
+    def stop(self):
+        logger.info("Stopping the shards...")
+        self.stopped.set()
+
+    async def shutdown(self):
+        """Stops the shards, waits for their final reports and publishes the last heartbeat."""
+        loop = asyncio.get_running_loop()
+
+        for name, process in self.processes.items():
+            if process.is_alive():
+                self.commands[name].put({"command": SHARD_STOP})
+
+        for name, process in self.processes.items():
+            await loop.run_in_executor(None, process.join, SHARD_STOP_TIMEOUT)
+            if process.is_alive():
+                logger.warning(f"Shard {name} did not stop within {SHARD_STOP_TIMEOUT} s, terminating it.")
+                process.terminate()
+                await loop.run_in_executor(None, process.join)
+
+        # The pipe of an exited shard is read up to its last report, then closed
+        self.closing = True
+        try:
+            await asyncio.wait_for(self.drained.wait(), timeout=SHARD_STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out reading the final shard reports.")
+
+        await self.publish()
+
+    def read_reports(self, loop: asyncio.AbstractEventLoop):
+        while True:
+            with self.connections_lock:
+                connections = dict(self.connections)
+            if self.closing and not connections:
+                loop.call_soon_threadsafe(self.drained.set)
+                return
+
+            for connection in wait(list(connections.values()), timeout=1.0):
+                try:
+                    loop.call_soon_threadsafe(self.handle_report, connection.recv())
+                except (EOFError, OSError):
+                    with self.connections_lock:
+                        self.connections = {name: other for name, other in self.connections.items() if other is not connection}
+                    connection.close()
+
+    def handle_report(self, report: dict):
+        try:
+            if report["type"] == SHARD_REPORT:
+                self.last_reports[report["shard"]] = report
+                self.update_load(report)
+                self.profit.merge(report["profit"])
+                self.check_load(report["shard"])
+            elif report["type"] == SHARD_RELEASED:
+                self.hand_over(report["shard"], report["pairs"], report["to"])
+        except Exception as e:
+            logger.exception(f"Failed to handle the report of shard {report.get('shard')}: {e}")
+
+    async def monitor(self):
+        """Restarts exited shards and publishes the heartbeat, every report_interval."""
+        while True:
+            await asyncio.sleep(self.report_interval)
+
+            for name, process in list(self.processes.items()):
+                if process.is_alive() or time.time() - self.started_at[name] < SHARD_RESTART_DELAY:
+                    continue
+                logger.error(f"Shard {name} exited with code {process.exitcode}, restarting it.")
+                self.restarts[name] += 1
+                self.start_shard(name)
+
+            await self.publish()
+
+    def is_alive(self, name: str) -> bool:
+        """Whether the shard process runs and reported within SHARD_STALE_AFTER, or is still starting."""
+        process = self.processes.get(name)
+        if process is None or not process.is_alive():
+            return False
+
+        last_seen = self.last_reports[name]["timestamp"] if name in self.last_reports else self.started_at[name]
+        return time.time() - last_seen < SHARD_STALE_AFTER
+
+    def loop_lag(self, name: str) -> float:
+        return self.last_reports[name]["system"]["loop_lag_max"]
+
+    def update_load(self, report: dict):
+        """Folds the evaluation time of each pair into its load, an average decaying by SHARD_LOAD_DECAY per report."""
+        previous = self.pair_load.get(report["shard"], Counter())
+        self.pair_load[report["shard"]] = Counter({
+            pair_name: previous[pair_name] * SHARD_LOAD_DECAY + report["busy_time"].get(pair_name, 0.0)
+            for pair_name in report["pairs"]
+        })
+
+    def load(self, name: str) -> float:
+        return sum(self.pair_load.get(name, Counter()).values())
+
+    def check_load(self, name: str):
+        if self.loop_lag(name) > self.overload_loop_lag:
+            self.overloaded[name] += 1
+        else:
+            self.overloaded[name] = 0
+
+        if self.overloaded[name] >= SHARD_OVERLOAD_REPORTS:
+            self.rebalance(name)
+
+    def rebalance(self, source: str):
+        """
+        Moves the busiest pairs of an overloaded shard to the least loaded shard of the same account,
+        until about half of the difference in load between both shards moved.
+        """
+        now = time.time()
+        if now - self.rebalanced_at.get(source, 0.0) < SHARD_REBALANCE_COOLDOWN:
+            return
+        self.overloaded[source] = 0
+
+        targets = [
+            name for name in self.plan.account_shards(self.plan.account_of(source))
+            if name != source and name in self.last_reports and self.is_alive(name)
+            and self.loop_lag(name) < self.overload_loop_lag / 2
+            and now - self.rebalanced_at.get(name, 0.0) >= SHARD_REBALANCE_COOLDOWN
+        ]
+        if not targets:
+            logger.warning(f"Shard {source} is overloaded (loop lag {self.loop_lag(source):.2f} s) and no shard of its account can take pairs over.")
+            return
+
+        target = min(targets, key=self.load)
+        excess = (self.load(source) - self.load(target)) / 2
+        pair_load = self.pair_load[source]
+
+        # The least busy pair always stays, so a shard is never emptied
+        pairs, moved = [], 0.0
+        for pair_name in sorted(pair_load, key=pair_load.get, reverse=True)[:-1]:
+            if moved >= excess and pairs:
+                break
+            pairs.append(pair_name)
+            moved += pair_load[pair_name]
+
+        if not pairs:
+            return
+
+        self.rebalanced_at[source] = self.rebalanced_at[target] = now
+        logger.info(f"Shard {source} is overloaded (loop lag {self.loop_lag(source):.2f} s), moving {', '.join(pairs)} to {target}.")
+        self.commands[source].put({"command": SHARD_RELEASE, "pairs": pairs, "to": target})
+
+    def hand_over(self, source: str, pairs: List[str], target: str):
+        """Assigns the pairs released by the source shard to the target shard and starts them there."""
+        if not pairs:
+            return
+
+        for pair_name in pairs:
+            self.plan.overrides[pair_name] = target
+        self.moves.append({"timestamp": time.time(), "from": source, "to": target, "pairs": pairs})
+
+        if self.processes[target].is_alive():
+            self.commands[target].put({"command": SHARD_ADOPT, "pairs": pairs})
+        else:
+            logger.warning(f"Shard {target} is not running, it takes {', '.join(pairs)} over when it is restarted.")
+
+    def aggregate(self) -> dict:
+        """Returns the metrics of all shards combined, with a summary per shard."""
+        reports = [report for name, report in self.last_reports.items() if self.is_alive(name)]
+        metrics = [report["metrics"] for report in reports]
+
+        return {
+            "shards": len(self.plan.shard_names()),
+            "shards_alive": sum(self.is_alive(name) for name in self.plan.shard_names()),
+            "pairs": sum(len(report["pairs"]) for report in reports),
+            "iterations": sum(m["iterations"] for m in metrics),
+            "max_loop_lag": max((report["system"]["loop_lag_max"] for report in reports), default=0.0),
+            "max_step_time": max((m["max_step_time"] for m in metrics), default=0.0),
+            "requests_per_interval": sum(m["requests_per_interval"] for m in metrics),
+            "used_weight": max((m["used_weight"] for m in metrics), default=0),
+            "peak_weight_utilization": max((m["peak_weight_utilization"] for m in metrics), default=0.0),
+            "deferred_requests": sum(m["deferred_requests"] for m in metrics),
+            "dropped_requests": sum(m["dropped_requests"] for m in metrics),
+            "rate_limited_responses": sum(m["rate_limited_responses"] for m in metrics),
+            # Every pair is traded by one shard, so the latencies of the shards do not overlap
+            "order_latency": {pair: stats for m in metrics for pair, stats in m["order_latency"].items()},
+            "rebalanced_pairs": sum(len(move["pairs"]) for move in self.moves),
+            "shard_metrics": {
+                name: {
+                    "alive": self.is_alive(name),
+                    "restarts": self.restarts[name],
+                    "pairs": len(report["pairs"]),
+                    "iterations": report["metrics"]["iterations"],
+                    "clock_offset_ms": report["metrics"]["clock_offset_ms"],
+                    "loop_lag_max": round(report["system"]["loop_lag_max"], 4),
+                    "load": round(self.load(name), 4),
+                }
+                for name, report in self.last_reports.items()
+            },
+        }
+
+    async def publish(self):
+        metrics = self.aggregate()
+        status = HEARTBEAT_OK if metrics["shards_alive"] == metrics["shards"] else HEARTBEAT_DEGRADED
+        logger.debug(f"Supervisor heartbeat {status}: {metrics}")
+
+        if self.offline:
+            return
+
+        await publish_heartbeat(self.version, metrics, self.sampler.snapshot(), status=status)
+
+
+def load_accounts(path: str) -> List[ShardAccount]:
+    """
+    Reads the accounts file: a JSON list of ShardAccount fields, e.g.
+    [{"name": "main", "shards": 2}, {"name": "alt", "api_key_env": "ALT_BINANCE_API_KEY", "secret_key_env": "ALT_BINANCE_SECRET_KEY", "pairs": ["ETHUSDC"]}]
+    """
+    with open(path, "r") as f:
+        return [ShardAccount(**account) for account in json.load(f)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trade the configured pairs on several shard processes, one or more per Binance account.")
+    parser.add_argument("--shards", type=int, default=2, help="Number of shards of the account in BINANCE_API_KEY, ignored with --accounts.")
+    parser.add_argument("--accounts", help="JSON file listing the accounts and their number of shards.")
+    args = parser.parse_args()
+
+    accounts = load_accounts(args.accounts) if args.accounts else [ShardAccount(name="main", shards=args.shards)]
+    supervisor = Supervisor(ShardPlan(accounts), version=get_tag())
+
+    try:
+        asyncio.run(supervisor.run())
+    except Exception as e:
+        logger.error(f"Unhandled exception: {e}")
+    finally:
+        logger.info("Supervisor shutdown complete.")
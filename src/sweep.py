@@ -0,0 +1,383 @@
+import argparse
+import csv
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+from backtest import load_symbol_filters, load_ticks
+from globals import *
+from logger import logger
+
+
+PARAMETERS = ("buy_increase_indicator", "profit_target", "timeout", "cooldown", "multiplier")
+RESULTS = ("profit", "sells", "buys", "cancels", "stuck")
+
+
+def resample(times: List[float], prices: List[float], bar_seconds: float = SWEEP_BAR_SECONDS):
+    """
+    Resamples ticks onto a uniform grid of bar_seconds bars.
+
+    Returns:
+        tuple: (open, high, low) arrays. A bar without ticks opens, and stays, at the last price before it.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+
+    index = ((times - times[0]) // bar_seconds).astype(np.int64)
+    n = int(index[-1]) + 1
+
+    high = np.full(n, -np.inf)
+    low = np.full(n, np.inf)
+    np.maximum.at(high, index, prices)
+    np.minimum.at(low, index, prices)
+
+    first_in_bar = np.r_[True, index[1:] != index[:-1]]
+    last_in_bar = np.r_[index[1:] != index[:-1], True]
+    has_ticks = np.zeros(n, dtype=bool)
+    has_ticks[index] = True
+
+    opening = np.empty(n)
+    opening[index[first_in_bar]] = prices[first_in_bar]
+
+    close = np.empty(n)
+    close[index[last_in_bar]] = prices[last_in_bar]
+    previous = np.maximum.accumulate(np.where(has_ticks, np.arange(n), 0))
+    close = close[previous]
+
+    opening = np.where(has_ticks, opening, close)
+    high = np.where(has_ticks, high, close)
+    low = np.where(has_ticks, low, close)
+
+    return opening, high, low
+
+
+class PriceTable:
+    """
+    Bar prices with sparse tables of window maxima and minima.
+
+    The open of a bar is the price a strategy evaluated in that bar sees, the high and low decide fills.
+
+    first_at_or_above and first_at_or_below answer "first bar in [start, end) that reaches the
+    level" for a whole vector of (start, end, level) queries in O(log window) array operations.
+    """
+
+    def __init__(self, opening: np.ndarray, high: np.ndarray, low: np.ndarray, max_window: int):
+        self.opening = opening
+        self.high = high
+        self.low = low
+        self.n = len(opening)
+        self.suffix_low = np.minimum.accumulate(low[::-1])[::-1]
+
+        levels = max(1, math.ceil(math.log2(max(2, min(max_window, self.n)))))
+        self.max_tables = [high]
+        self.min_tables = [low]
+        for k in range(1, levels + 1):
+            half = 1 << (k - 1)
+            if (1 << k) > self.n:
+                break
+            self.max_tables.append(np.maximum(self.max_tables[-1][:-half], self.max_tables[-1][half:]))
+            self.min_tables.append(np.minimum(self.min_tables[-1][:-half], self.min_tables[-1][half:]))
+
+    def _first(self, tables, start, end, level, above: bool) -> np.ndarray:
+        end = np.minimum(end, self.n)
+        position = start.copy()
+
+        for k in range(len(tables) - 1, -1, -1):
+            table = tables[k]
+            candidate = position + (1 << k)
+            block = table[np.minimum(position, len(table) - 1)]
+            misses = block < level if above else block > level
+            position = np.where((candidate <= end) & misses, candidate, position)
+
+        return np.where(position < end, position, -1)
+
+    def first_at_or_above(self, start, end, level) -> np.ndarray:
+        """Index of the first bar in [start, end) whose high reaches level, or -1."""
+        return self._first(self.max_tables, start, end, level, above=True)
+
+    def first_at_or_below(self, start, end, level) -> np.ndarray:
+        """Index of the first bar in [start, end) whose low reaches level, or -1."""
+        return self._first(self.min_tables, start, end, level, above=False)
+
+
+def make_grid(**ranges) -> Dict[str, np.ndarray]:
+    """
+    Builds the cartesian product of the given parameter values.
+
+    Args:
+        **ranges: One sequence of values per name in PARAMETERS.
+
+    Returns:
+        dict: Flat arrays of equal length, one per parameter.
+    """
+    mesh = np.meshgrid(*(np.asarray(ranges[name], dtype=np.float64) for name in PARAMETERS), indexing="ij")
+    return {name: values.ravel() for name, values in zip(PARAMETERS, mesh)}
+
+
+def evaluate(table: PriceTable, grid: Dict[str, np.ndarray], tick_size: float, step_size: float, min_notional: float,
+             bar_seconds: float = SWEEP_BAR_SECONDS) -> Dict[str, np.ndarray]:
+    """
+    Replays the MONITORING -> SELLING -> COOLDOWN cycle of Trader.process_strategy for every parameter set at once.
+
+    Every iteration advances each parameter set by one sell order: the sell and buy prices are computed
+    like calculate_buy_and_sell_price and rounded like limit_order, the sell fills if a bar high reaches
+    it before the timeout, and a filled cycle earns the profit of process_strategy once a later bar low
+    reaches the buy price. Timeouts cancel the order, and the MAX_CANCELLED_ORDERS-th cancel in a row
+    re-sells at the current price with the buy price lowered by CANCELED_PROFIT, as live. Wallet
+    balances are not modelled, every sell is assumed to be covered. A parameter set whose buy order
+    would fall under min_notional gets stuck in SELLING, as live, and stops trading.
+    The result is meant for ranking; backtest.py replays the winners tick by tick.
+
+    Returns:
+        dict: Arrays named after RESULTS, aligned with the grid.
+    """
+    size = len(grid["profit_target"])
+    n = table.n
+    opening = table.opening
+
+    buy_increase_indicator = grid["buy_increase_indicator"]
+    profit_target = grid["profit_target"]
+    timeout_bars = np.ceil(grid["timeout"] / bar_seconds).astype(np.int64)
+    cooldown_bars = np.ceil(grid["cooldown"] / bar_seconds).astype(np.int64)
+    order_notional = min_notional * grid["multiplier"]
+
+    position = np.zeros(size, dtype=np.int64)
+    needs_order = np.ones(size, dtype=bool)
+    placed_at = np.zeros(size, dtype=np.int64)
+    sell_price = np.zeros(size)
+    sell_limit = np.zeros(size)
+    buy_price = np.zeros(size)
+    quantity = np.zeros(size)
+    cancelled_in_row = np.zeros(size, dtype=np.int64)
+
+    profit = np.zeros(size)
+    sells = np.zeros(size, dtype=np.int64)
+    buys = np.zeros(size, dtype=np.int64)
+    cancels = np.zeros(size, dtype=np.int64)
+    stuck = np.zeros(size, dtype=bool)
+
+    floor_to_tick = lambda price: np.floor(price / tick_size) * tick_size
+
+    while True:
+        active = ~stuck & (position < n)
+        if not active.any():
+            break
+
+        # MONITORING: place a new sell order at the current bar
+        monitoring = np.flatnonzero(active & needs_order)
+        if monitoring.size:
+            current = opening[position[monitoring]]
+            sell = np.round(current * (1 + buy_increase_indicator[monitoring]) / tick_size) * tick_size
+            buy = np.round(profit_target[monitoring] * current / tick_size) * tick_size
+            amount = np.floor(order_notional[monitoring] / current / step_size) * step_size
+            limit = floor_to_tick(sell)
+
+            valid = (order_notional[monitoring] / current * buy >= min_notional) & (amount * limit >= min_notional)
+
+            placed = monitoring[valid]
+            placed_at[placed] = position[placed]
+            sell_price[placed] = limit[valid]
+            sell_limit[placed] = limit[valid]
+            buy_price[placed] = buy[valid]
+            quantity[placed] = amount[valid]
+            needs_order[placed] = False
+
+            position[monitoring[~valid]] += 1
+
+        # SELLING: the outstanding sell either fills or is cancelled at its timeout
+        selling = np.flatnonzero(active & ~needs_order)
+        if not selling.size:
+            continue
+
+        deadline = placed_at[selling] + timeout_bars[selling]
+        filled_at = table.first_at_or_above(placed_at[selling], deadline, sell_limit[selling])
+        filled = filled_at >= 0
+
+        timed_out = selling[~filled]
+        cancel_at = deadline[~filled]
+        ended = cancel_at >= n
+        position[timed_out[ended]] = n
+
+        timed_out, cancel_at = timed_out[~ended], cancel_at[~ended]
+        cancels[timed_out] += 1
+        cancelled_in_row[timed_out] += 1
+
+        immediate = cancelled_in_row[timed_out] == MAX_CANCELLED_ORDERS
+        resell, resell_at = timed_out[immediate], cancel_at[immediate]
+        market = opening[resell_at]
+        resell_limit = floor_to_tick(market)
+        resell_placed = quantity[resell] * resell_limit >= min_notional
+        stuck[resell[~resell_placed]] = True
+        resell, resell_at = resell[resell_placed], resell_at[resell_placed]
+        placed_at[resell] = resell_at
+        sell_price[resell] = market[resell_placed]
+        sell_limit[resell] = resell_limit[resell_placed]
+        buy_price[resell] *= CANCELED_PROFIT
+
+        back_to_monitoring = timed_out[~immediate]
+        position[back_to_monitoring] = cancel_at[~immediate] + 1
+        needs_order[back_to_monitoring] = True
+
+        # Sell filled: place the buy-back order and wait for the cooldown or the buy fill
+        done, fill_at = selling[filled], filled_at[filled]
+        cancelled_in_row[done] = 0
+        sells[done] += 1
+
+        buy_limit = floor_to_tick(buy_price[done])
+        buy_placed = quantity[done] * buy_limit >= min_notional
+        stuck[done[~buy_placed]] = True
+        done, fill_at, buy_limit = done[buy_placed], fill_at[buy_placed], buy_limit[buy_placed]
+
+        amount, sold, bought = quantity[done], sell_price[done], buy_price[done]
+        fees = amount * sold * FEE_SELL_BINANCE_VALUE + amount * bought * FEE_SELL_BINANCE_VALUE
+        cycle_profit = (sold * amount - bought * amount) - fees
+
+        buy_fills = (fill_at + 1 < n) & (table.suffix_low[np.minimum(fill_at + 1, n - 1)] <= buy_limit)
+        profit[done[buy_fills]] += cycle_profit[buy_fills]
+        buys[done[buy_fills]] += 1
+
+        cooldown_end = np.maximum(placed_at[done] + cooldown_bars[done], fill_at + 1)
+        bought_at = table.first_at_or_below(fill_at + 1, cooldown_end, buy_limit)
+        position[done] = np.where(bought_at >= 0, bought_at, cooldown_end) + 1
+        needs_order[done] = True
+
+    return {"profit": profit, "sells": sells, "buys": buys, "cancels": cancels, "stuck": stuck}
+
+
+_table: Optional[PriceTable] = None
+
+
+def _init_worker(opening, high, low, max_window):
+    global _table
+    _table = PriceTable(opening, high, low, max_window)
+
+
+def _evaluate_shard(grid, tick_size, step_size, min_notional, bar_seconds):
+    return evaluate(_table, grid, tick_size, step_size, min_notional, bar_seconds)
+
+
+def sweep(opening, high, low, grid: Dict[str, np.ndarray], tick_size: float, step_size: float, min_notional: float,
+          bar_seconds: float = SWEEP_BAR_SECONDS, workers: int = None) -> Dict[str, np.ndarray]:
+    """
+    Evaluates the grid in shards on a process pool, one shard per worker.
+
+    Returns:
+        dict: The grid parameters and the RESULTS arrays, ranked by profit.
+    """
+    workers = workers or os.cpu_count() or 1
+    size = len(grid["profit_target"])
+    max_window = int(max(grid["timeout"].max(), grid["cooldown"].max()) / bar_seconds) + 2
+
+    shards = [
+        {name: values[indices] for name, values in grid.items()}
+        for indices in np.array_split(np.arange(size), min(workers, size))
+    ]
+
+    with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_worker, initargs=(opening, high, low, max_window)) as executor:
+        results = list(executor.map(
+            _evaluate_shard, shards,
+            [tick_size] * len(shards), [step_size] * len(shards), [min_notional] * len(shards), [bar_seconds] * len(shards),
+        ))
+
+    table = {name: np.concatenate([shard[name] for shard in shards]) for name in PARAMETERS}
+    table.update({name: np.concatenate([result[name] for result in results]) for name in RESULTS})
+
+    order = np.argsort(-table["profit"], kind="stable")
+    return {name: values[order] for name, values in table.items()}
+
+
+def strategy_config(ranked: Dict[str, np.ndarray], row: int = 0) -> dict:
+    """Returns one row of the ranked table in the format stored under STRATEGIES_PATH/<strategy>."""
+    return {
+        "buy_increase_indicator": float(ranked["buy_increase_indicator"][row]),
+        "profit_target": float(ranked["profit_target"][row]),
+        "timeout": int(ranked["timeout"][row]),
+        "cooldown": int(ranked["cooldown"][row]),
+        "multiplier": float(ranked["multiplier"][row]),
+    }
+
+
+def print_ranking(ranked: Dict[str, np.ndarray], top: int = SWEEP_TOP_RESULTS):
+    header = f"{'#':>4} {'buy_incr':>9} {'profit_tg':>9} {'timeout':>8} {'cooldown':>8} {'multiplr':>8} {'profit':>14} {'sells':>6} {'buys':>6} {'cancels':>7} {'stuck':>5}"
+
+    logger.info("=" * len(header))
+    logger.info(header)
+    logger.info("-" * len(header))
+    for row in range(min(top, len(ranked["profit"]))):
+        logger.info(
+            f"{row + 1:>4} {ranked['buy_increase_indicator'][row]:>9.5f} {ranked['profit_target'][row]:>9.5f} "
+            f"{int(ranked['timeout'][row]):>8} {int(ranked['cooldown'][row]):>8} {ranked['multiplier'][row]:>8.3f} "
+            f"{ranked['profit'][row]:>14.8f} {ranked['sells'][row]:>6} {ranked['buys'][row]:>6} {ranked['cancels'][row]:>7} {str(bool(ranked['stuck'][row])):>5}"
+        )
+    logger.info("=" * len(header))
+
+
+def save_ranking(ranked: Dict[str, np.ndarray], path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(PARAMETERS + RESULTS)
+        for row in range(len(ranked["profit"])):
+            writer.writerow([ranked[name][row] for name in PARAMETERS + RESULTS])
+
+
+def parse_values(text: str) -> np.ndarray:
+    """Parses "start:stop:step" (stop inclusive) or a comma separated list of values."""
+    if ":" in text:
+        start, stop, step = (float(part) for part in text.split(":"))
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(value) for value in text.split(",")])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank strategy parameter combinations on historical Binance prices.")
+    parser.add_argument("ticks_path", help="Binance kline, trades or aggTrades CSV file.")
+    parser.add_argument("--symbol", required=True, help="Trading pair, e.g. BTCUSDC.")
+    parser.add_argument("--format", default=TICK_FORMAT_KLINES, choices=[TICK_FORMAT_KLINES, TICK_FORMAT_TRADES, TICK_FORMAT_AGG_TRADES])
+    parser.add_argument("--exchange-info", help="Exchange info snapshot with the symbol filters (see EXCHANGE_INFO_SNAPSHOT_PATH).")
+    parser.add_argument("--tick-size", type=float, default=0.01)
+    parser.add_argument("--step-size", type=float, default=0.00001)
+    parser.add_argument("--min-notional", type=float, default=5.0)
+    parser.add_argument("--buy-increase-indicator", type=parse_values, default="0.0005:0.003:0.0005")
+    parser.add_argument("--profit-target", type=parse_values, default="0.990:0.999:0.001")
+    parser.add_argument("--timeout", type=parse_values, default="300,600,1000,1800,3600")
+    parser.add_argument("--cooldown", type=parse_values, default="300,600,1000,1800,3600")
+    parser.add_argument("--multiplier", type=parse_values, default="1.05,1.1,1.2,1.5")
+    parser.add_argument("--bar-seconds", type=float, default=SWEEP_BAR_SECONDS)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to the number of cores.")
+    parser.add_argument("--top", type=int, default=SWEEP_TOP_RESULTS)
+    parser.add_argument("--csv", help="Write the full ranked table to this file.")
+    parser.add_argument("--push", choices=[CRAZY_GIRL, POOR_ORPHAN, SENSIBLE_GUY], help="Write the best parameters to this strategy in Firebase.")
+    args = parser.parse_args()
+
+    filters = load_symbol_filters(args.exchange_info, args.symbol) if args.exchange_info else None
+    tick_size = filters.tick_size if filters else args.tick_size
+    step_size = filters.step_size if filters else args.step_size
+    min_notional = filters.min_notional if filters else args.min_notional
+
+    times, prices = load_ticks(args.ticks_path, args.format)
+    opening, high, low = resample(times, prices, args.bar_seconds)
+
+    grid = make_grid(
+        buy_increase_indicator=args.buy_increase_indicator,
+        profit_target=args.profit_target,
+        timeout=args.timeout,
+        cooldown=args.cooldown,
+        multiplier=args.multiplier,
+    )
+
+    started = time.perf_counter()
+    ranked = sweep(opening, high, low, grid, tick_size, step_size, min_notional, args.bar_seconds, args.workers)
+    elapsed = time.perf_counter() - started
+
+    logger.info(f"Evaluated {len(ranked['profit'])} parameter sets on {len(opening)} bars of {args.bar_seconds}s in {elapsed:.2f}s.")
+    print_ranking(ranked, args.top)
+
+    if args.csv:
+        save_ranking(ranked, args.csv)
+        logger.info(f"Ranked table written to {args.csv}.")
+
+    if args.push:
+        from firebase import FirebaseManager
+        FirebaseManager().push_strategy(args.push, strategy_config(ranked))
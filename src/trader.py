@@ -1,11 +1,21 @@
 import asyncio
+import os
+from collections import defaultdict
 from copy import copy
+from typing import Callable, List, Optional
 from datetime import datetime, timedelta
 from data_classes import CryptoPair, CryptoPairs, Order
 from firebase import FirebaseManager
+from order_batch import OrderBatch
 from globals import *
 from binance_api import BinanceManager
+from bootstrap import Bootstrap
+from state_store import StateStore
+from market_data import MarketDataStream
 from binance.client import Client
+from logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class Trader:
@@ -24,100 +34,317 @@ class Trader:
             return
         self._initialized = True
 
-    def start_trade(self) -> CryptoPairs:
-        loop = asyncio.get_event_loop()
+        self._exchange = None
+        self._order_store = None
+        self.clock = datetime.now
+
+        self.market_stream = None
+        self.startup = None
+        self.state_store = None
+        self.stream_tasks = []
+        self.next_poll = {}
+        self.order_keys = {}
+        # (pair, strategy) in MONITORING whose last evaluation placed no order
+        self.placement_failed = set()
+        self.wake_events = defaultdict(asyncio.Event)
+
+    @property
+    def exchange(self) -> BinanceManager:
+        """Exchange used by the state machine. Defaults to BinanceManager, the backtest swaps in a simulator."""
+        return self._exchange if self._exchange is not None else BinanceManager()
+
+    @exchange.setter
+    def exchange(self, exchange):
+        self._exchange = exchange
+
+    @property
+    def order_store(self) -> FirebaseManager:
+        """Store the state machine persists orders to. Defaults to FirebaseManager."""
+        return self._order_store if self._order_store is not None else FirebaseManager()
+
+    @order_store.setter
+    def order_store(self, order_store):
+        self._order_store = order_store
+
+    async def start_trade(self, on_ready: Optional[Callable[[CryptoPair], None]] = None, owns: Optional[Callable[[str], bool]] = None) -> CryptoPairs:
+        loop = asyncio.get_running_loop()
         FirebaseManager().setup_firebase(loop)
-        cryptoPairs = BinanceManager().fetch_pairs()
+        return await self.bootstrap(on_ready=on_ready, owns=owns)
+
+    async def bootstrap(self, on_ready: Optional[Callable[[CryptoPair], None]] = None, market_stream_url: str = MARKET_DATA_STREAM_URL,
+                        owns: Optional[Callable[[str], bool]] = None) -> CryptoPairs:
+        """
+        Starts the exchange transport, the streams and the traded pairs (see Bootstrap).
+
+        Args:
+            on_ready (callable): Called with every pair as soon as it is initialized, e.g. TradingScheduler.add_pair.
+            market_stream_url (str): Combined market data stream endpoint.
+            owns (callable): Tells whether a pair is traded by this process; all pairs are by default.
+
+        Returns:
+            CryptoPairs: The initialized pairs.
+        """
+        await BinanceManager().start()
+
+        self.state_store = StateStore(os.getenv(STATE_STORE_PATH, DEFAULT_STATE_STORE))
+        self.state_store.open()
+
+        self.startup = Bootstrap(BinanceManager(), on_ready=on_ready, state_store=self.state_store, owns=owns)
+        symbols = await self.startup.prepare()
+        self.start_market_stream(symbols, market_stream_url)
+
+        BinanceManager().user_stream.add_listener(self.on_execution_report)
+        self.stream_tasks.append(asyncio.create_task(BinanceManager().user_stream.run()))
 
-        for cryptoPair in cryptoPairs.pairs:
-            BinanceManager().analyze_orders(cryptoPair.pair, add_missing_orders=False)
+        cryptoPairs = await self.startup.start_pairs()
+        self.startup.report()
 
         return cryptoPairs
 
-    async def run_trading_cycle(self, cryptoPairs, version):
-        tasks = []
-        for crypto_pair in cryptoPairs.pairs:
-            self.update_crypto_amounts(crypto_pair)
-            tasks.append(asyncio.create_task(self.handle_strategies(crypto_pair)))
+    def start_market_stream(self, symbols: List[str], url: str = MARKET_DATA_STREAM_URL):
+        """Streams the prices of the symbols, starting the market data stream on the first symbols."""
+        if self.market_stream:
+            self.market_stream.set_symbols(set(self.market_stream.symbols) | set(symbols))
+        elif symbols:
+            self.market_stream = MarketDataStream(
+                snapshot=BinanceManager().price_snapshot,
+                symbols=symbols,
+                on_trigger=self.wake,
+                url=url,
+            )
+            self.stream_tasks.append(asyncio.create_task(self.market_stream.run()))
 
-        if tasks:
-            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
-        else:
-            logger.info("No tasks to execute, waiting for conditions to be met.")
-            await asyncio.sleep(5)
+    async def adopt_pairs(self, pair_names: List[str], on_ready: Callable[[CryptoPair], None], market_stream_url: str = MARKET_DATA_STREAM_URL) -> CryptoPairs:
+        """
+        Starts trading pairs handed over by another shard of the supervisor.
+
+        The journaled state of the pairs is read again from the shared state store, so each pair
+        resumes where the previous shard left it.
+
+        Args:
+            pair_names (list): Names of the pairs to adopt.
+            on_ready (callable): Called with every pair as soon as it is initialized, e.g. TradingScheduler.add_pair.
 
-        FirebaseManager().send_heartbeat(version=version)
+        Returns:
+            CryptoPairs: The adopted pairs.
+        """
+        self.state_store.reload(pair_names)
 
-    def update_crypto_amounts(self, crypto_pair: CryptoPair):
-        crypto_amounts = BinanceManager().get_crypto_amounts(crypto_pair.pair)
+        adoption = Bootstrap(BinanceManager(), on_ready=on_ready, state_store=self.state_store, owns=set(pair_names).__contains__)
+        symbols = await adoption.prepare()
+        self.start_market_stream(symbols, market_stream_url)
+
+        cryptoPairs = await adoption.start_pairs(analyze_orders=False)
+        adoption.report()
+
+        return cryptoPairs
+
+    def release_pair(self, cryptoPair: CryptoPair):
+        """Journals the state of a pair removed from the scheduler and stops following its prices and orders."""
+        if self.state_store:
+            self.state_store.save(cryptoPair)
+
+        for key in [key for key in self.next_poll if key[0] == cryptoPair.pair]:
+            self.next_poll.pop(key, None)
+            self.placement_failed.discard(key)
+            if self.market_stream:
+                self.market_stream.unwatch(key)
+        for order_id in [order_id for order_id, key in self.order_keys.items() if key[0] == cryptoPair.pair]:
+            self.order_keys.pop(order_id)
+
+        if self.market_stream:
+            self.market_stream.set_symbols(symbol for symbol in self.market_stream.symbols if symbol != cryptoPair.pair)
+
+    async def update_crypto_amounts(self, crypto_pair: CryptoPair):
+        crypto_amounts = await self.exchange.get_crypto_amounts(crypto_pair.pair)
         crypto_pair.crypto_amount_free = crypto_amounts[CRYPTO_AMOUNT_FREE]
         crypto_pair.crypto_amount_locked = crypto_amounts[CRYPTO_AMOUNT_LOCKED]
 
-    def calculate_quantity(self, strategy: TradeStrategy, cryptoPair: CryptoPair):
-        global PAIRS
+    async def calculate_quantity(self, strategy: TradeStrategy, cryptoPair: CryptoPair):
+        logger.debug("Calculating quantity for trading for %s.", cryptoPair.pair, extra={"pair": cryptoPair.pair})
 
-        logger.debug(f"Calculating quantity for trading for {cryptoPair.pair}.")
+        quantity_of_crypto = ((cryptoPair.min_notional * strategy.multiplier)) / await self.exchange.get_price(cryptoPair.pair)
 
-        quantity_of_crypto = ((cryptoPair.min_notional * strategy.multiplier)) / BinanceManager().get_price(cryptoPair.pair)
-
-        logger.debug(f"{cryptoPair.pair} for trading: {quantity_of_crypto}.")
+        logger.debug("%s for trading: %s.", cryptoPair.pair, quantity_of_crypto, extra={"pair": cryptoPair.pair})
 
         return quantity_of_crypto
 
-    async def handle_strategies(self, cryptoPair: CryptoPair):
-        global STRATEGIES
-        global PAIRS
-        strategy_list = [STRATEGIES.strategies[POOR_ORPHAN], STRATEGIES.strategies[CRAZY_GIRL], STRATEGIES.strategies[SENSIBLE_GUY]]
+    async def step(self, cryptoPair: CryptoPair, strategy: TradeStrategy, config: Optional[ConfigSnapshot] = None):
+        """
+        Runs one evaluation of the strategy for the pair: refreshes the wallet amounts and,
+        if the allocated value is tradable or the strategy is waiting on an order, advances its state machine.
 
-        tasks = []
+        Args:
+            cryptoPair (CryptoPair): The pair to evaluate.
+            strategy (TradeStrategy): The strategy, taken from config.
+            config (ConfigSnapshot): The config version the whole evaluation reads. Defaults to the current one.
+        """
+        global CONFIG
 
-        for strategy in strategy_list:
-            allocation = float(PAIRS.pairs[cryptoPair.pair]['strategy_allocation'][strategy.name])
+        config = config or CONFIG.snapshot
 
-            cryptoPair.value = float(cryptoPair.crypto_amount_free) * float(
-                BinanceManager().get_price(cryptoPair.pair)
-            )
+        await self.update_crypto_amounts(cryptoPair)
 
-            crypto_value = allocation * cryptoPair.value
+        cryptoPair.value = float(cryptoPair.crypto_amount_free) * float(
+            await self.exchange.get_price(cryptoPair.pair)
+        )
 
-            is_crypto_value_valid = crypto_value > cryptoPair.min_notional
-            is_in_selling_or_cooldown = cryptoPair.current_state[strategy.name] in {TradeState.SELLING, TradeState.COOLDOWN}
+        allocation = config.allocation(cryptoPair.pair, strategy.name)
+        crypto_value = allocation * cryptoPair.value
 
-            if is_crypto_value_valid or is_in_selling_or_cooldown:
+        is_crypto_value_valid = crypto_value > cryptoPair.min_notional
+        is_in_selling_or_cooldown = cryptoPair.current_state[strategy.name] in {TradeState.SELLING, TradeState.COOLDOWN}
 
-                logger.debug(f"Creating task for strategy {strategy.name} on pair {cryptoPair.pair} with allocation {allocation}")
+        if is_crypto_value_valid or is_in_selling_or_cooldown:
+            logger.debug("Processing strategy %s on pair %s with allocation %s", strategy.name, cryptoPair.pair, allocation, extra={"pair": cryptoPair.pair})
+            await self.process_strategy(cryptoPair=cryptoPair, strategy=strategy, allocation=allocation)
+            if self.state_store:
+                self.state_store.save(cryptoPair)
+            self.arm_price_trigger(cryptoPair, strategy)
+        else:
+            logger.debug("Skipping strategy %s for pair %s due to insufficient value in wallet %s.", strategy.name, cryptoPair.pair, crypto_value, extra={"pair": cryptoPair.pair})
+
+    def next_wakeup(self, cryptoPair: CryptoPair, strategy: TradeStrategy) -> float:
+        """
+        Returns the timestamp at which the strategy has to be evaluated again if no event wakes it earlier.
+
+        While the market data stream is connected, a strategy waiting in SELLING or COOLDOWN sleeps
+        until its deadline (sell timeout, cooldown expiry or fallback poll). Otherwise it is polled
+        every SCHEDULER_POLL_INTERVAL seconds; in MONITORING, the next price of the pair wakes it earlier.
+        """
+        key = (cryptoPair.pair, strategy.name)
+        is_in_selling_or_cooldown = cryptoPair.current_state[strategy.name] in {TradeState.SELLING, TradeState.COOLDOWN}
+
+        if is_in_selling_or_cooldown and self.market_stream and self.market_stream.connected and key in self.next_poll:
+            return self.next_poll[key]
+
+        return self.clock().timestamp() + SCHEDULER_POLL_INTERVAL
+
+    def wake(self, key):
+        """Wakes the (pair, strategy) task before its deadline."""
+        self.wake_events[key].set()
+
+    def arm_price_trigger(self, cryptoPair: CryptoPair, strategy: TradeStrategy):
+        """
+        Registers the price band and the next deadline that matter for the current state of the strategy.
+
+        SELLING wakes up when the price reaches the sell price or the sell order times out,
+        COOLDOWN wakes up when the price drops to the buy-back price or the cooldown expires.
+        Both also wake up as soon as the user-data stream reports the final status of their order.
+        MONITORING wakes up on the next price of the pair, so a new tick is evaluated right away
+        rather than at the next poll. If its last evaluation could not place an order (balance,
+        min_notional), the next tick would fail the same way, so it waits for the poll instead.
+        """
+        if not self.market_stream:
+            return
 
-                task = asyncio.create_task(
-                    self.process_strategy(
-                        cryptoPair=cryptoPair,
-                        strategy=strategy
-                    )
-                )
-                tasks.append(task)
-            else:
-                logger.debug(f"Skipping strategy {strategy.name} for pair {cryptoPair.pair} due to insufficient value in wallet {crypto_value}.")
+        key = (cryptoPair.pair, strategy.name)
+        state = cryptoPair.current_state[strategy.name]
+        now = self.clock().timestamp()
+        deadline = now + STREAM_FALLBACK_POLL_INTERVAL
 
-        await asyncio.gather(*tasks)
+        if state == TradeState.SELLING and cryptoPair.active_sell_order:
+            self.order_keys[int(cryptoPair.active_sell_order.order_id)] = key
+            self.market_stream.watch(key, cryptoPair.pair, high=float(cryptoPair.active_sell_order.sell_price))
+            deadline = min(deadline, int(cryptoPair.active_sell_order.timestamp) / 1000 + strategy.timeout)
+        elif state == TradeState.COOLDOWN:
+            if cryptoPair.active_buy_order:
+                self.order_keys[int(cryptoPair.active_buy_order.order_id)] = key
+                self.market_stream.watch(key, cryptoPair.pair, low=float(cryptoPair.active_buy_order.buy_price))
+            if cryptoPair.executed_sell_order:
+                deadline = min(deadline, int(cryptoPair.executed_sell_order.timestamp) / 1000 + strategy.cooldown)
+        elif state == TradeState.MONITORING and key not in self.placement_failed:
+            self.market_stream.watch(key, cryptoPair.pair)
+        else:
+            self.market_stream.unwatch(key)
+
+        if state != TradeState.MONITORING:
+            self.placement_failed.discard(key)
 
-    async def process_strategy(self, cryptoPair: CryptoPair, strategy: TradeStrategy):
-        global PAIRS
+        self.next_poll[key] = deadline
 
-        logger.debug(f"Strategy: {strategy.name} for {cryptoPair.pair} - Current state: {cryptoPair.current_state[strategy.name]}")
+    def on_execution_report(self, order: dict):
+        """Wakes the strategy waiting on an order as soon as the user-data stream reports its final status."""
+        if order[STATUS] not in TERMINAL_ORDER_STATUSES:
+            return
 
-        BinanceManager().monitor_buy_orders(cryptoPair=cryptoPair, strategy=strategy)
+        key = self.order_keys.pop(int(order[ORDER_ID]), None)
+        if key:
+            logger.debug("Order %s %s, waking strategy %s on %s.", order[ORDER_ID], order[STATUS], key[1], key[0], extra={"pair": key[0]})
+            self.wake(key)
+
+    async def replace_expired_sell_order(self, cryptoPair: CryptoPair, strategy: TradeStrategy) -> bool:
+        """
+        Handles the MAX_CANCELLED_ORDERS-th timeout of a sell order in a row: the order is cancelled and
+        its amount offered again at the market price, with the buy-back price lowered by CANCELED_PROFIT.
+
+        Both go out as one cancel-replace request, so the amount is back on the book after one round
+        trip instead of a cancellation followed by a new order.
+
+        Returns:
+            bool: True if the expired order was cancelled, False if it was filled first or could not be cancelled.
+        """
+        expired_order = cryptoPair.active_sell_order
+        sell_price = await self.exchange.get_price(cryptoPair.pair)
+
+        batch = OrderBatch()
+        batch.replace(cryptoPair, expired_order.order_id, side=Client.SIDE_SELL, quantity=expired_order.amount, price=sell_price, strategy=strategy.name)
+        canceled, placed = await self.exchange.submit_batch(batch)
+
+        if canceled.status == FILLED:
+            logger.debug(f"Cannot cancel order {expired_order.order_id} already filled")
+            return False
+        if canceled.status != CANCELED:
+            logger.error(f"Failed to cancel sell order {expired_order.order_id} for {cryptoPair.pair} due to timeout.")
+            return False
+
+        logger.info(f"Active_sell_order marking as cancelled in db {expired_order}")
+        self.order_store.add_order_to_firebase(expired_order)
+        logger.warning(f"Sell order {expired_order.order_id} for {cryptoPair.pair} canceled due to timeout.")
+        cryptoPair.cancelled_orders += 1
+
+        if not placed.ok:
+            logger.error(f"Failed to place immediate sell order for {cryptoPair.pair}: {placed.error}")
+            cryptoPair.current_state[strategy.name] = TradeState.MONITORING
+            return True
+
+        sell_order = placed.order
+        logger.info(f"Immediate sell order placed for {cryptoPair.pair} at market price {sell_price}.")
+        cryptoPair.active_sell_order = Order(
+            symbol=sell_order[SYMBOL],
+            order_id=sell_order[ORDER_ID],
+            sell_price=sell_price,
+            buy_price=expired_order.buy_price * CANCELED_PROFIT,
+            order_type=sell_order[SIDE],
+            amount=float(sell_order[ORIG_QTY]),
+            timestamp=sell_order[WORKING_TIME],
+            strategy=strategy.name,
+            status=sell_order[STATUS],
+            profit=0,
+        )
+        self.order_store.add_order_to_firebase(cryptoPair.active_sell_order)
+        logger.info(f"Updated sell order placed for {cryptoPair.pair} after multiple cancellations.")
+        return True
+
+    async def process_strategy(self, cryptoPair: CryptoPair, strategy: TradeStrategy, allocation: float):
+        logger.debug("Strategy: %s for %s - Current state: %s", strategy.name, cryptoPair.pair, cryptoPair.current_state[strategy.name], extra={"pair": cryptoPair.pair})
+
+        await self.exchange.monitor_buy_orders(cryptoPair=cryptoPair, strategy=strategy, order_store=self.order_store)
 
         if cryptoPair.current_state[strategy.name] == TradeState.MONITORING:
 
-            buy_price, sell_price = BinanceManager().calculate_buy_and_sell_price(crypto_pair=cryptoPair, strategy=strategy)
-            quantity_of_crypto = self.calculate_quantity(strategy=strategy, cryptoPair=cryptoPair)
+            buy_price, sell_price = await self.exchange.calculate_buy_and_sell_price(crypto_pair=cryptoPair, strategy=strategy)
+            tick_at = self.exchange.price_received_at(cryptoPair.pair)
+            quantity_of_crypto = await self.calculate_quantity(strategy=strategy, cryptoPair=cryptoPair)
 
-            if BinanceManager().validate_price_order(cryptoPair=cryptoPair, quantity_of_crypto=quantity_of_crypto, buy_price=buy_price):
+            if self.exchange.validate_price_order(cryptoPair=cryptoPair, quantity_of_crypto=quantity_of_crypto, buy_price=buy_price):
 
-                sell_order = await BinanceManager().limit_order(
+                sell_order = await self.exchange.limit_order(
                     cryptoPair=cryptoPair,
                     quantity=quantity_of_crypto,
                     price=sell_price,
-                    side=Client.SIDE_SELL
+                    side=Client.SIDE_SELL,
+                    tick_at=tick_at,
                 )
 
                 if sell_order:
@@ -135,79 +362,47 @@ class Trader:
                                 profit = 0,
                             )
 
-                    from firebase import FirebaseManager
-                    FirebaseManager().add_order_to_firebase(cryptoPair.active_sell_order)
+                    self.order_store.add_order_to_firebase(cryptoPair.active_sell_order)
 
                     logger.info(f"Sell order placed for {cryptoPair.pair} at price {sell_price}")
 
                     cryptoPair.current_state[strategy.name] = TradeState.SELLING
-                    logger.debug(f"State after placing sell order for {cryptoPair.pair}: {cryptoPair.current_state[strategy.name]}")
+                    logger.debug("State after placing sell order for %s: %s", cryptoPair.pair, cryptoPair.current_state[strategy.name], extra={"pair": cryptoPair.pair})
+
+            if cryptoPair.current_state[strategy.name] == TradeState.MONITORING:
+                self.placement_failed.add((cryptoPair.pair, strategy.name))
 
         elif cryptoPair.current_state[strategy.name] == TradeState.SELLING:
 
-            sell_order = BinanceManager().get_order_status(cryptoPair.pair, order_id=cryptoPair.active_sell_order.order_id)
+            sell_order = await self.exchange.get_order_status(cryptoPair.pair, order_id=cryptoPair.active_sell_order.order_id)
 
-            elapsed_time = (datetime.now() - datetime.fromtimestamp(int(cryptoPair.active_sell_order.timestamp) / 1000)).total_seconds()
+            elapsed_time = (self.clock() - datetime.fromtimestamp(int(cryptoPair.active_sell_order.timestamp) / 1000)).total_seconds()
 
-            BinanceManager().print_order(cryptoPair.pair, sell_order=sell_order)
+            await self.exchange.print_order(cryptoPair.pair, sell_order=sell_order)
 
             if elapsed_time > strategy.timeout:
-                canceled_order = await BinanceManager().cancel_order(cryptoPair.pair, cryptoPair.active_sell_order.order_id)
-                if canceled_order == FILLED:
-                    logger.debug(f"Cannot cancel order {cryptoPair.active_sell_order.order_id} already filled")
-                elif canceled_order:
-                    cryptoPair.active_sell_order.status = CANCELED
-                    from firebase import FirebaseManager
-                    logger.info(f"Active_sell_order marking as cancelled in db {cryptoPair.active_sell_order}")
-                    FirebaseManager().add_order_to_firebase(
-                        cryptoPair.active_sell_order
-                    )
-                    logger.warning(f"Sell order {cryptoPair.active_sell_order.order_id} for {cryptoPair.pair} canceled due to timeout.")
-                    cryptoPair.cancelled_orders += 1
-                    if cryptoPair.cancelled_orders == MAX_CANCELLED_ORDERS:
-
-                        cryptoPair.active_sell_order.sell_price = BinanceManager().get_price(cryptoPair.pair)
-                        cryptoPair.active_sell_order.buy_price *= CANCELED_PROFIT
-
-
-                        sell_order = await BinanceManager().limit_order(
-                            cryptoPair=cryptoPair,
-                            quantity=cryptoPair.active_sell_order.amount,
-                            price=cryptoPair.active_sell_order.sell_price,
-                            side=Client.SIDE_SELL
+                if cryptoPair.cancelled_orders + 1 == MAX_CANCELLED_ORDERS:
+                    if await self.replace_expired_sell_order(cryptoPair, strategy):
+                        return
+                else:
+                    canceled_order = await self.exchange.cancel_order(cryptoPair.pair, cryptoPair.active_sell_order.order_id)
+                    if canceled_order == FILLED:
+                        logger.debug(f"Cannot cancel order {cryptoPair.active_sell_order.order_id} already filled")
+                    elif canceled_order:
+                        cryptoPair.active_sell_order.status = CANCELED
+                        logger.info(f"Active_sell_order marking as cancelled in db {cryptoPair.active_sell_order}")
+                        self.order_store.add_order_to_firebase(
+                            cryptoPair.active_sell_order
                         )
-
-                        if sell_order:
-                            logger.info(f"Immediate sell order placed for {cryptoPair.pair} at market price {cryptoPair.active_sell_order.sell_price}.")
-                            cryptoPair.current_state[strategy.name] = TradeState.SELLING
-
-                            cryptoPair.active_sell_order = Order(
-                                symbol=sell_order[SYMBOL],
-                                order_id=sell_order[ORDER_ID],
-                                sell_price=cryptoPair.active_sell_order.sell_price,
-                                buy_price=cryptoPair.active_sell_order.buy_price,
-                                order_type=sell_order[SIDE],
-                                amount=float(sell_order[ORIG_QTY]),
-                                timestamp=sell_order[WORKING_TIME],
-                                strategy=strategy.name,
-                                status=sell_order[STATUS],
-                                profit=0,
-                            )
-
-                            from firebase import FirebaseManager
-                            FirebaseManager().add_order_to_firebase(cryptoPair.active_sell_order)
-
-                            logger.info(f"Updated sell order placed for {cryptoPair.pair} after multiple cancellations.")
-                        else:
-                            logger.error(f"Failed to place immediate sell order for {cryptoPair.pair}.")
-                    else:
+                        logger.warning(f"Sell order {cryptoPair.active_sell_order.order_id} for {cryptoPair.pair} canceled due to timeout.")
+                        cryptoPair.cancelled_orders += 1
                         cryptoPair.current_state[strategy.name] = TradeState.MONITORING
-                    return
-                else:
-                    logger.error(f"Failed to cancel sell order {cryptoPair.active_sell_order.order_id} for {cryptoPair.pair} due to timeout.")
+                        return
+                    else:
+                        logger.error(f"Failed to cancel sell order {cryptoPair.active_sell_order.order_id} for {cryptoPair.pair} due to timeout.")
             else:
-                logger.info(f" Expired      : {strategy.timeout - elapsed_time}")
-            logger.info("="*50)
+                logger.info("Sell order %s for %s expires in %.0f s.", cryptoPair.active_sell_order.order_id, cryptoPair.pair,
+                            strategy.timeout - elapsed_time, extra={"pair": cryptoPair.pair})
 
             if sell_order[STATUS] == FILLED:
                 cryptoPair.cancelled_orders = 0
@@ -216,12 +411,11 @@ class Trader:
                 cryptoPair.executed_sell_order = copy(cryptoPair.active_sell_order)
                 cryptoPair.executed_sell_order.status = FILLED
 
-                from firebase import FirebaseManager
-                FirebaseManager().add_order_to_firebase(
+                self.order_store.add_order_to_firebase(
                     cryptoPair.executed_sell_order
                 )
 
-                buy_order = await BinanceManager().limit_order(
+                buy_order = await self.exchange.limit_order(
                     cryptoPair=cryptoPair,
                     quantity=cryptoPair.active_sell_order.amount,
                     price=cryptoPair.active_sell_order.buy_price,
@@ -249,43 +443,42 @@ class Trader:
                                 profit = ((float(cryptoPair.active_sell_order.sell_price)*float(buy_order[ORIG_QTY])) - (float(cryptoPair.active_sell_order.buy_price)*float(buy_order[ORIG_QTY]))) - total_fees,
                             )
 
-                    FirebaseManager().add_order_to_firebase(
+                    self.order_store.add_order_to_firebase(
                         cryptoPair.add_order(
                             cryptoPair.active_buy_order
                             )
                     )
                     cryptoPair.current_state[strategy.name] = TradeState.COOLDOWN
-                    logger.debug(f"Current strategy allocation for {cryptoPair.pair}: {PAIRS.pairs[cryptoPair.pair]['strategy_allocation'][strategy.name]}")
+                    logger.debug("Current strategy allocation for %s: %s", cryptoPair.pair, allocation, extra={"pair": cryptoPair.pair})
                 else:
-                    logger.error(f"Failed to place buy order for {cryptoPair.pair}!")
+                    logger.error("Failed to place buy order for %s!", cryptoPair.pair, extra={"pair": cryptoPair.pair})
 
         elif cryptoPair.current_state[strategy.name] == TradeState.COOLDOWN:
 
             if cryptoPair.executed_sell_order:
 
                 last_order_time = datetime.fromtimestamp(int(cryptoPair.executed_sell_order.timestamp) / 1000)
-                elapsed_time = datetime.now() - last_order_time
+                elapsed_time = self.clock() - last_order_time
 
                 cooldown_timedelta = timedelta(seconds=strategy.cooldown)
 
                 if elapsed_time < cooldown_timedelta:
                     remaining_time = cooldown_timedelta - elapsed_time
-                    logger.info(f"Cooldown active for {cryptoPair.pair} - Waiting {remaining_time} before next order.")
+                    logger.info("Cooldown active for %s - Waiting %s before next order.", cryptoPair.pair, remaining_time, extra={"pair": cryptoPair.pair})
                 else:
                     cryptoPair.current_state[strategy.name] = TradeState.MONITORING
             else:
-                logger.debug(f"No last sell order found for {cryptoPair.pair}.")
+                logger.debug("No last sell order found for %s.", cryptoPair.pair, extra={"pair": cryptoPair.pair})
 
             if cryptoPair.active_buy_order:
 
-                logger.debug(f"Active buy order for {cryptoPair.pair}: {cryptoPair.active_buy_order}")
+                logger.debug("Active buy order for %s: %s", cryptoPair.pair, cryptoPair.active_buy_order, extra={"pair": cryptoPair.pair})
 
-                status = BinanceManager().get_order_status(cryptoPair.pair, order_id=cryptoPair.active_buy_order.order_id)
+                status = await self.exchange.get_order_status(cryptoPair.pair, order_id=cryptoPair.active_buy_order.order_id)
                 if status[STATUS] == FILLED:
                     logger.info(f"Buy order {cryptoPair.active_buy_order.order_id} for {cryptoPair.pair} completed during cooldown.")
 
-                    from firebase import FirebaseManager
-                    FirebaseManager().add_order_to_firebase(
+                    self.order_store.add_order_to_firebase(
                         cryptoPair.set_status(order_id=cryptoPair.active_buy_order.order_id, status=FILLED)
                     )
 
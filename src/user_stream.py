@@ -0,0 +1,184 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+import websockets
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class OrderIndex:
+    """
+    In-memory index of the latest known state of every tracked order, keyed by order ID.
+
+    Entries are written from execution reports of the user-data stream and from REST responses.
+    Each entry remembers when it was last confirmed, so callers can fall back to REST only when
+    an order has not been confirmed for longer than the reconciliation interval.
+
+    Open orders are kept until they finish; of the finished ones, only the terminal_capacity most
+    recently updated are kept, so the index stays bounded however long the bot runs.
+    """
+
+    def __init__(self, reconcile_interval: float = ORDER_RECONCILE_INTERVAL, terminal_capacity: int = ORDER_INDEX_TERMINAL_CAPACITY):
+        self.reconcile_interval = reconcile_interval
+        self.terminal_capacity = terminal_capacity
+        self.orders: Dict[int, dict] = {}
+        self.confirmed_at: Dict[int, float] = {}
+        # IDs of the orders in a terminal status, least recently updated first
+        self.terminal: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self.orders)
+
+    def update(self, order: dict):
+        order_id = int(order[ORDER_ID])
+        self.orders[order_id] = order
+        self.confirmed_at[order_id] = time.time()
+
+        if order[STATUS] not in TERMINAL_ORDER_STATUSES:
+            self.terminal.pop(order_id, None)
+            return
+
+        logger.debug("Order %s for %s reached terminal status %s.", order_id, order[SYMBOL], order[STATUS], extra={"pair": order[SYMBOL]})
+        self.terminal[order_id] = None
+        self.terminal.move_to_end(order_id)
+        while len(self.terminal) > self.terminal_capacity:
+            evicted, _ = self.terminal.popitem(last=False)
+            self.orders.pop(evicted, None)
+            self.confirmed_at.pop(evicted, None)
+
+    def get(self, order_id) -> Optional[dict]:
+        """Returns the indexed order if it was confirmed within the reconciliation interval."""
+        order_id = int(order_id)
+        if order_id not in self.orders:
+            return None
+        if time.time() - self.confirmed_at[order_id] >= self.reconcile_interval:
+            return None
+        return self.orders[order_id]
+
+    def expire(self):
+        """Marks every entry as unconfirmed, so the next lookup of each order reconciles it over REST."""
+        self.confirmed_at = dict.fromkeys(self.confirmed_at, 0.0)
+
+    def discard(self, order_id):
+        self.orders.pop(int(order_id), None)
+        self.confirmed_at.pop(int(order_id), None)
+        self.terminal.pop(int(order_id), None)
+
+    @staticmethod
+    def from_execution_report(report: dict) -> dict:
+        """Converts an executionReport event into the shape returned by the get_order endpoint."""
+        return {
+            SYMBOL: report["s"],
+            ORDER_ID: report["i"],
+            SIDE: report["S"],
+            PRICE: report["p"],
+            ORIG_QTY: report["q"],
+            EXECUTED_QTY: report["z"],
+            CUMMULATIVE_QUOTE_QTY: report["Z"],
+            STATUS: report["X"],
+            TIME: report["O"],
+            WORKING_TIME: report.get("W", report["O"]),
+        }
+
+
+class UserDataStream:
+    """
+    Binance user-data stream pushing execution reports into the OrderIndex.
+
+    Listeners registered with add_listener are called with every converted execution report,
+    which lets the trading state machine react to fills without polling get_order.
+
+    Events sent while the stream was down are not replayed, so every (re)connection expires the
+    order index and calls the connect listeners before the stream counts as connected: orders that
+    changed in the gap are then reconciled over REST instead of being served stale from the index.
+    """
+
+    def __init__(self, call: Callable[..., Awaitable], order_index: OrderIndex, url: str = USER_DATA_STREAM_URL):
+        self.call = call
+        self.order_index = order_index
+        self.url = url
+        self.listen_key = None
+        self.connected = False
+        self.running = False
+        self.listeners: List[Callable[[dict], None]] = []
+        self.connect_listeners: List[Callable[[], None]] = []
+        self.event_handlers: Dict[str, Callable[[dict], None]] = {
+            EXECUTION_REPORT: self.handle_execution_report,
+        }
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        self.listeners.append(listener)
+
+    def add_connect_listener(self, listener: Callable[[], None]):
+        """Registers a callback run on every (re)connection, e.g. to invalidate state the missed events would have updated."""
+        self.connect_listeners.append(listener)
+
+    def add_event_handler(self, event_type: str, handler: Callable[[dict], None]):
+        """Registers a handler for another user-data event type, e.g. outboundAccountPosition."""
+        self.event_handlers[event_type] = handler
+
+    def handle_message(self, message: str):
+        event = json.loads(message)
+        handler = self.event_handlers.get(event.get("e"))
+        if handler:
+            handler(event)
+
+    def handle_execution_report(self, event: dict):
+        order = OrderIndex.from_execution_report(event)
+        self.order_index.update(order)
+
+        for listener in self.listeners:
+            try:
+                listener(order)
+            except Exception as e:
+                logger.exception(f"User data stream listener failed for order {order[ORDER_ID]}: {e}")
+
+    async def keepalive(self):
+        while self.running:
+            await asyncio.sleep(LISTEN_KEY_KEEPALIVE_INTERVAL)
+            try:
+                await self.call('stream_keepalive', listenKey=self.listen_key)
+                logger.debug("User data stream listen key refreshed.")
+            except Exception as e:
+                logger.warning(f"Failed to refresh user data stream listen key: {e}")
+
+    async def run(self):
+        """Keeps the user-data stream connected, reconnecting with exponential backoff."""
+        self.running = True
+        backoff = STREAM_RECONNECT_MIN_DELAY
+        keepalive_task = None
+
+        while self.running:
+            try:
+                self.listen_key = await self.call('stream_get_listen_key')
+                keepalive_task = asyncio.create_task(self.keepalive())
+
+                async with websockets.connect(f"{self.url}/{self.listen_key}") as websocket:
+                    self.order_index.expire()
+                    for listener in self.connect_listeners:
+                        listener()
+                    self.connected = True
+                    backoff = STREAM_RECONNECT_MIN_DELAY
+                    logger.info("User data stream connected.")
+
+                    async for message in websocket:
+                        self.handle_message(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"User data stream disconnected: {e}. Reconnecting in {backoff}s.")
+            finally:
+                self.connected = False
+                if keepalive_task:
+                    keepalive_task.cancel()
+
+            if self.running:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, STREAM_RECONNECT_MAX_DELAY)
+
+    def stop(self):
+        self.running = False
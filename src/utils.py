@@ -4,13 +4,15 @@ import subprocess
 import sys
 import requests
 from globals import RESTART_COMMAND, SENDER_EMAIL, RECEIVER_EMAIL, SENDER_EMAIL_KEY
-from logger import logger
+from logger import get_logger
 from git import Repo
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from os import getenv
 
+logger = get_logger(__name__)
+
 
 def get_private_ip():
     """
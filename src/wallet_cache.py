@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict
+from globals import *
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class WalletCache:
+    """
+    Wallet balances shared by all pairs and strategies.
+
+    Balances are fetched with one account request and reused until they are older than
+    max_staleness. While the user-data stream is connected, balance updates are applied from
+    outboundAccountPosition events and the snapshot stays valid for stream_staleness instead.
+    invalidate() forces the next read to fetch the account again, e.g. after an order was
+    placed or cancelled.
+    """
+
+    def __init__(self, fetch_balances: Callable[[], Awaitable[Dict[str, dict]]], is_streaming: Callable[[], bool] = lambda: False, max_staleness: float = WALLET_MAX_STALENESS, stream_staleness: float = ORDER_RECONCILE_INTERVAL):
+        self.fetch_balances = fetch_balances
+        self.max_staleness = max_staleness
+        self.stream_staleness = stream_staleness
+        self.is_streaming = is_streaming
+        self.balances: Dict[str, dict] = {}
+        self.updated_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def is_fresh(self) -> bool:
+        staleness = self.stream_staleness if self.is_streaming() else self.max_staleness
+        return self.updated_at > 0 and (time.time() - self.updated_at) < staleness
+
+    def invalidate(self):
+        self.updated_at = 0.0
+
+    async def get(self) -> Dict[str, dict]:
+        if self.is_fresh():
+            return self.balances
+
+        async with self.lock:
+            if not self.is_fresh():
+                self.balances = await self.fetch_balances()
+                self.updated_at = time.time()
+                logger.debug(f"Wallet snapshot refreshed: {len(self.balances)} assets.")
+
+        return self.balances
+
+    def apply_account_position(self, event: dict):
+        """Applies an outboundAccountPosition event from the user-data stream."""
+        for balance in event["B"]:
+            asset, free_amount, locked_amount = balance["a"], balance["f"], balance["l"]
+
+            if float(free_amount) > 0 or float(locked_amount) > 0:
+                self.balances[asset] = {FREE: free_amount, LOCKED: locked_amount}
+            else:
+                self.balances.pop(asset, None)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Wallet updated from stream for %s.", [balance['a'] for balance in event['B']])
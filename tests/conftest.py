@@ -0,0 +1,148 @@
+import asyncio
+import os
+import socket
+import sys
+import threading
+from contextlib import asynccontextmanager
+
+import pytest
+
+# The modules import each other by their flat names, as when they are run from src
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from globals import *
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def simulated_exchange(tmp_path, monkeypatch):
+    """
+    Factory of a SimulatedMarket served by a MockBinanceServer on a free port, with a fresh
+    BinanceManager pointed at it and its local state in tmp_path. The manager's events and
+    semaphores bind to the running loop, so every test starts its own, inside asyncio.run:
+
+        async with simulated_exchange(pairs=2) as (market, server, manager):
+            ...
+
+    The keyword arguments other than pairs go to MockBinanceServer.
+    """
+    from binance_api import BinanceManager
+    from exchange_simulator import MockBinanceServer, SimulatedMarket, make_symbols
+
+    monkeypatch.setenv(BINANCE_API_KEY, "simulator")
+    monkeypatch.setenv(BINANCE_SECRET_KEY, "simulator")
+    monkeypatch.setenv(EXCHANGE_INFO_SNAPSHOT_PATH, str(tmp_path / DEFAULT_EXCHANGE_INFO_SNAPSHOT))
+    monkeypatch.setenv(ORDER_HISTORY_PATH, str(tmp_path / DEFAULT_ORDER_HISTORY_DIR))
+    monkeypatch.setenv(STATE_STORE_PATH, str(tmp_path / DEFAULT_STATE_STORE))
+
+    @asynccontextmanager
+    async def start(pairs: int = 1, **server_options):
+        # No price moves unless a test ticks the market itself
+        market = SimulatedMarket(make_symbols(pairs), volatility=0.0)
+        server_options.setdefault("tick_interval", 3600.0)
+        server = MockBinanceServer(market, port=free_port(), **server_options)
+        await server.start()
+        monkeypatch.setenv(BINANCE_API_URL, f"http://{server.host}:{server.port}/api")
+
+        BinanceManager._instance = None
+        manager = BinanceManager()
+        try:
+            await manager.start()
+            yield market, server, manager
+        finally:
+            await manager.close()
+            await server.stop()
+            BinanceManager._instance = None
+
+    return start
+
+
+@pytest.fixture
+def realtime_database():
+    """
+    MockRealtimeDatabase on a free port, served by an event loop in a background thread, since the
+    ConfigStream under test reads it from threads of its own. Yields the database and a function
+    that runs a coroutine on its loop, e.g. run(database.disconnect()).
+    """
+    from firebase_simulator import MockRealtimeDatabase
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    def run(coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result(timeout=10)
+
+    database = MockRealtimeDatabase(port=free_port(), keepalive_interval=1.0)
+    run(database.start())
+    try:
+        yield database, run
+    finally:
+        run(database.stop())
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+class FakeReference:
+    """db.reference on an in-memory JSON tree, recording the paths that are read."""
+
+    def __init__(self, tree: dict, reads: list, path: str):
+        self.tree = tree
+        self.reads = reads
+        self.parts = [part for part in path.split("/") if part]
+
+    def get(self, shallow: bool = False):
+        self.reads.append("/" + "/".join(self.parts))
+        node = self.tree
+        for part in self.parts:
+            node = node.get(part) if isinstance(node, dict) else None
+        return node
+
+    def set(self, value):
+        node = self.tree
+        for part in self.parts[:-1]:
+            node = node.setdefault(part, {})
+        node[self.parts[-1]] = value
+
+    def update(self, updates: dict):
+        for path, value in updates.items():
+            FakeReference(self.tree, self.reads, "/".join(self.parts) + "/" + path).set(value)
+
+
+@pytest.fixture
+def firebase_database(monkeypatch):
+    """
+    Factory of FirebaseManager instances on one in-memory database tree in place of firebase_admin,
+    each like a freshly started process. Returns (new_manager, tree, reads): reads lists the paths
+    read so far.
+    """
+    import firebase
+    from firebase import FirebaseManager
+    from order_writer import OrderWriteBehind
+    from profit import ProfitAggregate
+
+    tree, reads = {}, []
+    monkeypatch.setattr(firebase.db, "reference", lambda path, url=None: FakeReference(tree, reads, path))
+
+    def new_manager() -> FirebaseManager:
+        manager = object.__new__(FirebaseManager)
+        manager.initialized = True
+        manager.dbUrl = ""
+        manager.listeners, manager.config_listeners = [], []
+        manager.loop = None
+        manager.shard = None
+        manager.profit = ProfitAggregate()
+        manager.unverified_fills = {}
+        manager.fills_lock = threading.Lock()
+        manager.order_writer = OrderWriteBehind(write_batch=manager.write_orders)
+        FirebaseManager._instance = manager
+        return manager
+
+    yield new_manager, tree, reads
+    FirebaseManager._instance = None
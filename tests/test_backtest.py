@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from backtest import Backtest, load_ticks
+from data_classes import SymbolFilters
+from globals import *
+from observable import TradeStrategy
+from trader import Trader
+
+OPEN_TIME = 1_700_000_040_000
+
+# open, high, low, close of one-minute candles
+CANDLES = [
+    (100.0, 100.0, 100.0, 100.0),
+    # Reaches the sell at 101.00 placed on the first tick
+    (100.0, 101.5, 100.0, 101.0),
+    # Reaches the buy back at 99.00, the next evaluation places a new sell at 101.00
+    (101.0, 101.0, 98.5, 100.0),
+]
+
+
+def write_klines(path) -> str:
+    with open(path, "w") as f:
+        f.write("open_time,open,high,low,close,volume,close_time\n")
+        for index, (open_price, high, low, close) in enumerate(CANDLES):
+            open_time = OPEN_TIME + index * 60_000
+            f.write(f"{open_time},{open_price},{high},{low},{close},1.0,{open_time + 59_999}\n")
+    return str(path)
+
+
+@pytest.fixture
+def trader(monkeypatch):
+    # The backtest publishes the pair into the shared config
+    monkeypatch.setattr(CONFIG, "snapshot", CONFIG.snapshot)
+    Trader._instance = None
+    yield
+    Trader._instance = None
+
+
+def test_replayed_klines_fill_at_the_limit_prices(tmp_path, trader):
+    times, prices = load_ticks(write_klines(tmp_path / "klines.csv"))
+    assert prices == [100.0] * 4 + [100.0, 100.0, 101.5, 101.0] + [101.0, 101.0, 98.5, 100.0]
+
+    filters = SymbolFilters(symbol="SIMUSDC", tick_size=0.01, step_size=0.00001, min_notional=5.0, min_qty=0.0, max_qty=0.0)
+    strategy = TradeStrategy(name=CRAZY_GIRL, buy_increase_indicator=0.01, profit_target=0.99, cooldown=3600, timeout=3600, multiplier=1.05)
+    result = asyncio.run(Backtest(filters, [strategy], base_balance=1.0).run(times, prices))
+
+    # 5 * 1.05 / 100 sold at 101.00 and bought back at 99.00, though the price reached 101.5 and 98.5.
+    # As a float the quantity lies just below 0.0525, so it is truncated to the step below.
+    quantity = 0.05249
+    fees = quantity * 101.0 * FEE_SELL_BINANCE_VALUE + quantity * 99.0 * FEE_SELL_BINANCE_VALUE
+    assert (result.sell_fills, result.buy_fills, result.cancels) == (1, 1, 0)
+    assert result.profit == pytest.approx(quantity * (101.0 - 99.0) - fees)
+    assert result.profit_per_strategy == {CRAZY_GIRL: pytest.approx(0.0971065)}
+    assert result.final_state == {CRAZY_GIRL: TradeState.SELLING.name}
+
+    base = 1.0 - quantity + quantity * (1 - FEE_BUY_BINANCE_VALUE)
+    quote = quantity * 101.0 * (1 - FEE_SELL_BINANCE_VALUE) - quantity * 99.0
+    assert result.initial_equity == pytest.approx(100.0)
+    assert result.final_equity == pytest.approx(base * 100.0 + quote)
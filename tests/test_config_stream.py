@@ -0,0 +1,118 @@
+import copy
+import queue
+import time
+import pytest
+import requests
+from config_stream import ConfigEvent, ConfigStream, split_path
+
+ROOT = "/Bot/Config"
+CONFIG = {
+    "Pairs": {"BTCUSDT": {"trading_percentage": 1}},
+    "Strategies": {"CrazyGirl": {"buy_offset": 0.01}},
+    "LOGGING_LEVEL": "INFO",
+    "Profit": {"total": 1.5},
+}
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class Routes:
+    """Handlers of the Pairs, Strategies and LOGGING_LEVEL routes, queueing the events they receive."""
+
+    def __init__(self):
+        self.events = {name: queue.Queue() for name in ("Pairs", "Strategies", "LOGGING_LEVEL")}
+
+    def routes(self) -> dict:
+        return {f"{ROOT}/{name}": events.put for name, events in self.events.items()}
+
+    def next(self, name: str) -> ConfigEvent:
+        return self.events[name].get(timeout=5)
+
+    def empty(self) -> bool:
+        return all(events.empty() for events in self.events.values())
+
+
+@pytest.fixture
+def config_stream(realtime_database):
+    database, run = realtime_database
+    database.data = {"Bot": {"Config": copy.deepcopy(CONFIG)}}
+    url = f"http://{database.host}:{database.port}/"
+    routes = Routes()
+    stream = ConfigStream(url, ROOT, routes.routes(), read_timeout=5, backoff_min=0.2, backoff_max=0.5)
+    stream.start()
+    try:
+        yield stream, routes, url
+    finally:
+        stream.close()
+
+
+def test_route_below_root_is_required():
+    with pytest.raises(ValueError):
+        ConfigStream("http://localhost/", ROOT, {"/Bot/Other": print})
+
+
+def test_snapshot_is_split_per_route(config_stream):
+    stream, routes, url = config_stream
+
+    assert routes.next("Pairs") == ConfigEvent("put", "/", CONFIG["Pairs"])
+    assert routes.next("Strategies") == ConfigEvent("put", "/", CONFIG["Strategies"])
+    assert routes.next("LOGGING_LEVEL") == ConfigEvent("put", "/", "INFO")
+    assert stream.connections == 1
+
+
+def test_events_reach_their_route_with_a_relative_path(config_stream):
+    stream, routes, url = config_stream
+    for name in routes.events:
+        routes.next(name)
+
+    requests.put(f"{url}{ROOT}/Pairs/BTCUSDT/trading_percentage.json", json=0.5).raise_for_status()
+    assert routes.next("Pairs") == ConfigEvent("put", "/BTCUSDT/trading_percentage", 0.5)
+
+    requests.put(f"{url}{ROOT}/LOGGING_LEVEL.json", json="DEBUG").raise_for_status()
+    assert routes.next("LOGGING_LEVEL") == ConfigEvent("put", "/", "DEBUG")
+    assert routes.empty()
+
+
+def test_unrouted_events_are_dropped(config_stream):
+    stream, routes, url = config_stream
+    for name in routes.events:
+        routes.next(name)
+    events = stream.events
+
+    requests.put(f"{url}{ROOT}/Profit/total.json", json=2.5).raise_for_status()
+    wait_for(lambda: stream.events > events)
+    assert routes.empty()
+
+
+def test_patch_is_split_into_puts(config_stream):
+    stream, routes, url = config_stream
+    for name in routes.events:
+        routes.next(name)
+
+    requests.patch(f"{url}{ROOT}.json", json={"LOGGING_LEVEL": "WARNING", "Strategies/CrazyGirl/buy_offset": 0.02, "Profit": None}).raise_for_status()
+    assert routes.next("LOGGING_LEVEL") == ConfigEvent("put", "/", "WARNING")
+    assert routes.next("Strategies") == ConfigEvent("put", "/CrazyGirl/buy_offset", 0.02)
+    assert routes.empty()
+
+
+def test_reconnect_replays_the_changes_missed_while_down(config_stream, realtime_database):
+    stream, routes, url = config_stream
+    database, run = realtime_database
+    for name in routes.events:
+        routes.next(name)
+
+    async def drop_and_write():
+        await database.disconnect()
+        # No stream is open, so only the snapshot of the next connection carries this write
+        database.write("put", split_path(f"{ROOT}/Pairs/BTCUSDT/trading_percentage"), 0.25)
+
+    run(drop_and_write())
+
+    assert routes.next("Pairs") == ConfigEvent("put", "/", {"BTCUSDT": {"trading_percentage": 0.25}})
+    assert routes.next("LOGGING_LEVEL") == ConfigEvent("put", "/", "INFO")
+    assert stream.connections == 2
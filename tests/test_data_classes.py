@@ -0,0 +1,46 @@
+from data_classes import Order, OrderHistory
+from globals import *
+
+
+def order(order_id: str, status: str = NEW) -> Order:
+    return Order(symbol="SIM0001USDT", order_id=order_id, order_type=BUY, amount=1.0, sell_price=11.0, buy_price=10.0,
+                 timestamp="0", strategy=CRAZY_GIRL, status=status, profit=0.0)
+
+
+def test_history_evicts_the_oldest_order():
+    history = OrderHistory(capacity=3)
+    evicted = [history.append(order(str(order_id))) for order_id in range(5)]
+
+    assert evicted[:3] == [None, None, None]
+    assert [o.order_id for o in evicted[3:]] == ["0", "1"]
+    assert [o.order_id for o in history] == ["2", "3", "4"]
+    assert history.get("1") is None
+    assert [o.order_id for o in history.open_orders()] == ["2", "3", "4"]
+
+
+def test_appending_a_known_order_replaces_it_in_place():
+    history = OrderHistory(capacity=3)
+    for order_id in ("1", "2", "3"):
+        history.append(order(order_id))
+
+    assert history.append(order("2", FILLED)) is None
+    assert len(history) == 3
+    assert [(o.order_id, o.status) for o in history] == [("1", NEW), ("2", FILLED), ("3", NEW)]
+    assert [o.order_id for o in history.open_orders()] == ["1", "3"]
+
+    # Evicting the slot of the first copy must not drop the index entry of the order
+    history.append(order("4"))
+    history.append(order("5"))
+    assert [o.order_id for o in history] == ["3", "4", "5"]
+    assert history.get("2") is None
+    assert history.get("3").order_id == "3"
+    assert set(history.index) == {"3", "4", "5"}
+
+
+def test_set_status_moves_the_order_out_of_the_open_set():
+    history = OrderHistory(capacity=3)
+    history.append(order("1"))
+
+    assert history.set_status("1", CANCELED).status == CANCELED
+    assert history.open_orders() == []
+    assert history.set_status("2", FILLED) is None
@@ -0,0 +1,79 @@
+import threading
+import pytest
+from config_stream import ConfigEvent
+from observable import DEFAULT_PAIRS, DEFAULT_STRATEGIES, ConfigStore
+
+UPDATES = 200
+
+
+def test_snapshot_is_read_only_and_detached_from_its_source():
+    pairs = {"BTCUSDC": {"strategy_allocation": {"crazy_girl": "0.5", "poor_orphan": "x"}, "trading_percentage": 1}}
+    store = ConfigStore(DEFAULT_STRATEGIES, pairs)
+    snapshot = store.snapshot
+
+    with pytest.raises(TypeError):
+        snapshot.pairs["ETHUSDC"] = {}
+    with pytest.raises(TypeError):
+        snapshot.pairs["BTCUSDC"]["strategy_allocation"]["crazy_girl"] = 1
+
+    pairs["BTCUSDC"]["strategy_allocation"]["crazy_girl"] = 1
+    assert snapshot.pairs["BTCUSDC"]["strategy_allocation"]["crazy_girl"] == "0.5"
+    assert snapshot.allocation("BTCUSDC", "crazy_girl") == 0.5
+    assert snapshot.allocation("BTCUSDC", "poor_orphan") == 0.0
+    assert snapshot.allocation("ETHUSDC", "crazy_girl") == 0.0
+
+
+def test_publish_replaces_the_snapshot_and_keeps_the_other_half():
+    store = ConfigStore(DEFAULT_STRATEGIES, DEFAULT_PAIRS)
+    first = store.snapshot
+
+    second = store.publish(pairs={"BTCUSDC": DEFAULT_PAIRS["BTCUSDC"]})
+    assert store.snapshot is second
+    assert second.version == first.version + 1
+    assert second.strategies == first.strategies
+    assert list(first.pairs) == list(DEFAULT_PAIRS)
+    assert list(second.pairs) == ["BTCUSDC"]
+
+
+def test_concurrent_listeners_lose_no_update_and_readers_see_consistent_snapshots(firebase_database, monkeypatch):
+    import firebase
+
+    store = ConfigStore(DEFAULT_STRATEGIES, DEFAULT_PAIRS)
+    monkeypatch.setattr(firebase, "CONFIG", store)
+    # Every publish is logged; the queued records would outlive the captured output of the test
+    monkeypatch.setattr(firebase.logger, "disabled", True)
+    new_manager, tree, reads = firebase_database
+    manager = new_manager()
+    inconsistent, stop = [], threading.Event()
+
+    def update_pair(pair_name: str):
+        for value in range(1, UPDATES + 1):
+            manager.pairs_listener(ConfigEvent("put", f"/{pair_name}/strategy_allocation", {"crazy_girl": value}))
+
+    def update_strategy():
+        for value in range(1, UPDATES + 1):
+            manager.strategies_listener(ConfigEvent("put", "/crazy_girl/cooldown", value))
+
+    def read():
+        while not stop.is_set():
+            snapshot = store.snapshot
+            for pair_name, pair in snapshot.pairs.items():
+                if snapshot.allocation(pair_name, "crazy_girl") != float(pair["strategy_allocation"]["crazy_girl"]):
+                    inconsistent.append(snapshot.version)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    writers = [threading.Thread(target=update_pair, args=(pair_name,)) for pair_name in DEFAULT_PAIRS]
+    writers.append(threading.Thread(target=update_strategy))
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    stop.set()
+    reader.join()
+
+    snapshot = store.snapshot
+    assert inconsistent == []
+    assert snapshot.version == UPDATES * (len(DEFAULT_PAIRS) + 1)
+    assert snapshot.strategies["crazy_girl"].cooldown == UPDATES
+    assert all(snapshot.allocation(pair_name, "crazy_girl") == UPDATES for pair_name in DEFAULT_PAIRS)
@@ -0,0 +1,109 @@
+import asyncio
+from data_classes import CryptoPair, Order
+from globals import *
+from order_batch import OrderBatch
+
+
+def crypto_pair(market, symbol: str) -> CryptoPair:
+    return CryptoPair(pair=symbol, value=1000.0, crypto_amount_free=1.0, crypto_amount_locked=0.0, min_notional=market.min_notional,
+                      tick_size=market.tick_size, step_size=market.step_size)
+
+
+def resting_order(market, symbol: str, side: str = BUY) -> dict:
+    """An order far enough from the price to stay open."""
+    price = market.round_price(market.prices[symbol] * (0.9 if side == BUY else 1.1))
+    return market.create_order(symbol, side, f"{round(10 / price, 4):.4f}", f"{price:.4f}")
+
+
+def filled_order(market, symbol: str) -> dict:
+    price = market.round_price(market.prices[symbol] * 1.01)
+    return market.create_order(symbol, BUY, f"{round(10 / price, 4):.4f}", f"{price:.4f}")
+
+
+def test_batch_outcomes(simulated_exchange):
+    async def scenario():
+        async with simulated_exchange(pairs=2) as (market, server, manager):
+            first, second = (crypto_pair(market, symbol) for symbol in market.prices)
+            price = market.prices[first.pair]
+            cancelled, filled = resting_order(market, first.pair), filled_order(market, first.pair)
+            replaced, filled_replaced = resting_order(market, second.pair), filled_order(market, second.pair)
+
+            first.active_buy_order = Order(first.pair, str(cancelled[ORDER_ID]), BUY, 1.0, 0.0, price, "0", CRAZY_GIRL, NEW, 0.0)
+
+            batch = OrderBatch()
+            placed = batch.place(first, BUY, 10 / price, price * 0.95)
+            too_small = batch.place(first, SELL, 1 / price, price * 1.05)
+            cancel = batch.cancel(first, cancelled[ORDER_ID])
+            cancel_filled = batch.cancel(first, filled[ORDER_ID])
+            replacement = batch.replace(second, replaced[ORDER_ID], SELL, 10 / market.prices[second.pair], market.prices[second.pair] * 1.05)
+            failed_replacement = batch.replace(second, filled_replaced[ORDER_ID], SELL, 10 / market.prices[second.pair], market.prices[second.pair] * 1.06)
+
+            outcomes = await manager.submit_batch(batch)
+            by_request = {id(outcome.request): outcome for outcome in outcomes}
+            assert len(outcomes) == len(batch) == 8
+            assert [outcome.request for outcome in outcomes] == batch.requests
+
+            assert by_request[id(placed)].ok and by_request[id(placed)].status == NEW
+            assert by_request[id(placed)].order[ORDER_ID] in market.open_orders[first.pair]
+
+            assert not by_request[id(too_small)].ok and by_request[id(too_small)].order is None
+
+            assert by_request[id(cancel)].ok and by_request[id(cancel)].status == CANCELED
+            assert first.active_buy_order.status == CANCELED
+
+            assert by_request[id(cancel_filled)].status == FILLED
+            assert not by_request[id(cancel_filled)].ok
+
+            assert by_request[id(replacement.replaces)].status == CANCELED
+            assert by_request[id(replacement)].ok and by_request[id(replacement)].status == NEW
+            assert replaced[ORDER_ID] not in market.open_orders[second.pair]
+
+            assert by_request[id(failed_replacement.replaces)].status == FILLED
+            assert not by_request[id(failed_replacement)].ok
+            assert by_request[id(failed_replacement)].order is None
+            assert list(market.open_orders[second.pair]) == [by_request[id(replacement)].order[ORDER_ID]]
+
+    asyncio.run(scenario())
+
+
+def test_cancel_all_reports_every_cancelled_order(simulated_exchange):
+    async def scenario():
+        async with simulated_exchange() as (market, server, manager):
+            cryptoPair = crypto_pair(market, next(iter(market.prices)))
+            requested, other = resting_order(market, cryptoPair.pair), resting_order(market, cryptoPair.pair, SELL)
+            price = market.prices[cryptoPair.pair]
+
+            batch = OrderBatch()
+            batch.cancel_all(cryptoPair)
+            cancel = batch.cancel(cryptoPair, requested[ORDER_ID])
+            placed = batch.place(cryptoPair, BUY, 10 / price, price * 0.95)
+
+            outcomes = await manager.submit_batch(batch)
+
+            assert [outcome.request for outcome in outcomes[:2]] == [cancel, placed]
+            assert outcomes[0].status == CANCELED and outcomes[0].ok
+            assert outcomes[1].status == NEW and outcomes[1].ok
+            assert len(outcomes) == 3
+            assert outcomes[2].request.order_id == other[ORDER_ID]
+            assert outcomes[2].status == CANCELED
+            assert list(market.open_orders[cryptoPair.pair]) == [outcomes[1].order[ORDER_ID]]
+
+    asyncio.run(scenario())
+
+
+def test_cancel_all_without_open_orders(simulated_exchange):
+    async def scenario():
+        async with simulated_exchange() as (market, server, manager):
+            cryptoPair = crypto_pair(market, next(iter(market.prices)))
+            filled = filled_order(market, cryptoPair.pair)
+
+            batch = OrderBatch()
+            batch.cancel_all(cryptoPair)
+            cancel = batch.cancel(cryptoPair, filled[ORDER_ID])
+            outcomes = await manager.submit_batch(batch)
+
+            assert [outcome.request for outcome in outcomes] == [cancel]
+            assert outcomes[0].status == FILLED
+            assert outcomes[0].error == f"order {FILLED}"
+
+    asyncio.run(scenario())
@@ -0,0 +1,137 @@
+import random
+from decimal import Decimal, ROUND_DOWN
+from typing import List, Optional, Tuple
+import pytest
+from order_format import OrderFormatter
+
+# Filters the formatter cases are drawn from: Binance's usual sizes, plus tick sizes that are not powers of ten
+TICK_SIZES = [10.0, 1.0, 0.5, 0.1, 0.05, 0.01, 0.001, 0.0001, 1e-05, 1e-06, 1e-08]
+STEP_SIZES = [1, 1.0, 0.1, 0.01, 0.001, 1e-05, 1e-06, 1e-08]
+MIN_NOTIONALS = [0.0, 0.001, 1.0, 5.0, 10.0]
+MAX_QTYS = [0.0, 100.0, 9000.0, 92141578.0]
+
+SAMPLES = 20000
+
+
+def decimal_format_order(tick_size: float, step_size: float, min_notional: float, max_qty: float, quantity: float, price: float) -> Optional[Tuple[str, str]]:
+    """The Decimal formatting limit_order used before OrderFormatter, kept as the reference it must match."""
+    tick_size_decimal = Decimal(str(tick_size))
+    price_precision = abs(tick_size_decimal.as_tuple().exponent)
+    price = Decimal(price).quantize(tick_size_decimal, rounding=ROUND_DOWN)
+    formatted_price = "{:.{}f}".format(price, price_precision)
+
+    step_size_decimal = Decimal(str(step_size))
+    quantity_precision = abs(step_size_decimal.as_tuple().exponent)
+    quantity = Decimal(quantity).quantize(step_size_decimal, rounding=ROUND_DOWN)
+
+    if step_size == 1:
+        quantity = int(quantity)
+        formatted_quantity = str(quantity)
+    else:
+        formatted_quantity = "{:.{}f}".format(quantity, quantity_precision)
+
+    if Decimal(formatted_quantity) * Decimal(formatted_price) < Decimal(str(min_notional)):
+        return None
+    if max_qty and Decimal(formatted_quantity) > Decimal(str(max_qty)):
+        return None
+    return formatted_quantity, formatted_price
+
+
+def formatter_format_order(formatter: OrderFormatter, quantity: float, price: float) -> Optional[Tuple[str, str]]:
+    """BinanceManager.format_order without the logging."""
+    quantity_units = formatter.quantity_units(quantity)
+    price_units = formatter.price_units(price)
+    if formatter.below_min_notional(quantity_units, price_units) or formatter.above_max_qty(quantity_units):
+        return None
+    return formatter.format_quantity(quantity_units), formatter.format_price(price_units)
+
+
+def formatter_cases(samples: int, seed: int = 0) -> List[Tuple[Tuple[float, float, float, float], float, float]]:
+    """
+    Random orders with their filters. A third of the prices and quantities sit exactly on, or one
+    float away from, a multiple of the tick or step size, where truncation is easiest to get wrong.
+    """
+    generator = random.Random(seed)
+
+    def value(size: float, low: float, high: float) -> float:
+        number = 10 ** generator.uniform(low, high)
+        if generator.random() < 1 / 3:
+            units = round(number / size)
+            number = float(Decimal(units) * Decimal(str(size)))
+            number = generator.choice([number, number, number + number * 2.2e-16, number - number * 2.2e-16])
+        return number
+
+    cases = []
+    for _ in range(samples):
+        tick_size, step_size = generator.choice(TICK_SIZES), generator.choice(STEP_SIZES)
+        filters = (tick_size, step_size, generator.choice(MIN_NOTIONALS), generator.choice(MAX_QTYS))
+        cases.append((filters, value(step_size, -3, 4), value(tick_size, -2, 5)))
+    return cases
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_formatter_matches_decimal_rounding(seed):
+    cases = formatter_cases(SAMPLES, seed)
+    formatters = {filters: OrderFormatter("TEST", *filters) for filters in {filters for filters, _, _ in cases}}
+
+    mismatches = [
+        (case, reference, result)
+        for case, reference, result in (
+            ((filters, quantity, price), decimal_format_order(*filters, quantity, price), formatter_format_order(formatters[filters], quantity, price))
+            for filters, quantity, price in cases
+        )
+        if reference != result
+    ]
+
+    assert mismatches == []
+
+
+# (filters, quantity, price, formatted order), next to the random sweep so each edge is checked on every run
+BOUNDARY_CASES = [
+    # Prices exactly on a tick
+    ((0.01, 0.01, 0.0, 0.0), 1.0, 0.25, ("1.00", "0.25")),
+    ((1e-08, 1e-08, 0.0, 0.0), 1e-08, 1e-08, ("0.00000001", "0.00000001")),
+    # 0.29 and 0.3 are on a tick in decimal, but their floats lie just below it
+    ((0.01, 0.01, 0.0, 0.0), 1.0, 0.29, ("1.00", "0.28")),
+    ((0.01, 0.01, 0.0, 0.0), 1.0, 0.3, ("1.00", "0.29")),
+    # One step below min_notional, exactly on it, and pushed below it by the price
+    ((0.01, 0.001, 5.0, 0.0), 0.499, 10.0, None),
+    ((0.01, 0.001, 5.0, 0.0), 0.5, 10.0, ("0.500", "10.00")),
+    ((0.01, 0.001, 5.0, 0.0), 0.5, 9.99, None),
+    # Exactly on max_qty and one step above it
+    ((0.01, 0.001, 0.0, 9000.0), 9000.0, 1.0, ("9000.000", "1.00")),
+    ((0.01, 0.001, 0.0, 9000.0), 9000.001, 1.0, None),
+    # Very small and very large exponents
+    ((1e-08, 1e-08, 0.0, 0.0), 9.9e-09, 3e-08, ("0.00000000", "0.00000002")),
+    ((1e-08, 1, 0.0, 0.0), 92141578.0, 1.2e-07, ("92141578", "0.00000011")),
+    ((0.01, 1e-08, 5.0, 0.0), 1e-08, 1e15, ("0.00000001", "1000000000000000.00")),
+    ((10.0, 1, 0.0, 0.0), 3.0, 123456.78, ("3", "123456.7")),
+]
+
+
+@pytest.mark.parametrize("filters, quantity, price, expected", BOUNDARY_CASES)
+def test_boundary_cases(filters, quantity, price, expected):
+    assert decimal_format_order(*filters, quantity, price) == expected
+    assert formatter_format_order(OrderFormatter("TEST", *filters), quantity, price) == expected
+
+
+def test_string_price_on_a_tick_is_kept():
+    formatter = OrderFormatter("TEST", 0.01, 0.01, 0.0)
+    assert formatter.format_price(formatter.price_units("0.29")) == "0.29"
+
+
+def test_whole_unit_step_size_has_no_decimal_point():
+    formatter = OrderFormatter("TEST", 0.01, 1, 5.0)
+    assert formatter_format_order(formatter, 12.9, 3.456) == ("12", "3.45")
+
+
+def test_min_notional_is_checked_on_the_rounded_order():
+    formatter = OrderFormatter("TEST", 0.01, 0.001, 5.0)
+    assert formatter_format_order(formatter, 0.5009, 9.999) is None
+    assert formatter_format_order(formatter, 0.501, 9.99) == ("0.501", "9.99")
+
+
+def test_max_qty():
+    formatter = OrderFormatter("TEST", 0.01, 0.1, 0.0, max_qty=100.0)
+    assert formatter_format_order(formatter, 100.05, 1.0) == ("100.0", "1.00")
+    assert formatter_format_order(formatter, 100.2, 1.0) is None
@@ -0,0 +1,66 @@
+import asyncio
+from exchange_simulator import SimulatedMarket, make_symbols
+from globals import *
+from order_history import OrderHistoryStore
+
+SYMBOL_NAME = "SIM0001USDT"
+
+
+def history_store(market: SimulatedMarket, directory: str) -> OrderHistoryStore:
+    async def fetch_orders(symbol: str, orderId: int, limit: int):
+        return market.all_orders(symbol, from_id=orderId, limit=limit)
+
+    return OrderHistoryStore(fetch_orders, directory=directory, page_size=2)
+
+
+def place(market: SimulatedMarket, side: str, offset: float) -> dict:
+    price = market.round_price(market.prices[SYMBOL_NAME] * (1 + offset))
+    return market.create_order(SYMBOL_NAME, side, "1.0000", f"{price:.4f}")
+
+
+def test_sync_folds_every_order_once(tmp_path):
+    market = SimulatedMarket(make_symbols(1), volatility=0.0)
+    buy = place(market, BUY, -0.01)
+    place(market, BUY, 0.01)
+    sell = place(market, SELL, 0.01)
+    market.cancel_order(SYMBOL_NAME, sell[ORDER_ID])
+    place(market, SELL, 0.02)
+
+    store = history_store(market, str(tmp_path))
+    history, changed = asyncio.run(store.sync(SYMBOL_NAME))
+
+    assert len(changed) == 4
+    assert history.buy_count == 1
+    assert history.sell_count == 0
+    assert history.cursor == 5
+    assert set(history.open_orders) == {str(buy[ORDER_ID]), "4"}
+
+    history, changed = asyncio.run(store.sync(SYMBOL_NAME))
+    assert changed == []
+    assert history.buy_count == 1
+
+    market.fill(market.orders[buy[ORDER_ID]])
+    history, changed = asyncio.run(store.sync(SYMBOL_NAME))
+    assert [order[ORDER_ID] for order in changed] == [buy[ORDER_ID]]
+    assert history.buy_count == 2
+    assert set(history.open_orders) == {"4"}
+
+
+def test_restart_does_not_count_orders_again(tmp_path):
+    market = SimulatedMarket(make_symbols(1), volatility=0.0)
+    for offset in (0.01, 0.02, 0.03):
+        place(market, BUY, offset)
+    open_sell = place(market, SELL, 0.01)
+
+    history, _ = asyncio.run(history_store(market, str(tmp_path)).sync(SYMBOL_NAME))
+    assert history.buy_count == 3
+
+    market.fill(market.orders[open_sell[ORDER_ID]])
+    place(market, BUY, 0.04)
+
+    history, changed = asyncio.run(history_store(market, str(tmp_path)).sync(SYMBOL_NAME))
+    assert sorted(order[ORDER_ID] for order in changed) == [open_sell[ORDER_ID], 5]
+    assert history.buy_count == 4
+    assert history.sell_count == 1
+    assert history.buy_quantity == 4.0
+    assert history.open_orders == {}
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+from dataclasses import replace
+from data_classes import Order
+from globals import *
+from order_writer import OrderWriteBehind
+
+ORDER = Order(symbol="SIM0001USDT", order_id="7", order_type=SELL, amount=1.0, sell_price=11.0, buy_price=10.0,
+              timestamp="0", strategy=CRAZY_GIRL, status=NEW, profit=0.0)
+
+
+def test_updates_of_an_order_are_coalesced():
+    batches = []
+    writer = OrderWriteBehind(write_batch=batches.append, batch_size=100)
+
+    writer.enqueue(ORDER)
+    writer.enqueue(replace(ORDER, status=FILLED))
+    writer.flush()
+    assert batches == [{"7": replace(ORDER, status=FILLED).to_dict()}]
+
+    writer.enqueue(replace(ORDER, status=FILLED))
+    writer.enqueue(replace(ORDER, status=CANCELED))
+    writer.flush()
+    assert batches[1] == {f"7/{STATUS}": CANCELED}
+    assert writer.last_status("7") == CANCELED
+    assert writer.is_persisted("7")
+
+
+def test_failed_write_keeps_the_updates_queued():
+    batches = []
+
+    def write_batch(updates):
+        if not batches:
+            batches.append(None)
+            raise ConnectionError("offline")
+        batches.append(updates)
+
+    writer = OrderWriteBehind(write_batch=write_batch, batch_size=100)
+    writer.enqueue(ORDER)
+    writer.flush()
+    assert writer.pending and not writer.is_persisted("7")
+
+    writer.enqueue(replace(ORDER, status=FILLED))
+    writer.flush()
+    assert batches[1] == {"7": replace(ORDER, status=FILLED).to_dict()}
+    assert writer.last_status("7") == FILLED
+
+
+def test_queued_writes_are_flushed_on_shutdown():
+    batches = []
+    writer = OrderWriteBehind(write_batch=batches.append, flush_interval=3600, batch_size=100)
+
+    async def scenario():
+        task = asyncio.create_task(writer.run())
+        await asyncio.sleep(0)
+        writer.enqueue(ORDER)
+        writer.close()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+    assert batches == [{"7": ORDER.to_dict()}]
+    assert not writer.pending
+
+
+def test_full_batch_enqueued_from_another_thread_wakes_the_flusher():
+    batches = []
+    writer = OrderWriteBehind(write_batch=batches.append, flush_interval=3600, batch_size=2)
+
+    async def scenario():
+        task = asyncio.create_task(writer.run())
+        await asyncio.sleep(0)
+
+        def enqueue():
+            writer.enqueue(ORDER)
+            writer.enqueue(replace(ORDER, order_id="8"))
+
+        thread = threading.Thread(target=enqueue)
+        thread.start()
+        thread.join()
+
+        for _ in range(500):
+            if batches:
+                break
+            await asyncio.sleep(0.01)
+        writer.running = False
+        writer.wake()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+    assert batches == [{"7": ORDER.to_dict(), "8": replace(ORDER, order_id="8").to_dict()}]
@@ -0,0 +1,79 @@
+from dataclasses import replace
+import firebase
+from data_classes import Order
+from globals import *
+
+ORDER = Order(symbol="SIM0001USDT", order_id="11", order_type=BUY, amount=1.0, sell_price=11.0, buy_price=10.0,
+              timestamp="0", strategy=CRAZY_GIRL, status=NEW, profit=0.5)
+
+
+def test_fill_is_counted_once_across_a_restart(firebase_database):
+    new_manager, tree, reads = firebase_database
+
+    manager = new_manager()
+    manager.load_profit()
+    manager.add_order_to_firebase(replace(ORDER, status=FILLED))
+    manager.order_writer.flush()
+    manager.persist_profit()
+    assert manager.profit.total == 0.5
+
+    reads.clear()
+    manager = new_manager()
+    manager.load_profit()
+    manager.add_order_to_firebase(replace(ORDER, status=FILLED))
+    manager.order_writer.flush()
+
+    assert manager.profit.total == 0.5
+    assert ORDERS_PATH not in reads
+    assert reads == [PROFIT_SUMMARY_PATH, f"{ORDERS_PATH}/11/{STATUS}"]
+
+
+def test_fill_of_a_persisted_order_is_counted_without_a_read(firebase_database):
+    new_manager, tree, reads = firebase_database
+    manager = new_manager()
+    manager.add_order_to_firebase(ORDER)
+    manager.order_writer.flush()
+
+    reads.clear()
+    manager.add_order_to_firebase(replace(ORDER, status=FILLED))
+    manager.add_order_to_firebase(replace(ORDER, status=FILLED))
+    assert manager.profit.total == 0.5
+    manager.order_writer.flush()
+
+    assert reads == []
+    assert manager.profit.filled_orders == 1
+
+
+def test_unreadable_status_keeps_the_fill_queued(firebase_database, monkeypatch):
+    new_manager, tree, reads = firebase_database
+    manager = new_manager()
+    manager.add_order_to_firebase(replace(ORDER, status=FILLED))
+
+    def offline(path, url=None):
+        raise ConnectionError("offline")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(firebase.db, "reference", offline)
+        manager.order_writer.flush()
+    assert manager.order_writer.pending
+    assert manager.unverified_fills
+    assert manager.profit.total == 0.0
+
+    manager.order_writer.flush()
+    assert manager.profit.total == 0.5
+    assert not manager.order_writer.pending
+    assert tree
+
+
+def test_recalculation_request_rebuilds_the_aggregate(firebase_database):
+    new_manager, tree, reads = firebase_database
+    manager = new_manager()
+    manager.add_order_to_firebase(replace(ORDER, status=FILLED))
+    manager.order_writer.flush()
+    FakeEvent = type("FakeEvent", (), {"path": f"/{RECALCULATE_PROFIT}", "data": True})
+
+    manager.add_order_to_firebase(replace(ORDER, order_id="12", status=FILLED, profit=0.25))
+    manager.update_listener(FakeEvent())
+
+    assert manager.profit.total == 0.75
+    assert manager.profit.filled_orders == 2
@@ -0,0 +1,94 @@
+import asyncio
+import time
+import pytest
+from binance.exceptions import BinanceAPIException
+from globals import *
+from rate_limit import RequestDropped, RequestGovernor
+
+
+def test_priorities_share_the_weight_limit():
+    governor = RequestGovernor(weight_limit=100, window=60)
+    governor.used_weight = 69
+
+    assert governor.allows(REQUEST_PRIORITY_LOW, 1)
+    assert not governor.allows(REQUEST_PRIORITY_LOW, 2)
+    assert governor.allows(REQUEST_PRIORITY_NORMAL, 21)
+    assert not governor.allows(REQUEST_PRIORITY_NORMAL, 22)
+    assert governor.allows(REQUEST_PRIORITY_ORDER, 31)
+    assert not governor.allows(REQUEST_PRIORITY_ORDER, 32)
+
+
+def test_waiting_request_holds_back_lower_priorities():
+    governor = RequestGovernor(weight_limit=100, window=60)
+    governor.waiting[REQUEST_PRIORITY_ORDER] += 1
+
+    assert governor.allows(REQUEST_PRIORITY_ORDER, 1)
+    assert not governor.allows(REQUEST_PRIORITY_NORMAL, 1)
+    assert not governor.allows(REQUEST_PRIORITY_LOW, 1)
+
+
+def test_droppable_request_over_budget_is_dropped():
+    governor = RequestGovernor(weight_limit=100, window=60)
+    governor.used_weight = 60
+
+    with pytest.raises(RequestDropped):
+        asyncio.run(governor.acquire('get_all_orders', {}, droppable=True))
+
+    assert governor.stats["dropped"] == 1
+    assert governor.used_weight == 60
+
+
+def test_request_over_budget_waits_for_the_next_window():
+    governor = RequestGovernor(weight_limit=10, window=0.2)
+
+    async def scenario():
+        governor.roll_window()
+        governor.used_weight = 10
+        started = time.monotonic()
+        await governor.acquire('create_order', {})
+        return time.monotonic() - started
+
+    assert 0 < asyncio.run(scenario()) <= 0.3
+    assert governor.stats["deferred"] == 1
+    assert governor.used_weight == 1
+    assert not governor.waiting[REQUEST_PRIORITY_ORDER]
+
+
+def test_order_goes_before_waiting_lower_priorities():
+    governor = RequestGovernor(weight_limit=10, window=0.2)
+    acquired = []
+
+    async def acquire(method: str):
+        await governor.acquire(method, {})
+        acquired.append(method)
+
+    async def scenario():
+        governor.roll_window()
+        governor.used_weight = 10
+        low = asyncio.create_task(acquire('get_symbol_ticker'))
+        await asyncio.sleep(0)
+        await asyncio.gather(acquire('create_order'), low)
+
+    asyncio.run(scenario())
+    assert acquired == ['create_order', 'get_symbol_ticker']
+
+
+def test_429_pauses_requests_for_retry_after(simulated_exchange):
+    async def scenario():
+        async with simulated_exchange(weight_limit=20) as (market, server, manager):
+            symbol = next(iter(market.prices))
+            with pytest.raises(BinanceAPIException) as error:
+                for _ in range(20):
+                    await manager._call('get_symbol_ticker', symbol=symbol)
+            assert error.value.status_code == 429
+
+            governor = manager.request_governor
+            assert governor.stats["rate_limited"] == 1
+            assert governor.blocked_until > time.time()
+            assert not governor.allows(REQUEST_PRIORITY_ORDER, 1)
+
+            with pytest.raises(RequestDropped):
+                await manager._call('get_symbol_ticker', droppable=True, symbol=symbol)
+            assert server.stats["rate_limited"] == 1
+
+    asyncio.run(scenario())
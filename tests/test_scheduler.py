@@ -0,0 +1,87 @@
+import asyncio
+import time
+from collections import defaultdict
+from data_classes import CryptoPair, CryptoPairs
+from globals import *
+from scheduler import TradingScheduler
+
+
+class FakeTrader:
+    """The part of Trader the scheduler drives, recording the evaluations in flight per pair."""
+
+    def __init__(self, interval: float, step_time: float = 0.0):
+        self.interval = interval
+        self.step_time = step_time
+        self.wake_events = defaultdict(asyncio.Event)
+        self.steps = []
+        self.in_flight = defaultdict(int)
+        self.max_in_flight = defaultdict(int)
+        self.max_total_in_flight = 0
+
+    def next_wakeup(self, cryptoPair: CryptoPair, strategy) -> float:
+        return time.time() + self.interval
+
+    def wake(self, key):
+        self.wake_events[key].set()
+
+    async def step(self, cryptoPair: CryptoPair, strategy, config):
+        self.in_flight[cryptoPair.pair] += 1
+        self.max_in_flight[cryptoPair.pair] = max(self.max_in_flight[cryptoPair.pair], self.in_flight[cryptoPair.pair])
+        self.max_total_in_flight = max(self.max_total_in_flight, sum(self.in_flight.values()))
+        self.steps.append((cryptoPair.pair, strategy.name))
+        await asyncio.sleep(self.step_time)
+        self.in_flight[cryptoPair.pair] -= 1
+
+
+def crypto_pairs(*names: str) -> CryptoPairs:
+    return CryptoPairs(pairs=[CryptoPair(pair=name, value=1.0, crypto_amount_free=0.0, crypto_amount_locked=0.0) for name in names])
+
+
+def run_scheduler(trader: FakeTrader, pairs: CryptoPairs, duration: float, during=None) -> TradingScheduler:
+    async def scenario():
+        scheduler = TradingScheduler(trader, pairs)
+        task = asyncio.create_task(scheduler.run(watch_config=False))
+        await asyncio.sleep(0.05)
+        if during:
+            during(scheduler)
+        await asyncio.sleep(duration)
+        scheduler.stop()
+        await asyncio.gather(task, *scheduler.tasks.values(), return_exceptions=True)
+        return scheduler
+
+    return asyncio.run(scenario())
+
+
+def test_strategies_of_one_pair_never_run_concurrently(monkeypatch):
+    monkeypatch.setattr(POWER_STATUS, "power_status", True)
+    trader = FakeTrader(interval=0.0, step_time=0.01)
+    run_scheduler(trader, crypto_pairs("SIM0001USDT", "SIM0002USDT"), duration=0.3)
+
+    assert {strategy for _, strategy in trader.steps} == {POOR_ORPHAN, CRAZY_GIRL, SENSIBLE_GUY}
+    assert trader.max_in_flight == {"SIM0001USDT": 1, "SIM0002USDT": 1}
+    assert trader.max_total_in_flight == 2
+
+
+def test_wake_runs_only_the_woken_strategy_before_its_deadline(monkeypatch):
+    monkeypatch.setattr(POWER_STATUS, "power_status", True)
+    trader = FakeTrader(interval=3600.0)
+
+    def wake(scheduler: TradingScheduler):
+        # Starting the run evaluates every strategy once
+        assert len(trader.steps) == 3
+        trader.steps.clear()
+        trader.wake(("SIM0001USDT", CRAZY_GIRL))
+
+    scheduler = run_scheduler(trader, crypto_pairs("SIM0001USDT"), duration=0.1, during=wake)
+
+    assert trader.steps == [("SIM0001USDT", CRAZY_GIRL)]
+    assert scheduler.loop_lag[("SIM0001USDT", CRAZY_GIRL)] == 0.0
+
+
+def test_nothing_runs_while_the_power_is_off(monkeypatch):
+    monkeypatch.setattr(POWER_STATUS, "power_status", False)
+    trader = FakeTrader(interval=0.0)
+    run_scheduler(trader, crypto_pairs("SIM0001USDT"), duration=0.1,
+                  during=lambda scheduler: trader.wake(("SIM0001USDT", CRAZY_GIRL)))
+
+    assert trader.steps == []
@@ -0,0 +1,89 @@
+from data_classes import CryptoPair, Order
+from globals import *
+from state_store import StateStore
+
+
+def crypto_pair(pair: str = "SIM0001USDT") -> CryptoPair:
+    return CryptoPair(pair=pair, value=100.0, crypto_amount_free=1.0, crypto_amount_locked=0.0)
+
+
+def order(order_id: str, status: str = NEW) -> Order:
+    return Order(symbol="SIM0001USDT", order_id=order_id, order_type=BUY, amount=1.0, sell_price=11.0, buy_price=10.0,
+                 timestamp="0", strategy=CRAZY_GIRL, status=status, profit=0.0)
+
+
+def test_saved_state_is_restored_after_a_restart(tmp_path):
+    path = str(tmp_path / DEFAULT_STATE_STORE)
+    store = StateStore(path)
+    store.open()
+
+    traded = crypto_pair()
+    traded.current_state[CRAZY_GIRL] = TradeState.SELLING
+    traded.active_sell_order = order("2")
+    traded.cancelled_orders = 3
+    traded.add_order(order("1", FILLED))
+    traded.add_order(order("2"))
+    store.save(traded)
+    store.close()
+
+    store = StateStore(path)
+    store.open()
+    restored = crypto_pair()
+    assert store.restore(restored)
+    store.close()
+
+    assert restored.current_state[CRAZY_GIRL] == TradeState.SELLING
+    assert restored.current_state[SENSIBLE_GUY] == TradeState.MONITORING
+    assert restored.active_sell_order == order("2")
+    assert restored.cancelled_orders == 3
+    assert [o.order_id for o in restored.buy_orders] == ["1", "2"]
+    assert [o.order_id for o in restored.buy_orders.open_orders()] == ["2"]
+    assert restored.runtime_state() == traded.runtime_state()
+
+
+def test_unknown_pair_is_not_restored(tmp_path):
+    store = StateStore(str(tmp_path / DEFAULT_STATE_STORE))
+    store.open()
+    cryptoPair = crypto_pair()
+    assert not store.restore(cryptoPair)
+    assert cryptoPair.current_state[CRAZY_GIRL] == TradeState.MONITORING
+    store.close()
+
+
+def test_unchanged_state_is_not_written_again(tmp_path):
+    store = StateStore(str(tmp_path / DEFAULT_STATE_STORE))
+    store.open()
+    cryptoPair = crypto_pair()
+    store.save(cryptoPair)
+
+    def updated_at():
+        return store.connection.execute("SELECT updated_at FROM pair_state WHERE pair = ?", (cryptoPair.pair,)).fetchone()[0]
+
+    written_at = updated_at()
+    store.save(cryptoPair)
+    assert updated_at() == written_at
+
+    cryptoPair.cancelled_orders += 1
+    store.save(cryptoPair)
+    assert updated_at() > written_at
+    store.close()
+
+
+def test_reload_reads_the_states_other_processes_saved(tmp_path):
+    path = str(tmp_path / DEFAULT_STATE_STORE)
+    reader, writer = StateStore(path), StateStore(path)
+    reader.open()
+    writer.open()
+
+    cryptoPair = crypto_pair()
+    cryptoPair.current_state[POOR_ORPHAN] = TradeState.COOLDOWN
+    writer.save(cryptoPair)
+    assert not reader.restore(crypto_pair())
+
+    reader.reload([cryptoPair.pair])
+    restored = crypto_pair()
+    assert reader.restore(restored)
+    assert restored.current_state[POOR_ORPHAN] == TradeState.COOLDOWN
+
+    reader.close()
+    writer.close()
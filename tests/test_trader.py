@@ -0,0 +1,43 @@
+import asyncio
+from backtest import BacktestOrderStore
+from data_classes import CryptoPair
+from globals import *
+from market_data import MarketDataStream
+from observable import DEFAULT_STRATEGIES
+from trader import Trader
+
+STRATEGY = DEFAULT_STRATEGIES[CRAZY_GIRL]
+
+
+def test_monitoring_waits_for_the_poll_after_a_failed_placement(simulated_exchange):
+    async def scenario():
+        async with simulated_exchange() as (market, server, manager):
+            Trader._instance = None
+            trader = Trader()
+            trader.order_store = BacktestOrderStore()
+            symbol = next(iter(market.prices))
+            trader.market_stream = MarketDataStream(manager.price_snapshot, [symbol], on_trigger=trader.wake)
+            key = (symbol, STRATEGY.name)
+
+            # Too little balance for an order of min_notional * multiplier
+            cryptoPair = CryptoPair(pair=symbol, value=1.0, crypto_amount_free=1.0, crypto_amount_locked=0.0,
+                                    min_notional=market.min_notional, tick_size=market.tick_size, step_size=market.step_size)
+            trader.arm_price_trigger(cryptoPair, STRATEGY)
+            assert trader.market_stream.triggers[symbol][key] == (None, None)
+
+            await trader.process_strategy(cryptoPair, STRATEGY, allocation=1.0)
+            trader.arm_price_trigger(cryptoPair, STRATEGY)
+            assert cryptoPair.current_state[STRATEGY.name] == TradeState.MONITORING
+            assert key not in trader.market_stream.trigger_symbols
+            assert trader.next_wakeup(cryptoPair, STRATEGY) <= trader.clock().timestamp() + SCHEDULER_POLL_INTERVAL
+
+            cryptoPair.value = 1000.0
+            await trader.process_strategy(cryptoPair, STRATEGY, allocation=1.0)
+            trader.arm_price_trigger(cryptoPair, STRATEGY)
+            assert cryptoPair.current_state[STRATEGY.name] == TradeState.SELLING
+            assert trader.market_stream.triggers[symbol][key] == (None, float(cryptoPair.active_sell_order.sell_price))
+            assert key not in trader.placement_failed
+
+            Trader._instance = None
+
+    asyncio.run(scenario())
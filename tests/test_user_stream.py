@@ -0,0 +1,88 @@
+import asyncio
+import time
+from globals import *
+from user_stream import OrderIndex
+
+
+def order(order_id: int, status: str = NEW) -> dict:
+    return {SYMBOL: "SIM0001USDT", ORDER_ID: order_id, STATUS: status}
+
+
+def test_index_keeps_only_the_most_recent_finished_orders():
+    index = OrderIndex(terminal_capacity=2)
+    for order_id in range(1, 4):
+        index.update(order(order_id))
+    for order_id in range(1, 4):
+        index.update(order(order_id, FILLED))
+
+    assert len(index) == 2
+    assert index.get(1) is None
+    assert index.get(3)[STATUS] == FILLED
+
+
+def test_open_orders_are_never_evicted():
+    index = OrderIndex(terminal_capacity=1)
+    index.update(order(1))
+    for order_id in range(2, 6):
+        index.update(order(order_id, CANCELED))
+
+    assert len(index) == 2
+    assert index.get(1)[STATUS] == NEW
+    assert index.get(5)[STATUS] == CANCELED
+
+
+def test_reopened_and_discarded_orders_leave_the_terminal_set():
+    index = OrderIndex(terminal_capacity=2)
+    index.update(order(1, FILLED))
+    index.update(order(1))
+    index.update(order(2, FILLED))
+    index.discard(2)
+
+    assert list(index.terminal) == []
+    assert len(index) == 1
+
+
+def test_expired_entries_are_not_served():
+    index = OrderIndex()
+    index.update(order(1))
+    index.expire()
+
+    assert index.get(1) is None
+    index.update(order(1, FILLED))
+    assert index.get(1)[STATUS] == FILLED
+
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_fill_missed_while_disconnected_is_seen_after_reconnecting(simulated_exchange):
+    async def scenario():
+        async with simulated_exchange() as (market, server, manager):
+            stream = manager.user_stream
+            stream.url = f"ws://{server.host}:{server.port}/ws"
+            task = asyncio.create_task(stream.run())
+            await wait_for(lambda: stream.connected and server.user_sockets)
+
+            symbol = next(iter(market.prices))
+            price = market.round_price(market.prices[symbol] * 0.9)
+            placed = market.create_order(symbol, BUY, f"{round(10 / price, 4):.4f}", f"{price:.4f}")
+            await wait_for(lambda: manager.order_index.get(placed[ORDER_ID]) is not None)
+            assert (await manager.get_order_status(symbol, placed[ORDER_ID]))[STATUS] == NEW
+            await manager.wallet.get()
+
+            await server.disconnect()
+            await wait_for(lambda: not stream.connected)
+            market.fill(market.orders[placed[ORDER_ID]])
+            await wait_for(lambda: stream.connected, timeout=10)
+
+            assert not manager.wallet.is_fresh()
+            assert (await manager.get_order_status(symbol, placed[ORDER_ID]))[STATUS] == FILLED
+
+            stream.stop()
+            task.cancel()
+
+    asyncio.run(scenario())
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from data_classes import CryptoPair
+from globals import *
+from wallet_cache import WalletCache
+
+
+class Account:
+    """fetch_balances of a WalletCache, counting the account requests."""
+
+    def __init__(self):
+        self.requests = 0
+        self.balances = {"USDT": {FREE: "100.00000000", LOCKED: "0.00000000"}}
+
+    async def fetch(self) -> dict:
+        self.requests += 1
+        await asyncio.sleep(0.01)
+        return dict(self.balances)
+
+
+def test_snapshot_is_reused_until_stale_or_invalidated():
+    account = Account()
+    wallet = WalletCache(fetch_balances=account.fetch, max_staleness=60)
+
+    async def scenario():
+        await asyncio.gather(*(wallet.get() for _ in range(5)))
+        assert account.requests == 1
+
+        wallet.invalidate()
+        assert not wallet.is_fresh()
+        await wallet.get()
+        assert account.requests == 2
+
+        wallet.updated_at = time.time() - 61
+        await wallet.get()
+        assert account.requests == 3
+
+    asyncio.run(scenario())
+
+
+def test_streaming_snapshot_uses_its_own_staleness():
+    streaming = [False]
+    wallet = WalletCache(fetch_balances=Account().fetch, is_streaming=lambda: streaming[0], max_staleness=5, stream_staleness=600)
+    asyncio.run(wallet.get())
+    wallet.updated_at = time.time() - 60
+
+    assert not wallet.is_fresh()
+    streaming[0] = True
+    assert wallet.is_fresh()
+
+
+def test_account_position_updates_and_removes_assets():
+    wallet = WalletCache(fetch_balances=Account().fetch)
+    asyncio.run(wallet.get())
+
+    wallet.apply_account_position({"B": [
+        {"a": "BTC", "f": "0.50000000", "l": "0.10000000"},
+        {"a": "USDT", "f": "0.00000000", "l": "0.00000000"},
+    ]})
+    assert wallet.balances == {"BTC": {FREE: "0.50000000", LOCKED: "0.10000000"}}
+
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_placed_order_invalidates_and_fill_updates_the_wallet(simulated_exchange):
+    async def scenario():
+        async with simulated_exchange() as (market, server, manager):
+            stream = manager.user_stream
+            stream.url = f"ws://{server.host}:{server.port}/ws"
+            task = asyncio.create_task(stream.run())
+            await wait_for(lambda: stream.connected and server.user_sockets)
+
+            symbol = next(iter(market.prices))
+            base = symbol[:-4]
+            cryptoPair = CryptoPair(pair=symbol, value=1000.0, crypto_amount_free=0.0, crypto_amount_locked=0.0, min_notional=market.min_notional,
+                                    tick_size=market.tick_size, step_size=market.step_size)
+            await manager.wallet.get()
+            requests = server.stats["GET account"]
+
+            price = market.round_price(market.prices[symbol] * 0.9)
+            placed = await manager.limit_order(cryptoPair, round(10 / price, 4), price, BUY)
+            assert not manager.wallet.is_fresh()
+            await manager.wallet.get()
+            assert server.stats["GET account"] == requests + 1
+
+            market.fill(market.orders[placed[ORDER_ID]])
+            free = f"{market.free[base]:.8f}"
+            await wait_for(lambda: manager.wallet.balances.get(base, {}).get(FREE) == free)
+            assert manager.wallet.is_fresh()
+            assert server.stats["GET account"] == requests + 1
+
+            stream.stop()
+            task.cancel()
+
+    asyncio.run(scenario())